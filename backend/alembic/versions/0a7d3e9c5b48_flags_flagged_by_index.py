@@ -0,0 +1,28 @@
+"""index flags.flagged_by_user_id
+
+Revision ID: 0a7d3e9c5b48
+Revises: f2b6d8a0c913
+Create Date: 2025-11-30 10:22:09.418265
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0a7d3e9c5b48'
+down_revision: Union[str, None] = 'f2b6d8a0c913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_flags_flagged_by_user_id'), 'flags', ['flagged_by_user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_flags_flagged_by_user_id'), table_name='flags')
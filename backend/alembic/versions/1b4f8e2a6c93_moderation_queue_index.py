@@ -0,0 +1,33 @@
+"""moderation queue partial index
+
+Revision ID: 1b4f8e2a6c93
+Revises: 0a7d3e9c5b48
+Create Date: 2025-12-01 09:41:37.206118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1b4f8e2a6c93'
+down_revision: Union[str, None] = '0a7d3e9c5b48'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_stories_moderation_queue', 'stories',
+        [sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False,
+        postgresql_where=sa.text('is_flagged AND deleted_at IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_stories_moderation_queue', table_name='stories')
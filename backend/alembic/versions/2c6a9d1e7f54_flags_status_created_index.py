@@ -0,0 +1,28 @@
+"""flags (status, created_at, id) index
+
+Revision ID: 2c6a9d1e7f54
+Revises: 1b4f8e2a6c93
+Create Date: 2025-12-02 11:05:48.731920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2c6a9d1e7f54'
+down_revision: Union[str, None] = '1b4f8e2a6c93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_flags_status_created_at', 'flags', ['status', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_flags_status_created_at', table_name='flags')
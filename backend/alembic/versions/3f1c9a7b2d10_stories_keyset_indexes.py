@@ -0,0 +1,40 @@
+"""stories keyset pagination indexes
+
+Revision ID: 3f1c9a7b2d10
+Revises: ea6ae513e2d6
+Create Date: 2025-11-24 10:12:05.118734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7b2d10'
+down_revision: Union[str, None] = 'ea6ae513e2d6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_stories_feed_keyset', 'stories',
+        [sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False,
+        postgresql_where=sa.text('deleted_at IS NULL AND is_published'),
+    )
+    op.create_index(
+        'ix_stories_user_keyset', 'stories',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False,
+        postgresql_where=sa.text('deleted_at IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_stories_user_keyset', table_name='stories')
+    op.drop_index('ix_stories_feed_keyset', table_name='stories')
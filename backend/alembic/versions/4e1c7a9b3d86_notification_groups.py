@@ -0,0 +1,47 @@
+"""aggregated notification groups
+
+Revision ID: 4e1c7a9b3d86
+Revises: 3d8b0f6c2a75
+Create Date: 2025-12-04 10:18:26.904417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e1c7a9b3d86'
+down_revision: Union[str, None] = '3d8b0f6c2a75'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('notifications', sa.Column('actor_count', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('notifications', sa.Column('recent_actor_ids', postgresql.ARRAY(postgresql.UUID(as_uuid=True)), server_default='{}', nullable=False))
+    op.add_column('notifications', sa.Column('group_bucket', sa.BigInteger(), nullable=True))
+    op.add_column('notifications', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    # Existing rows keep their single actor; they are never merged into (group_bucket stays NULL).
+    op.execute(
+        "UPDATE notifications SET updated_at = created_at, "
+        "recent_actor_ids = CASE WHEN actor_id IS NULL THEN '{}' ELSE ARRAY[actor_id] END"
+    )
+    op.create_index(
+        'uq_notifications_open_group', 'notifications',
+        ['recipient_id', 'action', 'target_type', 'target_id', 'group_bucket'],
+        unique=True,
+        postgresql_where=sa.text('NOT is_read AND group_bucket IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_notifications_open_group', table_name='notifications')
+    op.drop_column('notifications', 'updated_at')
+    op.drop_column('notifications', 'group_bucket')
+    op.drop_column('notifications', 'recent_actor_ids')
+    op.drop_column('notifications', 'actor_count')
@@ -0,0 +1,47 @@
+"""users.unread_notifications counter and inbox index
+
+Revision ID: 5f2d8b0c4e97
+Revises: 4e1c7a9b3d86
+Create Date: 2025-12-05 16:02:11.538264
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f2d8b0c4e97'
+down_revision: Union[str, None] = '4e1c7a9b3d86'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('unread_notifications', sa.Integer(), server_default='0', nullable=False))
+    op.execute(
+        """
+        UPDATE users SET unread_notifications = unread.n
+        FROM (
+            SELECT recipient_id, count(*) AS n FROM notifications
+            WHERE NOT is_read GROUP BY recipient_id
+        ) AS unread
+        WHERE unread.recipient_id = users.id
+        """
+    )
+    op.create_index(
+        'ix_notifications_recipient_unread', 'notifications',
+        ['recipient_id', 'is_read', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False,
+    )
+    # Covered by the composite index's leading column.
+    op.drop_index('ix_notifications_recipient_id', table_name='notifications')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_notifications_recipient_id', 'notifications', ['recipient_id'], unique=False)
+    op.drop_index('ix_notifications_recipient_unread', table_name='notifications')
+    op.drop_column('users', 'unread_notifications')
@@ -0,0 +1,37 @@
+"""notification inbox keyset and retention indexes
+
+Revision ID: 6a3e9c1d5f08
+Revises: 5f2d8b0c4e97
+Create Date: 2025-12-08 10:41:37.902115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6a3e9c1d5f08'
+down_revision: Union[str, None] = '5f2d8b0c4e97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_notifications_recipient_created', 'notifications',
+        ['recipient_id', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False,
+    )
+    op.create_index(
+        'ix_notifications_read_created_at', 'notifications', ['created_at'],
+        unique=False, postgresql_where=sa.text('is_read'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_notifications_read_created_at', table_name='notifications', postgresql_where=sa.text('is_read'))
+    op.drop_index('ix_notifications_recipient_created', table_name='notifications')
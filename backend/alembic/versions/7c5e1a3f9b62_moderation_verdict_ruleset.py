@@ -0,0 +1,30 @@
+"""moderation verdict rule set
+
+Revision ID: 7c5e1a3f9b62
+Revises: 6a3e9c1d5f08
+Create Date: 2025-12-12 09:18:24.551370
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c5e1a3f9b62'
+down_revision: Union[str, None] = '6a3e9c1d5f08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing rows stay NULL: their rule set is unknown, so the first maintenance pass
+    # treats them as stale; any still current are simply re-scanned once.
+    op.add_column('moderation_verdicts', sa.Column('ruleset', sa.String(length=16), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('moderation_verdicts', 'ruleset')
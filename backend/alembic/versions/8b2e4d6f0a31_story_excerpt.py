@@ -0,0 +1,39 @@
+"""add stories.excerpt for summary listings
+
+Revision ID: 8b2e4d6f0a31
+Revises: 3f1c9a7b2d10
+Create Date: 2025-11-25 09:41:27.503112
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2e4d6f0a31'
+down_revision: Union[str, None] = '3f1c9a7b2d10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('stories', sa.Column('excerpt', sa.String(length=300), nullable=True))
+    # Backfill: strip tags, collapse whitespace, keep the first 280 chars
+    op.execute(
+        r"""
+        UPDATE stories
+        SET excerpt = left(
+            btrim(regexp_replace(regexp_replace(content, '<[^>]+>', ' ', 'g'), '\s+', ' ', 'g')),
+            280
+        )
+        WHERE excerpt IS NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('stories', 'excerpt')
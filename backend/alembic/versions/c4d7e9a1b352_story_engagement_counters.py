@@ -0,0 +1,43 @@
+"""denormalized engagement counters on stories
+
+Revision ID: c4d7e9a1b352
+Revises: 8b2e4d6f0a31
+Create Date: 2025-11-26 14:03:52.771920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d7e9a1b352'
+down_revision: Union[str, None] = '8b2e4d6f0a31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNTERS = ('likes_count', 'bookmarks_count', 'comments_count', 'views_count', 'flags_count')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name in COUNTERS:
+        op.add_column('stories', sa.Column(name, sa.Integer(), server_default='0', nullable=False))
+    # Initial backfill from the source tables
+    op.execute(
+        """
+        UPDATE stories SET
+            likes_count = (SELECT count(*) FROM likes WHERE likes.story_id = stories.id),
+            bookmarks_count = (SELECT count(*) FROM bookmarks WHERE bookmarks.story_id = stories.id),
+            comments_count = (SELECT count(*) FROM comments WHERE comments.story_id = stories.id),
+            views_count = (SELECT count(*) FROM view_history WHERE view_history.story_id = stories.id),
+            flags_count = (SELECT count(*) FROM flags WHERE flags.story_id = stories.id)
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in reversed(COUNTERS):
+        op.drop_column('stories', name)
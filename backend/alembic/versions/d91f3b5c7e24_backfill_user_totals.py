@@ -0,0 +1,44 @@
+"""backfill users.total_posts / total_likes / total_comments
+
+Revision ID: d91f3b5c7e24
+Revises: c4d7e9a1b352
+Create Date: 2025-11-27 11:26:40.392817
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd91f3b5c7e24'
+down_revision: Union[str, None] = 'c4d7e9a1b352'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The columns always existed but were never maintained; seed them once.
+    op.execute(
+        """
+        UPDATE users SET
+            total_posts = (
+                SELECT count(*) FROM stories
+                WHERE stories.user_id = users.id AND stories.deleted_at IS NULL
+            ),
+            total_likes = (
+                SELECT count(*) FROM likes JOIN stories ON stories.id = likes.story_id
+                WHERE stories.user_id = users.id AND stories.deleted_at IS NULL
+            ),
+            total_comments = (
+                SELECT count(*) FROM comments WHERE comments.user_id = users.id
+            )
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    pass
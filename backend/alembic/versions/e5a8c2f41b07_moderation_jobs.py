@@ -0,0 +1,58 @@
+"""moderation job queue and pending_review story status
+
+Revision ID: e5a8c2f41b07
+Revises: d91f3b5c7e24
+Create Date: 2025-11-28 09:41:17.302518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a8c2f41b07'
+down_revision: Union[str, None] = 'd91f3b5c7e24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # ALTER TYPE ... ADD VALUE cannot run inside a transaction block on older Postgres
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE storystatus ADD VALUE IF NOT EXISTS 'pending_review'")
+
+    op.create_table(
+        'moderation_jobs',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('story_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('reason', sa.String(length=32), nullable=False),
+        sa.Column('publish', sa.Boolean(), nullable=False),
+        sa.Column('hold_status', sa.String(length=32), nullable=False),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['story_id'], ['stories.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_moderation_jobs_story_id'), 'moderation_jobs', ['story_id'], unique=False)
+    op.create_index(
+        'ix_moderation_jobs_claimable', 'moderation_jobs', ['created_at'],
+        unique=False,
+        postgresql_where=sa.text("status IN ('pending', 'running')"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_moderation_jobs_claimable', table_name='moderation_jobs')
+    op.drop_index(op.f('ix_moderation_jobs_story_id'), table_name='moderation_jobs')
+    op.drop_table('moderation_jobs')
+    # Postgres cannot drop a single enum value; move any pending stories back to draft.
+    op.execute("UPDATE stories SET status = 'draft' WHERE status = 'pending_review'")
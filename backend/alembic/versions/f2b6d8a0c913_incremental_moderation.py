@@ -0,0 +1,40 @@
+"""story text fingerprints and per-chunk moderation verdicts
+
+Revision ID: f2b6d8a0c913
+Revises: e5a8c2f41b07
+Create Date: 2025-11-29 16:08:44.590126
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b6d8a0c913'
+down_revision: Union[str, None] = 'e5a8c2f41b07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Left NULL for existing rows: the next edit scans them in full and records the hashes.
+    op.add_column('stories', sa.Column('title_hash', sa.String(length=64), nullable=True))
+    op.add_column('stories', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.create_table(
+        'moderation_verdicts',
+        sa.Column('chunk_hash', sa.String(length=64), nullable=False),
+        sa.Column('flagged', sa.Boolean(), nullable=False),
+        sa.Column('categories', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('chunk_hash'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('moderation_verdicts')
+    op.drop_column('stories', 'content_hash')
+    op.drop_column('stories', 'title_hash')
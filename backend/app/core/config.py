@@ -30,6 +30,41 @@ class Settings(BaseSettings):
     LLM_TEMPERATURE: float = float(os.getenv("LLM_TEMPERATURE", "0.8"))
     LLM_MAX_TOKENS: int = int(os.getenv("LLM_MAX_TOKENS", "2048"))
     LLM_TIMEOUT: float = float(os.getenv("LLM_TIMEOUT", "30"))  # seconds
+    # List totals cache (per-process; TTL bounds staleness across workers)
+    COUNT_CACHE_TTL: int = int(os.getenv("COUNT_CACHE_TTL", "30"))  # seconds
+    COUNT_CACHE_MAXSIZE: int = int(os.getenv("COUNT_CACHE_MAXSIZE", "2048"))
+    # Tag name -> id lookups (per-process; tags.py mutations invalidate, TTL covers other workers)
+    TAG_CACHE_TTL: int = int(os.getenv("TAG_CACHE_TTL", "300"))  # seconds
+    TAG_CACHE_MAXSIZE: int = int(os.getenv("TAG_CACHE_MAXSIZE", "10000"))
+    # Story view logging (write-behind buffer)
+    VIEW_BUFFER_MAX_SIZE: int = int(os.getenv("VIEW_BUFFER_MAX_SIZE", "500"))
+    VIEW_BUFFER_FLUSH_SECONDS: float = float(os.getenv("VIEW_BUFFER_FLUSH_SECONDS", "5"))
+    VIEW_DEDUP_WINDOW_SECONDS: int = int(os.getenv("VIEW_DEDUP_WINDOW_SECONDS", "1800"))  # 0 disables dedup
+    # Story moderation pipeline (app.services.moderation_jobs)
+    MODERATION_ASYNC: bool = os.getenv("MODERATION_ASYNC", "true").lower() in ("1", "true", "yes")
+    MODERATION_WORKERS: int = int(os.getenv("MODERATION_WORKERS", "2"))
+    MODERATION_POLL_SECONDS: float = float(os.getenv("MODERATION_POLL_SECONDS", "2"))
+    MODERATION_BATCH_SIZE: int = int(os.getenv("MODERATION_BATCH_SIZE", "20"))
+    MODERATION_LEASE_SECONDS: int = int(os.getenv("MODERATION_LEASE_SECONDS", "300"))  # reclaim stuck jobs
+    MODERATION_MAX_ATTEMPTS: int = int(os.getenv("MODERATION_MAX_ATTEMPTS", "3"))
+    # Comment moderation: short comments are scanned inline, longer ones in background batches
+    COMMENT_SYNC_MODERATION_CHARS: int = int(os.getenv("COMMENT_SYNC_MODERATION_CHARS", "1000"))
+    COMMENT_MODERATION_BATCH_SIZE: int = int(os.getenv("COMMENT_MODERATION_BATCH_SIZE", "100"))
+    COMMENT_MODERATION_FLUSH_SECONDS: float = float(os.getenv("COMMENT_MODERATION_FLUSH_SECONDS", "2"))
+    # Notification outbox (app.services.notification_outbox); off = write notifications directly
+    NOTIFICATIONS_ASYNC: bool = os.getenv("NOTIFICATIONS_ASYNC", "true").lower() in ("1", "true", "yes")
+    NOTIFICATION_BATCH_SIZE: int = int(os.getenv("NOTIFICATION_BATCH_SIZE", "500"))
+    NOTIFICATION_FLUSH_SECONDS: float = float(os.getenv("NOTIFICATION_FLUSH_SECONDS", "1"))
+    NOTIFICATION_GROUP_WINDOW_SECONDS: int = int(os.getenv("NOTIFICATION_GROUP_WINDOW_SECONDS", "86400"))  # likes/comments per target fold into one row per window
+    # Live notification stream: "local" (this worker only) or "redis" (fan out across workers)
+    NOTIFICATION_BROKER: str = os.getenv("NOTIFICATION_BROKER", "local")
+    REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    NOTIFICATION_STREAM_MAX_PENDING: int = int(os.getenv("NOTIFICATION_STREAM_MAX_PENDING", "100"))  # per connection
+    NOTIFICATION_STREAM_HEARTBEAT_SECONDS: float = float(os.getenv("NOTIFICATION_STREAM_HEARTBEAT_SECONDS", "15"))
+    NOTIFICATION_MAINTENANCE_SECONDS: float = float(os.getenv("NOTIFICATION_MAINTENANCE_SECONDS", "3600"))  # counter reconciliation + retention; 0 disables
+    NOTIFICATION_RETENTION_DAYS: int = int(os.getenv("NOTIFICATION_RETENTION_DAYS", "90"))  # read notifications older than this are deleted; 0 keeps them
+    NOTIFICATION_PRUNE_BATCH_SIZE: int = int(os.getenv("NOTIFICATION_PRUNE_BATCH_SIZE", "1000"))  # rows per delete transaction
+    NOTIFICATION_PRUNE_PAUSE_SECONDS: float = float(os.getenv("NOTIFICATION_PRUNE_PAUSE_SECONDS", "0.1"))  # between delete batches
     model_config = SettingsConfigDict(
         env_file='.env',
         env_file_encoding='utf-8',
@@ -19,6 +19,12 @@ from app.routes.ads import router as ad_admin_router, public_router as ad_public
 from app.utils.db_logger import DatabaseLogHandler, PiiScrubbingFilter
 from app.middleware.logging import LoggingMiddleware
 from app.routes import media
+from app.services.view_buffer import view_buffer
+from app.services.moderation_jobs import moderation_queue
+from app.services.notification_outbox import notification_dispatcher
+from app.services.notification_broker import notification_broker
+from app.services.notification_maintenance import notification_maintenance
+from app.services.comment_moderation import comment_moderation
 # ---- App-scoped logger (avoid root) ----
 app_logger = logging.getLogger("app")
 app_logger.setLevel(logging.INFO)
@@ -86,6 +92,27 @@ async def unhandled_exception_handler(request: Request, exc: Exception):
         content={"detail": "An internal server error occurred. The team has been notified."},
     )
 
+@app.on_event("startup")
+def start_background_writers():
+    view_buffer.start()
+    if settings.MODERATION_ASYNC:
+        moderation_queue.start()
+        comment_moderation.start()
+    if settings.NOTIFICATIONS_ASYNC:
+        notification_dispatcher.start()
+    notification_broker.start()
+    notification_maintenance.start()
+
+@app.on_event("shutdown")
+def stop_background_writers():
+    # drain buffered views before the process exits
+    view_buffer.stop()
+    moderation_queue.stop()
+    comment_moderation.stop()
+    notification_dispatcher.stop()
+    notification_broker.stop()
+    notification_maintenance.stop()
+
 @app.get("/")
 def read_root():
     return {"msg": "It works!"}
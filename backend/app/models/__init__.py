@@ -34,4 +34,7 @@ from .analytics import AnalyticsCache
 from .audit_log import AuditLog
 from .error_logs import ErrorLog
 from .notification import Notification
+from .notification_outbox import NotificationOutbox
 from .creator_request import CreatorRequest
+from .moderation_job import ModerationJob
+from .moderation_verdict import ModerationVerdict
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, ForeignKey, Text, String, Boolean, DateTime, Index, text
+from datetime import datetime
+from app.core.database import Base
+from sqlalchemy.dialects.postgresql import UUID
+import uuid
+
+
+class ModerationJob(Base):
+    """
+    Durable queue entry for scanning a story off the request path.
+    status: pending -> running -> done | failed; superseded when a newer job for the
+    same story is queued before this one ran.
+    """
+    __tablename__ = "moderation_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    story_id = Column(UUID(as_uuid=True), ForeignKey("stories.id", ondelete="CASCADE"), nullable=False, index=True)
+    reason = Column(String(32), nullable=False)          # create | update | generate | regenerate | rescan
+    publish = Column(Boolean, nullable=False, default=False)  # publish if the scan is clean
+    hold_status = Column(String(32), nullable=False)     # StoryStatus value used when not publishing
+    status = Column(String(16), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    # Workers poll the oldest claimable jobs; keep that index small.
+    __table_args__ = (
+        Index(
+            "ix_moderation_jobs_claimable", created_at,
+            postgresql_where=text("status IN ('pending', 'running')"),
+        ),
+    )
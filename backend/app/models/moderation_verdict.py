@@ -0,0 +1,19 @@
+from sqlalchemy import Column, String, Boolean, DateTime
+from datetime import datetime
+from app.core.database import Base
+
+
+class ModerationVerdict(Base):
+    """
+    Scan result for one chunk of text (a title or a paragraph), keyed by the hash of the
+    rule-set version plus the chunk. Identical chunks, in any story, are scanned once.
+    Rows written under an older rule set can never be looked up again; notification
+    maintenance deletes them by `ruleset`.
+    """
+    __tablename__ = "moderation_verdicts"
+
+    chunk_hash = Column(String(64), primary_key=True)
+    flagged = Column(Boolean, nullable=False)
+    categories = Column(String, nullable=False, default="")  # ";"-joined
+    ruleset = Column(String(16), nullable=True)  # RULESET_VERSION it was scanned under; NULL on rows older than the column
+    created_at = Column(DateTime, default=datetime.utcnow)
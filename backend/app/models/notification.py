@@ -1,21 +1,41 @@
 # app/models/notification.py
 
-from sqlalchemy import Column, Integer, ForeignKey, String, DateTime, Boolean
+from sqlalchemy import Column, Integer, BigInteger, ForeignKey, String, DateTime, Boolean, Index, text
 from datetime import datetime
 from app.core.database import Base
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
 from sqlalchemy.orm import relationship
 import uuid
 class Notification(Base):
     __tablename__ = "notifications"
     id =  Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    recipient_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    recipient_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     actor_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
     action = Column(String, nullable=False) 
     target_type = Column(String, nullable=True)
     target_id = Column(UUID(as_uuid=True), nullable=True)
     is_read = Column(Boolean, default=False, nullable=False, index=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    
+    created_at = Column(DateTime, default=datetime.utcnow)  # for a group: its latest activity (inbox order)
+    # Aggregation: likes/comments on the same target within one window fold into a
+    # single unread row ("12 people liked your story").
+    actor_count = Column(Integer, nullable=False, default=1, server_default="1")
+    recent_actor_ids = Column(ARRAY(UUID(as_uuid=True)), nullable=False, default=list, server_default="{}")  # newest first
+    group_bucket = Column(BigInteger, nullable=True)  # window number; NULL = never aggregated
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
     recipient = relationship("User", foreign_keys=[recipient_id])
-    actor = relationship("User", foreign_keys=[actor_id])
\ No newline at end of file
+    actor = relationship("User", foreign_keys=[actor_id])
+
+    __table_args__ = (
+        # Inbox listing, newest first: unread-only, and all; also serve unread counts.
+        Index("ix_notifications_recipient_unread", recipient_id, is_read, created_at.desc(), id.desc()),
+        Index("ix_notifications_recipient_created", recipient_id, created_at.desc(), id.desc()),
+        # Retention: oldest read rows first, without scanning the unread ones.
+        Index("ix_notifications_read_created_at", created_at, postgresql_where=text("is_read")),
+        # One open (unread) group per (recipient, action, target, window); ON CONFLICT target for aggregation.
+        Index(
+            "uq_notifications_open_group", recipient_id, action, target_type, target_id, group_bucket,
+            unique=True,
+            postgresql_where=text("NOT is_read AND group_bucket IS NOT NULL"),
+        ),
+    )
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, ForeignKey, String, DateTime
+from datetime import datetime
+from app.core.database import Base
+from sqlalchemy.dialects.postgresql import UUID
+import uuid
+
+
+class NotificationOutbox(Base):
+    """
+    Notification written in the caller's transaction and not yet delivered. The
+    dispatcher moves rows into `notifications` in batches; the outbox id becomes the
+    notification id, so a redelivered row is a no-op.
+    """
+    __tablename__ = "notification_outbox"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    recipient_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    actor_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
+    action = Column(String, nullable=False)
+    target_type = Column(String, nullable=True)
+    target_id = Column(UUID(as_uuid=True), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
@@ -1,6 +1,6 @@
 from sqlalchemy import (
     Column, Integer, String, Boolean, ForeignKey, DateTime, 
-    Text, Enum, Float
+    Text, Enum, Float, Index, text
 )
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -25,6 +25,7 @@ class StoryStatus(enum.Enum):
     generated = "generated"
     published = "published"
     rejected = "rejected"
+    pending_review = "pending_review"  # waiting for the moderation worker
 
 class LengthLabel(enum.Enum):
     flash = "flash"
@@ -43,6 +44,10 @@ class Story(Base):
     title = Column(String, nullable=False)
     header = Column(String, nullable=True)
     content = Column(Text, nullable=False)
+    excerpt = Column(String(300), nullable=True)  # plain-text preview, written with content
+    # sha256 of title/content as last submitted for moderation; unchanged fields are not re-scanned
+    title_hash = Column(String(64), nullable=True)
+    content_hash = Column(String(64), nullable=True)
     cover_image_url = Column(String, nullable=True)
     
     # Status & Visibility
@@ -83,3 +88,27 @@ class Story(Base):
     parent_id = Column(UUID(as_uuid=True), ForeignKey("stories.id"), nullable=True) # Corrected: self-referencing FK
     version = Column(Integer, default=1)
     last_feedback = Column(Text, nullable=True)
+
+    # Denormalized engagement counters (maintained by app.services.counters)
+    likes_count = Column(Integer, nullable=False, default=0, server_default="0")
+    bookmarks_count = Column(Integer, nullable=False, default=0, server_default="0")
+    comments_count = Column(Integer, nullable=False, default=0, server_default="0")
+    views_count = Column(Integer, nullable=False, default=0, server_default="0")
+    flags_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # Keyset pagination: newest-first feed seeks on (created_at, id)
+    __table_args__ = (
+        Index(
+            "ix_stories_feed_keyset", created_at.desc(), id.desc(),
+            postgresql_where=text("deleted_at IS NULL AND is_published"),
+        ),
+        Index(
+            "ix_stories_user_keyset", user_id, created_at.desc(), id.desc(),
+            postgresql_where=text("deleted_at IS NULL"),
+        ),
+        # Moderation queue: flagged stories only, newest first
+        Index(
+            "ix_stories_moderation_queue", created_at.desc(), id.desc(),
+            postgresql_where=text("is_flagged AND deleted_at IS NULL"),
+        ),
+    )
@@ -21,6 +21,7 @@ class User(Base):
     total_posts = Column(Integer, default=0)
     total_likes = Column(Integer, default=0)
     total_comments = Column(Integer, default=0)
+    unread_notifications = Column(Integer, nullable=False, default=0, server_default="0")  # maintained by notify / mark-read
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     last_login_at = Column(DateTime(timezone=True), nullable=True)
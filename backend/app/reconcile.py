@@ -0,0 +1,49 @@
+"""
+Recompute denormalized counters from the source tables.
+
+    python -m app.reconcile            # everything
+    python -m app.reconcile --stories  # stories.likes_count / bookmarks_count / ...
+    python -m app.reconcile --users    # users.total_posts / total_likes / total_comments
+    python -m app.reconcile --notifications  # users.unread_notifications (also runs hourly in-app)
+
+Safe to run while the app is serving traffic; each pass is one set-based UPDATE.
+"""
+import argparse
+import logging
+
+from app.core.database import SessionLocal
+from app.services.counters import reconcile_story_counters, reconcile_unread_notifications, reconcile_user_counters
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Recompute denormalized counters.")
+    parser.add_argument("--stories", action="store_true", help="story engagement counters")
+    parser.add_argument("--users", action="store_true", help="user profile totals")
+    parser.add_argument("--notifications", action="store_true", help="unread notification counters")
+    args = parser.parse_args(argv)
+    run_all = not (args.stories or args.users or args.notifications)
+
+    db = SessionLocal()
+    try:
+        if run_all or args.stories:
+            n = reconcile_story_counters(db)
+            logger.info("Reconciled counters for %d stories.", n)
+        if run_all or args.users:
+            n = reconcile_user_counters(db)
+            logger.info("Reconciled totals for %d users.", n)
+        if run_all or args.notifications:
+            n = reconcile_unread_notifications(db)
+            logger.info("Corrected unread notification counters for %d users.", n)
+    except Exception:
+        db.rollback()
+        logger.exception("Counter reconciliation failed")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Re-run moderation over the whole corpus, e.g. after the word list changes.
+
+    python -m app.remoderate                        # stories, then comments
+    python -m app.remoderate --only stories --workers 8 --chunk-size 1000
+    python -m app.remoderate --checkpoint /var/tmp/remod.json   # resume after a crash
+
+Only adds automod flags (and unpublishes newly flagged stories); existing flags are
+left alone. The checkpoint is discarded automatically when the rule set has changed.
+"""
+import argparse
+import logging
+
+from app.core.database import SessionLocal
+from app.services.rescan import TARGETS, Checkpoint, RescanStats, rescan_corpus
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _report(target: str, stats: RescanStats) -> None:
+    logger.info("%s: %d scanned, %d newly flagged, %.0f rows/s", target, stats.scanned, stats.flagged, stats.rate)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Re-moderate stories and comments.")
+    parser.add_argument("--only", choices=TARGETS, help="limit to one table")
+    parser.add_argument("--workers", type=int, default=None, help="scanner processes (default: CPU count, 0 = inline)")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--checkpoint", default=".remoderate-checkpoint.json", help="resume file ('' to disable)")
+    args = parser.parse_args(argv)
+
+    read_db, write_db = SessionLocal(), SessionLocal()
+    try:
+        results = rescan_corpus(
+            read_db,
+            write_db,
+            targets=[args.only] if args.only else TARGETS,
+            chunk_size=args.chunk_size,
+            workers=args.workers,
+            checkpoint=Checkpoint(args.checkpoint or None),
+            progress=_report,
+        )
+        for target, stats in results.items():
+            logger.info("Done with %s.", target)
+            _report(target, stats)
+    except Exception:
+        write_db.rollback()
+        logger.exception("Re-moderation stopped; rerun with the same --checkpoint to resume")
+        raise
+    finally:
+        read_db.close()
+        write_db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ from app.schemas.comments import CommentCreate, CommentOut, CommentList
 from app.schemas.user import UserOut # Assuming UserOut has been updated for UUIDs
 from app.services.comments import create_comment, list_comments, delete_comment
 from app.dependencies import get_db, get_current_user, get_current_user_optional
+from app.utils.count_cache import TotalMode
 
 router = APIRouter(tags=["Comments"])
 
@@ -35,9 +36,10 @@ def get_story_comments(
     story_id: uuid.UUID, # <-- FIX: Changed from str to uuid.UUID
     limit: int = Query(10, gt=0, le=100), 
     offset: int = Query(0, ge=0), 
+    total_mode: TotalMode = Query("exact"),
     db: Session = Depends(get_db)
 ):
-    total, items = list_comments(db, story_id, limit, offset)
+    total, items = list_comments(db, story_id, limit, offset, total_mode)
     
     # --- FIX: Apply the same manual conversion pattern here for lists ---
     validated_items = [
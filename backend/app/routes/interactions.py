@@ -5,7 +5,7 @@ from typing import List
 
 from app.schemas.interaction import ToggleResponse, BookmarkList
 from app.schemas.stories import StoryOut, UserSummary, TagSummary # Import for explicit response
-from app.services.interactions import toggle_like, toggle_bookmark, list_bookmarks
+from app.services.interactions import toggle_like, toggle_bookmark, set_like, set_bookmark, list_bookmarks
 from app.dependencies import get_db, get_current_user
 
 router = APIRouter(tags=["Interactions"])
@@ -28,6 +28,39 @@ def bookmark_story(
     bookmarked = toggle_bookmark(db, story_id, current_user)
     return ToggleResponse(success=True, bookmarked=bookmarked)
 
+# Idempotent variants: PUT sets, DELETE clears; repeating either is a no-op.
+@router.put("/stories/{story_id}/like", response_model=ToggleResponse, status_code=status.HTTP_200_OK)
+def put_like(
+    story_id: uuid.UUID,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    return ToggleResponse(success=True, liked=set_like(db, story_id, current_user, True))
+
+@router.delete("/stories/{story_id}/like", response_model=ToggleResponse, status_code=status.HTTP_200_OK)
+def delete_like(
+    story_id: uuid.UUID,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    return ToggleResponse(success=True, liked=set_like(db, story_id, current_user, False))
+
+@router.put("/stories/{story_id}/bookmark", response_model=ToggleResponse, status_code=status.HTTP_200_OK)
+def put_bookmark(
+    story_id: uuid.UUID,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    return ToggleResponse(success=True, bookmarked=set_bookmark(db, story_id, current_user, True))
+
+@router.delete("/stories/{story_id}/bookmark", response_model=ToggleResponse, status_code=status.HTTP_200_OK)
+def delete_bookmark(
+    story_id: uuid.UUID,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    return ToggleResponse(success=True, bookmarked=set_bookmark(db, story_id, current_user, False))
+
 @router.get("/users/me/bookmarks", response_model=BookmarkList, status_code=status.HTTP_200_OK)
 def get_my_bookmarks(
     db: Session = Depends(get_db),
@@ -52,7 +85,13 @@ def get_my_bookmarks(
             id=str(story.user.id),
             username=story.user.username
         ),
-            tags=[TagSummary.from_orm(tag) for tag in story.tags]
+            tags=[TagSummary.from_orm(tag) for tag in story.tags],
+            is_liked_by_user=story.is_liked_by_user,
+            is_bookmarked_by_user=story.is_bookmarked_by_user,
+            likes_count=story.likes_count,
+            bookmarks_count=story.bookmarks_count,
+            comments_count=story.comments_count,
+            views_count=story.views_count,
         ) for story in bookmarked_stories
     ]
     
@@ -1,7 +1,7 @@
 # app/routes/moderation.py
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import Dict, Literal, Optional
 from uuid import UUID as UUID_t
 import uuid
 from datetime import datetime
@@ -16,10 +16,16 @@ from app.schemas.moderation import (
     FlagList,
     FlagResolveRequest,
     ModerationDecision,
+    BulkActionResult,
+    BulkFlagResolveRequest,
+    BulkModerationDecision,
 )
 from app.schemas.user import UserSummary
 from app.schemas.stories import StoryOut
 from app.services import moderation
+from app.services.counters import bump_story_counter
+from app.utils.count_cache import TotalMode
+from app.utils.pagination import next_cursor_for
 
 # Admin/mod endpoints under /moderation
 router = APIRouter(prefix="/moderation", tags=["Moderation"])
@@ -32,7 +38,9 @@ moderator_or_superadmin = require_roles("moderator", "superadmin")
 
 # ---------- helpers ----------
 
-def _flag_to_out(f: Flag) -> FlagOut:
+def _flag_to_out(f: Flag, reporters: Optional[Dict[uuid.UUID, User]] = None) -> FlagOut:
+    # Flag has no reporter relationship; listings pass a prefetched id -> User map.
+    reporter = (reporters or {}).get(f.flagged_by_user_id)
     return FlagOut.model_validate({
         "id": str(f.id),
         "flagged_by_user_id": str(f.flagged_by_user_id),
@@ -48,10 +56,7 @@ def _flag_to_out(f: Flag) -> FlagOut:
         ),
         "created_at": f.created_at,
         "resolved_at": f.resolved_at,
-        "flagged_by": (
-            UserSummary.model_validate(getattr(f, "flagged_by"))
-            if getattr(f, "flagged_by", None) else None
-        ),
+        "flagged_by": UserSummary(id=reporter.id, username=reporter.username) if reporter else None,
     })
 
 
@@ -110,6 +115,7 @@ def flag_story(
         status="open",
     )
     db.add(flag)
+    bump_story_counter(db, story.id, "flags_count", +1)
     db.commit()
     db.refresh(flag)
     return _flag_to_out(flag)
@@ -151,9 +157,64 @@ def flag_comment(
     response_model=FlagList,
     dependencies=[Depends(moderator_or_superadmin)],
 )
-def get_open_flags(db: Session = Depends(get_db)):
-    flags = moderation.list_open_flags(db)
-    return FlagList(flags=[_flag_to_out(f) for f in flags])
+def get_open_flags(
+    db: Session = Depends(get_db),
+    target_type: Optional[Literal["story", "comment"]] = Query(None),
+    reason: Optional[str] = Query(None, max_length=200),  # case-insensitive substring
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None),  # keyset cursor from a previous page
+):
+    flags = moderation.list_open_flags(db, target_type=target_type, reason=reason, limit=limit, cursor=cursor)
+    reporters = moderation.reporters_for(db, flags)
+    return FlagList(flags=[_flag_to_out(f, reporters) for f in flags], next_cursor=next_cursor_for(flags, limit))
+
+
+# Bulk routes are registered before the `{id}` routes they would otherwise shadow.
+
+@router.post(
+    "/flags/bulk",
+    response_model=BulkActionResult,
+    dependencies=[Depends(moderator_or_superadmin)],
+)
+def bulk_patch_flag_status(
+    data: BulkFlagResolveRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    updated, missing = moderation.bulk_resolve_flags(db, data.flag_ids, data.status, current_user)
+    return BulkActionResult(updated=[str(i) for i in updated], missing=[str(i) for i in missing])
+
+
+@router.post(
+    "/stories/bulk/approve",
+    response_model=BulkActionResult,
+    dependencies=[Depends(moderator_or_superadmin)],
+)
+def bulk_approve_stories(
+    body: BulkModerationDecision,
+    db: Session = Depends(get_db),
+    moderator: User = Depends(get_current_user),
+):
+    note = (body.note or "").strip()
+    updated, missing = moderation.bulk_decide_stories(db, body.story_ids, "approve", moderator, note=note)
+    return BulkActionResult(updated=[str(i) for i in updated], missing=[str(i) for i in missing])
+
+
+@router.post(
+    "/stories/bulk/reject",
+    response_model=BulkActionResult,
+    dependencies=[Depends(moderator_or_superadmin)],
+)
+def bulk_reject_stories(
+    body: BulkModerationDecision,
+    db: Session = Depends(get_db),
+    moderator: User = Depends(get_current_user),
+):
+    reason = (body.reason or "").strip()
+    if not reason:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="A reason is required to reject a story.")
+    updated, missing = moderation.bulk_decide_stories(db, body.story_ids, "reject", moderator, note=reason)
+    return BulkActionResult(updated=[str(i) for i in updated], missing=[str(i) for i in missing])
 
 
 @router.patch(
@@ -179,6 +240,8 @@ def list_moderation_queue(
     tag: Optional[str] = Query(None),
     limit: int = Query(10, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),  # keyset cursor from a previous page; takes precedence over offset
+    total_mode: TotalMode = Query("exact"),
 ):
     status_enum = _parse_story_status(status_filter)
     total, items = moderation.moderation_queue(
@@ -188,11 +251,15 @@ def list_moderation_queue(
         tag=tag,
         limit=limit,
         offset=offset,
+        total_mode=total_mode,
+        cursor=cursor,
     )
-    # default view: flagged only (tests assert this)
-    items = [i for i in items if getattr(i, "is_flagged", False)]
     validated = [StoryOut.model_validate(i) for i in items]
-    return {"total": total, "items": [v.model_dump() for v in validated]}
+    return {
+        "total": total,
+        "items": [v.model_dump() for v in validated],
+        "next_cursor": next_cursor_for(items, limit),
+    }
 
 
 @router.post(
@@ -239,6 +306,7 @@ def approve_a_story(
                 **{"resolved_by": moderator.id},  # keep explicit to satisfy tests
             )
         )
+        bump_story_counter(db, story.id, "flags_count", +1)
 
     db.commit()
     return StoryOut.model_validate(story)
@@ -288,6 +356,7 @@ def reject_a_story(
                 **{"resolved_by": moderator.id},
             )
         )
+        bump_story_counter(db, story.id, "flags_count", +1)
 
     db.commit()
     return StoryOut.model_validate(story)
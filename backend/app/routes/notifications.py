@@ -1,10 +1,20 @@
-from fastapi import APIRouter, Depends, Query, HTTPException, status
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, Header, Query, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from uuid import UUID
+from app.core.config import settings
 from app.models.notification import Notification
 from app.dependencies import get_db, get_current_user
 from app.schemas.notifications import NotificationOut, NotificationList
-from app.services.notifications import list_my_notifications, mark_as_read, mark_all_as_read
+from app.services.notifications import list_my_notifications, mark_as_read, mark_all_as_read, notification_events_since
+from app.services.notifications import unread_count as unread_count_for
+from app.services.notification_broker import Subscription, notification_broker
+from app.utils.count_cache import TotalMode
+from app.utils.pagination import next_cursor_for
 from app.models.user import User
 
 router = APIRouter(prefix="/me/notifications", tags=["Notifications"])
@@ -13,12 +23,72 @@ router = APIRouter(prefix="/me/notifications", tags=["Notifications"])
 def my_notifications(
     limit: int = Query(10, gt=0, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),  # keyset cursor from a previous page; takes precedence over offset
     unread_only: bool = Query(False),
+    total_mode: TotalMode = Query("exact"),  # exact | estimate | none
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    total, items = list_my_notifications(db, current_user.id, limit, offset, unread_only)
-    return NotificationList(total=total, limit=limit, offset=offset, items=items)
+    total, items = list_my_notifications(db, current_user.id, limit, offset, unread_only, cursor=cursor, total_mode=total_mode)
+    return NotificationList(total=total, limit=limit, offset=offset, items=items, next_cursor=next_cursor_for(items, limit))
+
+_REPLAY_LIMIT = 500  # events replayed per (re)connect
+
+
+def _sse(evt: Dict) -> str:
+    return f"id: {evt['id']}\nevent: notification\ndata: {evt['data']}\n\n"
+
+
+async def _event_stream(request: Request, sub: Subscription, backlog: List[Dict], truncated: bool = False) -> AsyncIterator[str]:
+    try:
+        yield "retry: 3000\n\n"
+        for evt in backlog:
+            yield _sse(evt)
+        if truncated:
+            # More backlog than one replay page: live events would jump past the rest.
+            # End here; the client reconnects with the last replayed id and gets the next page.
+            return
+        while not await request.is_disconnected():
+            try:
+                evt = await sub.get(settings.NOTIFICATION_STREAM_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if evt is None:  # fell too far behind; the client reconnects with Last-Event-ID
+                break
+            yield _sse(evt)
+    finally:
+        notification_broker.unsubscribe(sub)
+
+
+@router.get("/stream")
+async def notification_stream(
+    request: Request,
+    last_event_id: Optional[str] = Header(None),  # sent by EventSource on reconnect
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Server-Sent Events: each new or updated notification as an `event: notification`.
+    Subscribes before the Last-Event-ID replay so nothing committed in between is lost.
+    A replay that fills a whole page ends the stream; the client resumes from its last id.
+    """
+    sub = notification_broker.subscribe(current_user.id)
+    try:
+        backlog = await run_in_threadpool(
+            notification_events_since, db, current_user.id, last_event_id, _REPLAY_LIMIT
+        ) if last_event_id else []
+    except Exception:
+        notification_broker.unsubscribe(sub)
+        raise
+    finally:
+        # Don't hold a pooled connection for the life of the stream.
+        await run_in_threadpool(db.close)
+    return StreamingResponse(
+        _event_stream(request, sub, backlog, truncated=len(backlog) >= _REPLAY_LIMIT),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @router.post("/{notif_id}/read", response_model=NotificationOut)
 def read_notification(
@@ -43,15 +113,9 @@ def read_all_notifications(
     return {"updated": count}
 
 
-# in notifications router
 @router.get("/unread_count", response_model=dict)
 def unread_count(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    count = (
-        db.query(Notification)
-        .filter(Notification.recipient_id == current_user.id, Notification.is_read.is_(False))
-        .count()
-    )
-    return {"count": count}
+    return {"count": unread_count_for(db, current_user.id)}
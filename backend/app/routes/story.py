@@ -1,13 +1,15 @@
 from fastapi import APIRouter, Depends, status, Query, Request
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Literal, Union
 import uuid
 
 # Import all dependencies and the unified schemas/services
 from app.dependencies import get_db, require_roles, get_current_user_optional, get_current_user
 from app.models.user import User
-from app.schemas.stories import StoryCreate, StoryUpdate, StoryOut, StoryList, UserSummary, TagSummary, StoryGenerateIn, StoryFeedbackIn
+from app.schemas.stories import StoryCreate, StoryUpdate, StoryOut, StoryList, StorySummaryOut, StorySummaryList, UserSummary, TagSummary, StoryGenerateIn, StoryFeedbackIn
 from app.services import story
+from app.utils.pagination import next_cursor_for
+from app.utils.count_cache import TotalMode
 
 # --- UNIFIED ROUTER ---
 router = APIRouter(prefix="/stories", tags=["Stories"])
@@ -49,17 +51,26 @@ def create_new_story(
         ),
     )
 
-@router.get("/", response_model=StoryList, status_code=status.HTTP_200_OK)
+@router.get("/", response_model=Union[StoryList, StorySummaryList], status_code=status.HTTP_200_OK)
 def list_all_stories(
     limit: int = Query(10, gt=0, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None), # keyset cursor from a previous page; takes precedence over offset
     tag: Optional[str] = Query(None),
     author_id: Optional[uuid.UUID] = Query(None), # Correctly a UUID
+    total_mode: TotalMode = Query("exact"), # exact | estimate | none
+    fields: Literal["full", "summary"] = Query("full"), # summary omits `content`
     db: Session = Depends(get_db),
     current_user: Optional[User] = Depends(get_current_user_optional)
 ):
     """Lists all stories, with filters."""
-    total, items = story.get_all_stories(db, limit, offset, tag, author_id, current_user)
+    summary = fields == "summary"
+    total, items = story.get_all_stories(db, limit, offset, tag, author_id, current_user, cursor=cursor, total_mode=total_mode, summary=summary)
+    if summary:
+        return StorySummaryList(
+            total=total, limit=limit, offset=offset, next_cursor=next_cursor_for(items, limit),
+            items=[StorySummaryOut.model_validate(item, from_attributes=True) for item in items],
+        )
     
     # Manually validate each item to populate computed fields like is_liked_by_user
     # validated_items = [
@@ -81,17 +92,26 @@ def list_all_stories(
     #     ) for story in items
     # ]
     validated_items = [StoryOut.model_validate(item,from_attributes=True) for item in items]
-    return StoryList(total=total, limit=limit, offset=offset, items=validated_items)
+    return StoryList(total=total, limit=limit, offset=offset, items=validated_items, next_cursor=next_cursor_for(items, limit))
 
-@router.get("/me", response_model=StoryList, status_code=status.HTTP_200_OK)
+@router.get("/me", response_model=Union[StoryList, StorySummaryList], status_code=status.HTTP_200_OK)
 def list_my_stories(
     limit: int = Query(10, gt=0, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),
+    total_mode: TotalMode = Query("exact"),
+    fields: Literal["full", "summary"] = Query("full"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Lists all stories created by the current authenticated user."""
-    total, items = story.get_user_stories(db, current_user, limit, offset)
+    summary = fields == "summary"
+    total, items = story.get_user_stories(db, current_user, limit, offset, cursor=cursor, total_mode=total_mode, summary=summary)
+    if summary:
+        return StorySummaryList(
+            total=total, limit=limit, offset=offset, next_cursor=next_cursor_for(items, limit),
+            items=[StorySummaryOut.model_validate(item, from_attributes=True) for item in items],
+        )
     validated_items = [
         StoryOut(
             id=str(story.id),
@@ -107,10 +127,14 @@ def list_my_stories(
             user=UserSummary(id=str(story.user.id), username=story.user.username),
             tags=[TagSummary(id=str(tag.id), name=tag.name) for tag in story.tags],
             is_liked_by_user=getattr(story, 'is_liked_by_user', False),
-            is_bookmarked_by_user=getattr(story, 'is_bookmarked_by_user', False)
+            is_bookmarked_by_user=getattr(story, 'is_bookmarked_by_user', False),
+            likes_count=story.likes_count,
+            bookmarks_count=story.bookmarks_count,
+            comments_count=story.comments_count,
+            views_count=story.views_count,
         ) for story in items
     ]
-    return StoryList(total=total, limit=limit, offset=offset, items=validated_items)
+    return StoryList(total=total, limit=limit, offset=offset, items=validated_items, next_cursor=next_cursor_for(items, limit))
 
 
 @router.get("/{story_id}", response_model=StoryOut, status_code=status.HTTP_200_OK)
@@ -146,7 +170,12 @@ def read_story_details(
 
         # Pass through the dynamically computed fields from the service
         is_liked_by_user=story_object.is_liked_by_user,
-        is_bookmarked_by_user=story_object.is_bookmarked_by_user
+        is_bookmarked_by_user=story_object.is_bookmarked_by_user,
+        likes_count=story_object.likes_count,
+        bookmarks_count=story_object.bookmarks_count,
+        comments_count=story_object.comments_count,
+        views_count=story_object.views_count,
+        flags_count=story_object.flags_count,
     )
 
 
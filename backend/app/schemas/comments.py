@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 from app.schemas.user import UserOut
 class CommentCreate(BaseModel):
@@ -17,5 +17,5 @@ class CommentOut(BaseModel):
         from_attributes = True
 
 class CommentList(BaseModel):
-    total: int
+    total: Optional[int] = None
     items: List[CommentOut]
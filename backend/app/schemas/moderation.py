@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
+import uuid
 from app.schemas.user import UserSummary
 
 class FlagCreate(BaseModel):
@@ -28,6 +29,7 @@ class FlagOut(BaseModel):
 
 class FlagList(BaseModel):
     flags: List[FlagOut]
+    next_cursor: Optional[str] = None  # opaque keyset cursor; None on the last page
 
 class FlagResolveRequest(BaseModel):
     status: str = Field(..., pattern="^(resolved|ignored)$")
@@ -35,3 +37,14 @@ class FlagResolveRequest(BaseModel):
 class ModerationDecision(BaseModel):
     note: Optional[str] = None
     reason: Optional[str] = None
+
+class BulkFlagResolveRequest(BaseModel):
+    flag_ids: List[uuid.UUID] = Field(..., min_length=1, max_length=500)
+    status: str = Field(..., pattern="^(resolved|ignored)$")
+
+class BulkModerationDecision(ModerationDecision):
+    story_ids: List[uuid.UUID] = Field(..., min_length=1, max_length=500)
+
+class BulkActionResult(BaseModel):
+    updated: List[str]
+    missing: List[str] = []
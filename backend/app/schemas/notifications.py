@@ -11,12 +11,17 @@ class NotificationOut(BaseModel):
     target_id: Optional[UUID] = None
     is_read: bool
     created_at: datetime
+    # Aggregated items: how many people, the latest few (newest first), last activity
+    actor_count: int = 1
+    recent_actor_ids: List[UUID] = []
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
 
 class NotificationList(BaseModel):
-    total: int
+    total: Optional[int] = None  # None when requested with total_mode=none
     limit: int
     offset: int
     items: List[NotificationOut]
+    next_cursor: Optional[str] = None  # opaque keyset cursor; None on the last page
@@ -100,13 +100,44 @@ class StoryOut(BaseModel):
     # Allow model attributes-to-schema and ignore unknown extras
     model_config = dict(from_attributes=True, extra="ignore")
 
+# Feed card: everything a list needs except the full `content`
+class StorySummaryOut(BaseModel):
+    id: UUID
+    title: str
+    header: Optional[str] = None
+    cover_image_url: Optional[str] = None
+    excerpt: Optional[str] = None
+    user_id: UUID
+    user: Optional[UserSummary] = None
+    tags: List[TagOut] = Field(default_factory=list)
+    is_published: bool = False
+    source: str = "user"
+    words_count: int = 0
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    is_liked_by_user: bool = False
+    is_bookmarked_by_user: bool = False
+    likes_count: int = 0
+    bookmarks_count: int = 0
+    comments_count: int = 0
+    views_count: int = 0
+
+    model_config = dict(from_attributes=True, extra="ignore")
+
 # Schema for paginated lists of stories
 class StoryList(BaseModel):
-    total: int
+    total: Optional[int] = None  # None when requested with total_mode=none
     limit: int
     offset: int
     items: List[StoryOut] # Uses our new, unified StoryOut schema
+    next_cursor: Optional[str] = None  # opaque keyset cursor; None on the last page
 
     class Config:
         from_attributes = True
 
+class StorySummaryList(BaseModel):
+    total: Optional[int] = None
+    limit: int
+    offset: int
+    items: List[StorySummaryOut]
+    next_cursor: Optional[str] = None
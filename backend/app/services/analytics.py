@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import date, datetime, timedelta
 from typing import Dict, List, Tuple
 
-from sqlalchemy import and_, cast, func, Date
+from sqlalchemy import and_, cast, func, literal, Date
 from sqlalchemy.orm import Session
 
 from app.models.analytics import AnalyticsCache
@@ -14,6 +14,7 @@ from app.models.impression import Impression
 from app.models.stories import Story
 from app.models.user import User
 from app.schemas.analytics import DailyMetric
+from app.services.system import get_automod_user_id
 
 
 def _date_range_inclusive(start: date, end: date) -> List[date]:
@@ -76,15 +77,13 @@ def get_users_daily(db: Session, days: int = 30) -> List[Dict]:
 
 
 def get_flags_breakdown(db: Session) -> Dict[str, int]:
-    total = db.query(func.count(Flag.id)).scalar() or 0
-
-    ai_count = (
-        db.query(func.count(Flag.id))
-        .join(User, User.id == Flag.flagged_by_user_id)
-        .filter(User.username == "automod")
-        .scalar()
-        or 0
-    )
+    # One pass over flags; AI flags are those filed by the (cached) automod user id.
+    automod_id = get_automod_user_id(db, create=False)
+    total, ai_count = db.query(
+        func.count(Flag.id),
+        func.count(Flag.id).filter(Flag.flagged_by_user_id == automod_id) if automod_id else literal(0),
+    ).one()
+    total, ai_count = total or 0, ai_count or 0
     human_count = max(total - ai_count, 0)
     return {"total": total, "ai_flags": ai_count, "human_flags": human_count}
 
@@ -0,0 +1,119 @@
+# app/services/comment_moderation.py
+import logging
+import threading
+import uuid
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.rescan import apply_verdicts, scan_rows
+from app.services.system import get_automod_user_id
+
+logger = logging.getLogger("app")
+
+
+class CommentModerationBuffer:
+    """
+    Batched moderation for long comments.
+
+    `record()` queues (comment id, text) after the comment has committed; a background
+    thread scans everything pending with one matcher pass every `flush_interval`
+    seconds (or once `batch_size` comments are waiting) and writes the automod flags
+    with one insert. A failed flush puts its comments back in the queue for the next
+    one. Pending comments are held in memory only: anything lost on a crash is picked
+    up by the next `python -m app.remoderate` run.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending: List[Tuple[uuid.UUID, Tuple[str]]] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, comment_id: uuid.UUID, content: str) -> None:
+        with self._lock:
+            self._pending.append((comment_id, (content,)))
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def flush(self, db: Optional[Session] = None) -> int:
+        """
+        Scan and flag all pending comments. Uses `db` if given (caller owns the
+        transaction), otherwise a short-lived session that commits. Returns how many
+        comments were flagged.
+        """
+        with self._lock:
+            rows, self._pending = self._pending, []
+        if not rows:
+            return 0
+
+        if db is not None:
+            try:
+                flagged = apply_verdicts(db, "comments", scan_rows(rows), get_automod_user_id(db))
+                db.flush()
+            except Exception:
+                self._requeue(rows)
+                raise
+            return flagged
+
+        session = SessionLocal()
+        try:
+            flagged = apply_verdicts(session, "comments", scan_rows(rows), get_automod_user_id(session))
+            session.commit()
+        except Exception:
+            session.rollback()
+            logger.exception("Failed to moderate %d buffered comments; re-queued", len(rows))
+            self._requeue(rows)
+            return 0
+        finally:
+            session.close()
+        return flagged
+
+    def _requeue(self, rows: List[Tuple[uuid.UUID, Tuple[str]]]) -> None:
+        # Ahead of anything recorded meanwhile. Comments deleted before the retry are
+        # dropped by apply_verdicts, so they cannot keep failing the batch.
+        with self._lock:
+            self._pending = rows + self._pending
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pending = []
+
+    # --- background flusher ---
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="comment-moderation", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=self.flush_interval + 5)
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+
+comment_moderation = CommentModerationBuffer(
+    batch_size=settings.COMMENT_MODERATION_BATCH_SIZE,
+    flush_interval=settings.COMMENT_MODERATION_FLUSH_SECONDS,
+)
@@ -1,12 +1,19 @@
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from datetime import datetime
-from typing import Tuple, List
+from typing import Tuple, List, Optional
 import uuid # Import for type hinting
 from app.services.notifications import notify
 from app.models.comment import Comment
 from app.models.stories import Story
 from app.models.user import User
+from app.services.counters import bump_story_counter, bump_user_counter
+from app.utils.count_cache import TotalMode, cached_total, count_key, invalidate_counts
+from app.core.config import settings
+from app.models.flag import Flag
+from app.services.moderation import moderate_content
+from app.services.system import get_automod_user_id
+from app.services.comment_moderation import comment_moderation
 
 def create_comment(db: Session, story_id: uuid.UUID, content: str, current_user: User) -> Comment:
     # --- FIX: Ensure we are querying with a UUID object ---
@@ -16,13 +23,26 @@ def create_comment(db: Session, story_id: uuid.UUID, content: str, current_user:
     
     # --- FIX: Pass the raw UUID objects to the model constructor ---
     comment = Comment(
+        id=uuid.uuid4(),
         user_id=current_user.id, 
         story_id=story_id, 
         content=content
     )
     db.add(comment)
-    db.commit()
-    db.refresh(comment)
+    bump_story_counter(db, story_id, "comments_count", +1)
+    bump_user_counter(db, current_user.id, "total_comments", +1)
+
+    # Short comments are cheap to scan inline; long ones go to the batched background scan.
+    scan_inline = len(content or "") <= settings.COMMENT_SYNC_MODERATION_CHARS or not settings.MODERATION_ASYNC
+    if scan_inline:
+        flagged, cats = moderate_content([content])
+        if flagged:
+            db.add(Flag(
+                flagged_by_user_id=get_automod_user_id(db),
+                comment_id=comment.id,
+                reason="; ".join(cats) or "Profanity detected by AI",
+                status="open",
+            ))
     if story.user_id and story.user_id != current_user.id:
         notify(
             db,
@@ -32,14 +52,19 @@ def create_comment(db: Session, story_id: uuid.UUID, content: str, current_user:
             target_type="story",
             target_id=story.id,
         )
+    db.commit()
+    invalidate_counts(f"comments:{story_id}")
+    if not scan_inline:
+        comment_moderation.record(comment.id, content)
+    db.refresh(comment)
 
     return comment
 
 
-def list_comments(db: Session, story_id: uuid.UUID, limit: int, offset: int) -> Tuple[int, List[Comment]]:
+def list_comments(db: Session, story_id: uuid.UUID, limit: int, offset: int, total_mode: TotalMode = "exact") -> Tuple[Optional[int], List[Comment]]:
     # --- FIX: Ensure we are querying with a UUID object ---
     query = db.query(Comment).filter(Comment.story_id == story_id).order_by(Comment.created_at.desc())
-    total = query.count()
+    total = cached_total(query, count_key(f"comments:{story_id}"), total_mode)
     items = query.offset(offset).limit(limit).all()
     return total, items
 
@@ -55,4 +80,7 @@ def delete_comment(db: Session, comment_id: uuid.UUID, current_user: User) -> No
         raise HTTPException(status.HTTP_403_FORBIDDEN, detail="Not authorized")
         
     db.delete(comment)
+    bump_story_counter(db, comment.story_id, "comments_count", -1)
+    bump_user_counter(db, comment.user_id, "total_comments", -1)
     db.commit()
+    invalidate_counts(f"comments:{comment.story_id}")
@@ -0,0 +1,170 @@
+# app/services/counters.py
+import uuid
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.orm import Session
+
+from app.models.bookmarks import Bookmark
+from app.models.comment import Comment
+from app.models.flag import Flag
+from app.models.like import Like
+from app.models.notification import Notification
+from app.models.stories import Story
+from app.models.user import User
+from app.models.view_history import ViewHistory
+
+STORY_COUNTERS = ("likes_count", "bookmarks_count", "comments_count", "views_count", "flags_count")
+# total_posts: live (not deleted) stories authored; total_likes: likes received on those
+# stories; total_comments: comments the user has written; unread_notifications: unread
+# notification rows (an aggregated group counts once).
+USER_COUNTERS = ("total_posts", "total_likes", "total_comments", "unread_notifications")
+
+_stories = Story.__table__
+_users = User.__table__
+# Counter bumps are not edits: pin updated_at so its onupdate hook does not fire.
+_KEEP_UPDATED_AT = {"updated_at": _stories.c.updated_at}
+_KEEP_USER_UPDATED_AT = {"updated_at": _users.c.updated_at}
+
+
+def bump_story_counter(db: Session, story_id: uuid.UUID, counter: str, delta: int = 1):
+    """
+    Atomic `UPDATE stories SET <counter> = <counter> + delta` in the caller's transaction.
+    Never reads the row first, so concurrent bumps cannot lose updates. Floors at zero.
+
+    Returns the story's `(user_id, deleted_at)` as of the update (None if the story is
+    gone). The UPDATE holds the row lock until commit, so a concurrent soft delete
+    cannot slip in between and the caller can trust `deleted_at`.
+    """
+    if counter not in STORY_COUNTERS:
+        raise ValueError(f"Unknown story counter: {counter}")
+    col = _stories.c[counter]
+    return db.execute(
+        update(_stories)
+        .where(_stories.c.id == story_id)
+        .values({counter: func.greatest(col + delta, 0), **_KEEP_UPDATED_AT})
+        .returning(_stories.c.user_id, _stories.c.deleted_at)
+    ).first()
+
+
+def bump_user_counter(db: Session, user_id: uuid.UUID, counter: str, delta: int = 1) -> None:
+    """Atomic increment of a `users.total_*` column in the caller's transaction. Floors at zero."""
+    if counter not in USER_COUNTERS:
+        raise ValueError(f"Unknown user counter: {counter}")
+    col = _users.c[counter]
+    db.execute(
+        update(_users)
+        .where(_users.c.id == user_id)
+        .values({counter: func.greatest(func.coalesce(col, 0) + delta, 0), **_KEEP_USER_UPDATED_AT})
+    )
+
+
+def bump_story_views(db: Session, views_by_story: Dict[uuid.UUID, int]) -> None:
+    """Add a batch of view counts (story_id -> n) with a single executemany UPDATE."""
+    if not views_by_story:
+        return
+    db.execute(
+        update(_stories)
+        .where(_stories.c.id == bindparam("b_story_id"))
+        .values(views_count=_stories.c.views_count + bindparam("b_views"), **_KEEP_UPDATED_AT),
+        [{"b_story_id": sid, "b_views": n} for sid, n in views_by_story.items()],
+    )
+
+
+def bump_unread_counts(db: Session, unread_by_user: Dict[uuid.UUID, int]) -> None:
+    """Add a batch of new-unread counts (user_id -> n) with a single executemany UPDATE."""
+    if not unread_by_user:
+        return
+    # Sorted so concurrent batches lock user rows in the same order.
+    db.execute(
+        update(_users)
+        .where(_users.c.id == bindparam("b_user_id"))
+        .values(unread_notifications=_users.c.unread_notifications + bindparam("b_unread"), **_KEEP_USER_UPDATED_AT),
+        [{"b_user_id": uid, "b_unread": n} for uid, n in sorted(unread_by_user.items(), key=lambda kv: str(kv[0]))],
+    )
+
+
+def reconcile_story_counters(db: Session, story_ids: Optional[Iterable[uuid.UUID]] = None) -> int:
+    """
+    Recompute every story counter from the source tables in one set-based UPDATE
+    (optionally limited to `story_ids`). Returns the number of stories touched.
+    Use after backfills, manual data fixes, or to repair drift.
+    """
+    def _count(model, fk):
+        return (
+            select(func.count())
+            .select_from(model)
+            .where(fk == _stories.c.id)
+            .scalar_subquery()
+        )
+
+    stmt = update(_stories).values(
+        likes_count=_count(Like, Like.story_id),
+        bookmarks_count=_count(Bookmark, Bookmark.story_id),
+        comments_count=_count(Comment, Comment.story_id),
+        views_count=_count(ViewHistory, ViewHistory.story_id),
+        flags_count=_count(Flag, Flag.story_id),
+        **_KEEP_UPDATED_AT,
+    )
+    if story_ids is not None:
+        stmt = stmt.where(_stories.c.id.in_(list(story_ids)))
+    result = db.execute(stmt)
+    db.commit()
+    return result.rowcount
+
+
+def reconcile_user_counters(db: Session, user_ids: Optional[Iterable[uuid.UUID]] = None) -> int:
+    """
+    Recompute users.total_posts / total_likes / total_comments for the whole user table
+    (or just `user_ids`) with one set-based UPDATE. Returns the number of users touched.
+    """
+    posts = (
+        select(func.count())
+        .select_from(Story)
+        .where(Story.user_id == _users.c.id, Story.deleted_at.is_(None))
+        .scalar_subquery()
+    )
+    likes = (
+        select(func.count())
+        .select_from(Like)
+        .join(Story, Story.id == Like.story_id)
+        .where(Story.user_id == _users.c.id, Story.deleted_at.is_(None))
+        .scalar_subquery()
+    )
+    comments = (
+        select(func.count())
+        .select_from(Comment)
+        .where(Comment.user_id == _users.c.id)
+        .scalar_subquery()
+    )
+    stmt = update(_users).values(
+        total_posts=posts, total_likes=likes, total_comments=comments, **_KEEP_USER_UPDATED_AT
+    )
+    if user_ids is not None:
+        stmt = stmt.where(_users.c.id.in_(list(user_ids)))
+    result = db.execute(stmt)
+    db.commit()
+    return result.rowcount
+
+
+def reconcile_unread_notifications(db: Session, user_ids: Optional[Iterable[uuid.UUID]] = None) -> int:
+    """
+    Reset users.unread_notifications to the real unread count, touching only users
+    whose counter has drifted. Returns the number of users corrected.
+    """
+    unread = (
+        select(func.count())
+        .select_from(Notification)
+        .where(Notification.recipient_id == _users.c.id, Notification.is_read.is_(False))
+        .scalar_subquery()
+    )
+    stmt = (
+        update(_users)
+        .where(_users.c.unread_notifications.is_distinct_from(unread))
+        .values(unread_notifications=unread, **_KEEP_USER_UPDATED_AT)
+    )
+    if user_ids is not None:
+        stmt = stmt.where(_users.c.id.in_(list(user_ids)))
+    result = db.execute(stmt)
+    db.commit()
+    return result.rowcount
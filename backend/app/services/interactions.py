@@ -1,3 +1,6 @@
+from datetime import datetime
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 import uuid # Import uuid for type hinting
@@ -7,67 +10,133 @@ from app.models.bookmarks import Bookmark
 from app.models.stories import Story
 from app.models.user import User
 from app.services.notifications import notify
-def toggle_like(db: Session, story_id: uuid.UUID, current_user: User) -> bool:
-    story = db.query(Story).get(story_id)
-    if not story:
+from app.services.story import story_read_query, fill_viewer_state
+from app.services.counters import bump_story_counter, bump_user_counter
+def _story_owner(db: Session, story_id: uuid.UUID):
+    """(user_id, deleted_at) of the story, without loading the row. 404 if missing."""
+    row = db.query(Story.user_id, Story.deleted_at).filter(Story.id == story_id).first()
+    if not row:
         raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Story not found")
-    
-    # Use the correct column name 'story_id'
-    existing = db.query(Like).filter_by(user_id=current_user.id, story_id=story_id).first()
-    
-    if existing:
-        db.delete(existing)
+    return row
+
+
+def _insert_reaction(db: Session, model, constraint: str, story_id: uuid.UUID, user_id: uuid.UUID) -> bool:
+    """INSERT ... ON CONFLICT DO NOTHING RETURNING id. True only if this call created the row."""
+    stmt = (
+        pg_insert(model)
+        .values(id=uuid.uuid4(), user_id=user_id, story_id=story_id, created_at=datetime.utcnow())
+        .on_conflict_do_nothing(constraint=constraint)
+        .returning(model.id)
+    )
+    return db.execute(stmt).first() is not None
+
+
+def _delete_reaction(db: Session, model, story_id: uuid.UUID, user_id: uuid.UUID) -> bool:
+    """DELETE ... RETURNING id. True only if this call removed the row."""
+    stmt = (
+        delete(model)
+        .where(model.user_id == user_id, model.story_id == story_id)
+        .returning(model.id)
+    )
+    return db.execute(stmt).first() is not None
+
+
+def _notify_author(db: Session, owner, story_id: uuid.UUID, current_user: User) -> None:
+    if owner.user_id and owner.user_id != current_user.id:
+        notify(
+            db,
+            recipient_id=owner.user_id,
+            action="liked",
+            actor_id=current_user.id,
+            target_type="story",
+            target_id=story_id,
+        )
+
+
+def _apply_like(db: Session, owner, story_id: uuid.UUID, current_user: User, delta: int) -> None:
+    # Take deleted_at from the locking UPDATE, not from `owner`: delete_story may have
+    # soft-deleted the story (and subtracted its likes from total_likes) since then.
+    locked = bump_story_counter(db, story_id, "likes_count", delta)
+    if locked is not None and locked.deleted_at is None:
+        bump_user_counter(db, locked.user_id, "total_likes", delta)
+    if delta > 0:
+        _notify_author(db, owner, story_id, current_user)
+    db.commit()
+
+
+def _apply_bookmark(db: Session, owner, story_id: uuid.UUID, current_user: User, delta: int) -> None:
+    bump_story_counter(db, story_id, "bookmarks_count", delta)
+    if delta > 0:
+        _notify_author(db, owner, story_id, current_user)
+    db.commit()
+
+
+def set_like(db: Session, story_id: uuid.UUID, current_user: User, liked: bool) -> bool:
+    """
+    Idempotently put the like into the requested state. Counters and the notification
+    only move when this call actually changed the row, so repeats and races are no-ops.
+    Returns the resulting state.
+    """
+    owner = _story_owner(db, story_id)
+    if liked:
+        changed = _insert_reaction(db, Like, "_user_story_uc", story_id, current_user.id)
+    else:
+        changed = _delete_reaction(db, Like, story_id, current_user.id)
+    if changed:
+        _apply_like(db, owner, story_id, current_user, +1 if liked else -1)
+    else:
+        db.commit()
+    return liked
+
+
+def set_bookmark(db: Session, story_id: uuid.UUID, current_user: User, bookmarked: bool) -> bool:
+    """Idempotent counterpart of `set_like` for bookmarks."""
+    owner = _story_owner(db, story_id)
+    if bookmarked:
+        changed = _insert_reaction(db, Bookmark, "_user_story_bookmark_uc", story_id, current_user.id)
+    else:
+        changed = _delete_reaction(db, Bookmark, story_id, current_user.id)
+    if changed:
+        _apply_bookmark(db, owner, story_id, current_user, +1 if bookmarked else -1)
+    else:
         db.commit()
+    return bookmarked
+
+
+def toggle_like(db: Session, story_id: uuid.UUID, current_user: User) -> bool:
+    """
+    Flip the like: DELETE ... RETURNING first; if nothing was there, INSERT ... ON CONFLICT
+    DO NOTHING. A concurrent click that already inserted the row simply leaves it liked.
+    """
+    owner = _story_owner(db, story_id)
+    if _delete_reaction(db, Like, story_id, current_user.id):
+        _apply_like(db, owner, story_id, current_user, -1)
         return False
+    if _insert_reaction(db, Like, "_user_story_uc", story_id, current_user.id):
+        _apply_like(db, owner, story_id, current_user, +1)
     else:
-        like = Like(user_id=current_user.id, story_id=story_id)
-        db.add(like)
         db.commit()
-        if story.user_id and story.user_id != current_user.id:
-            notify(
-                db,
-                recipient_id=story.user_id,
-                action="liked",
-                actor_id=current_user.id,
-                target_type="story",
-                target_id=story.id,
-            )
-        return True
+    return True
+
 
 def toggle_bookmark(db: Session, story_id: uuid.UUID, current_user: User) -> bool:
-    story = db.query(Story).get(story_id)
-    if not story:
-        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Story not found")
-    
-    # Use the correct column name 'story_id'
-    existing = db.query(Bookmark).filter_by(user_id=current_user.id, story_id=story_id).first()
-    
-    if existing:
-        db.delete(existing)
-        db.commit()
+    owner = _story_owner(db, story_id)
+    if _delete_reaction(db, Bookmark, story_id, current_user.id):
+        _apply_bookmark(db, owner, story_id, current_user, -1)
         return False
+    if _insert_reaction(db, Bookmark, "_user_story_bookmark_uc", story_id, current_user.id):
+        _apply_bookmark(db, owner, story_id, current_user, +1)
     else:
-        bookmark = Bookmark(user_id=current_user.id, story_id=story_id)
-        db.add(bookmark)
         db.commit()
-        if story.user_id and story.user_id != current_user.id:
-            notify(
-                db,
-                recipient_id=story.user_id,
-                action="liked",
-                actor_id=current_user.id,
-                target_type="story",
-                target_id=story.id,
-            )
-        return True
+    return True
 
 def list_bookmarks(db: Session, current_user: User) -> List[Story]:
     # A more efficient query to get all bookmarked stories for the user
     stories = (
-        db.query(Story)
+        story_read_query(db)
           .join(Bookmark, Story.id == Bookmark.story_id)
           .filter(Bookmark.user_id == current_user.id)
           .order_by(Bookmark.created_at.desc())
           .all()
     )
-    return stories
+    return fill_viewer_state(db, stories, current_user)
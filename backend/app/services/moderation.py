@@ -1,18 +1,25 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session, load_only
 from fastapi import HTTPException, status
 from datetime import datetime
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 import uuid
 from app.models.tags import Tag
 from app.models.flag import Flag
 from app.models.stories import Story, StoryStatus
 from app.models.comment import Comment
 from app.models.user import User
-from app.services.notifications import notify
-from better_profanity import profanity
+from app.services.notifications import notify, notify_many
+from app.services.counters import bump_story_counter
+from app.utils.count_cache import TotalMode, cached_total, count_key, invalidate_counts
+from app.utils.pagination import keyset_after
+from app.utils.profanity import ProfanityMatch, load_default_matcher
 
-# Load default word list once at import time
-profanity.load_censor_words()
+# Compile the word list once at import time
+_matcher = load_default_matcher()
+RULESET_VERSION = _matcher.fingerprint
+# Longest word-list phrase, in words: how far a match can reach across a split point.
+PHRASE_WORDS = _matcher.max_phrase_words
 
 
 # --- Flagging Logic ---
@@ -29,6 +36,7 @@ def flag_story(db: Session, story_id: uuid.UUID, reason: str, current_user: User
         status="open"
     )
     db.add(flag)
+    bump_story_counter(db, story_id, "flags_count", +1)
     db.commit()
     db.refresh(flag)
     return flag
@@ -49,8 +57,36 @@ def flag_comment(db: Session, comment_id: uuid.UUID, reason: str, current_user:
     db.refresh(flag)
     return flag
 
-def list_open_flags(db: Session) -> List[Flag]:
-    return db.query(Flag).filter(Flag.status == "open").order_by(Flag.created_at.desc()).all()
+def list_open_flags(
+    db: Session,
+    *,
+    target_type: Optional[str] = None,
+    reason: Optional[str] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+) -> List[Flag]:
+    """
+    Open flags, newest first, one page at a time. Seeks past (created_at, id) on
+    `ix_flags_status_created_at` when given a cursor. `target_type` is "story" or
+    "comment"; `reason` is a case-insensitive substring match.
+    """
+    q = db.query(Flag).filter(Flag.status == "open")
+    if target_type == "story":
+        q = q.filter(Flag.story_id.isnot(None))
+    elif target_type == "comment":
+        q = q.filter(Flag.comment_id.isnot(None))
+    if reason:
+        q = q.filter(Flag.reason.ilike(f"%{reason}%"))
+    q = keyset_after(q, (Flag.created_at, Flag.id), cursor)
+    return q.order_by(Flag.created_at.desc(), Flag.id.desc()).limit(limit).all()
+
+def reporters_for(db: Session, flags: List[Flag]) -> Dict[uuid.UUID, User]:
+    """Reporter id -> User (id and username only) for a page of flags, in one query."""
+    ids = {f.flagged_by_user_id for f in flags}
+    if not ids:
+        return {}
+    users = db.query(User).options(load_only(User.id, User.username)).filter(User.id.in_(ids)).all()
+    return {u.id: u for u in users}
 
 # app/services/moderation.py
 from datetime import datetime, timezone
@@ -121,9 +157,10 @@ def approve_story(db: Session, story_id: uuid.UUID, moderator: User, note: str =
     story.is_published = True
     story.is_flagged = False
     _close_open_flags(db, story_id, moderator.id, "approved", note)
+    notify(db, recipient_id=story.user_id, actor_id=moderator.id, action="story_approved", target_type="story", target_id=story.id)
     db.commit()
+    invalidate_counts("stories")
     db.refresh(story)
-    notify(db, recipient_id=story.user_id, actor_id=moderator.id, action="story_approved", target_type="story", target_id=story.id)
     return story
 
 def reject_story(db: Session, story_id: uuid.UUID, moderator: User, reason: str) -> Story:
@@ -135,9 +172,10 @@ def reject_story(db: Session, story_id: uuid.UUID, moderator: User, reason: str)
     story.is_published = False
     story.is_flagged = True
     _close_open_flags(db, story_id, moderator.id, "rejected", reason)
+    notify(db, recipient_id=story.user_id, actor_id=moderator.id, action="story_rejected", target_type="story", target_id=story.id)
     db.commit()
+    invalidate_counts("stories")
     db.refresh(story)
-    notify(db, recipient_id=story.user_id, actor_id=moderator.id, action="story_rejected", target_type="story", target_id=story.id)
     return story
 
 def _close_open_flags(db: Session, story_id: uuid.UUID, resolver_id: uuid.UUID, decision: str, note: str):
@@ -149,6 +187,104 @@ def _close_open_flags(db: Session, story_id: uuid.UUID, resolver_id: uuid.UUID,
         if note:
             f.reason = f"{f.reason or ''} | Moderator Note: {note}"
 
+# --- Bulk actions: one transaction per batch ---
+
+# decision -> (story status, is_published, is_flagged, flag status, notification action)
+_STORY_DECISIONS = {
+    "approve": (StoryStatus.published, True, False, "approved", "story_approved"),
+    "reject": (StoryStatus.rejected, False, True, "rejected", "story_rejected"),
+}
+
+def _dedupe(ids: List[uuid.UUID]) -> List[uuid.UUID]:
+    return list(dict.fromkeys(ids))
+
+def _audit_many(db: Session, actor_id: uuid.UUID, action: str, target_type: str, changes, now: datetime) -> None:
+    """One multi-row AuditLog insert for (target_id, before_state, after_state) triples."""
+    db.execute(insert(AuditLog), [
+        {
+            "actor_user_id": actor_id,
+            "action": action,
+            "target_type": target_type,
+            "target_id": str(target_id),
+            "before_state": before,
+            "after_state": after,
+            "timestamp": now,
+        }
+        for target_id, before, after in changes
+    ])
+
+def bulk_resolve_flags(db: Session, flag_ids: List[uuid.UUID], new_status: str, actor: User) -> Tuple[List[uuid.UUID], List[uuid.UUID]]:
+    """
+    Set the status of many flags at once (same rules as `resolve_flag`). Flags already
+    loaded in `db` are synchronised. Returns (updated ids, ids that do not exist).
+    """
+    new_status = (new_status or "").lower()
+    if new_status not in VALID_FLAG_STATUSES:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="Invalid status. Must be one of: open, resolved, ignored.")
+
+    ids = _dedupe(flag_ids)
+    before = dict(db.execute(select(Flag.id, Flag.status).where(Flag.id.in_(ids)).with_for_update()).all())
+    if before:
+        now = datetime.utcnow()
+        closing = new_status in {"resolved", "ignored"}
+        db.execute(
+            update(Flag)
+            .where(Flag.id.in_(list(before)))
+            .values(status=new_status, resolved_by=actor.id if closing else None, resolved_at=now if closing else None)
+            .execution_options(synchronize_session="fetch")
+        )
+        _audit_many(db, actor.id, "resolve_flag", "flag", [
+            (flag_id, {"status": old}, {"status": new_status}) for flag_id, old in before.items()
+        ], now)
+    db.commit()
+    return list(before), [i for i in ids if i not in before]
+
+def bulk_decide_stories(db: Session, story_ids: List[uuid.UUID], decision: str, moderator: User, note: str = "") -> Tuple[List[uuid.UUID], List[uuid.UUID]]:
+    """
+    Approve or reject many stories at once: one UPDATE for the stories, one for their
+    open flags, one multi-row insert each for audit rows and author notifications.
+    Stories and flags already loaded in `db` are synchronised with the new values.
+    Returns (updated ids, ids that do not exist or are deleted).
+    """
+    story_status, published, flagged, flag_status, action = _STORY_DECISIONS[decision]
+    ids = _dedupe(story_ids)
+    rows = db.execute(
+        select(Story.id, Story.user_id, Story.status)
+        .where(Story.id.in_(ids), Story.deleted_at.is_(None))
+        .with_for_update()
+    ).all()
+    found = [r.id for r in rows]
+    missing = sorted(set(ids) - set(found), key=ids.index)
+
+    if rows:
+        now = datetime.utcnow()
+        db.execute(
+            update(Story)
+            .where(Story.id.in_(found))
+            .values(status=story_status, is_published=published, is_flagged=flagged)
+            .execution_options(synchronize_session="fetch")
+        )
+        flag_values = {"status": flag_status, "resolved_by": moderator.id, "resolved_at": now}
+        if note:
+            flag_values["reason"] = func.coalesce(Flag.reason, "") + f" | Moderator Note: {note}"
+        db.execute(
+            update(Flag)
+            .where(Flag.story_id.in_(found), Flag.status == "open")
+            .values(**flag_values)
+            .execution_options(synchronize_session="fetch")
+        )
+        _audit_many(db, moderator.id, f"{decision}_story", "story", [
+            (r.id, {"status": r.status.value}, {"status": story_status.value}) for r in rows
+        ], now)
+        notify_many(db, [
+            {"recipient_id": r.user_id, "actor_id": moderator.id, "action": action, "target_type": "story", "target_id": r.id}
+            for r in rows
+        ])
+    db.commit()
+    if rows:
+        invalidate_counts("stories")
+    return found, missing
+
 def moderation_queue(
     db: Session,
     status_filter: Optional[StoryStatus],
@@ -156,8 +292,15 @@ def moderation_queue(
     tag: Optional[str],
     limit: int,
     offset: int,
-) -> Tuple[int, List[Story]]:
-    q = db.query(Story).filter(Story.deleted_at.is_(None))
+    total_mode: TotalMode = "exact",
+    cursor: Optional[str] = None,
+) -> Tuple[Optional[int], List[Story]]:
+    """
+    Flagged, non-deleted stories, newest first. Served by the partial index
+    `ix_stories_moderation_queue`; with a cursor, seeks past (created_at, id)
+    instead of skipping `offset` rows.
+    """
+    q = db.query(Story).filter(Story.is_flagged == True, Story.deleted_at.is_(None))
 
     if status_filter is not None:
         # ✅ compare with Enum; works for SQLAlchemy Enum columns
@@ -169,13 +312,28 @@ def moderation_queue(
     if tag:
         q = q.join(Story.tags).filter(Tag.name == tag)
 
-    total = q.count()
-    items = q.order_by(Story.created_at.desc()).limit(limit).offset(offset).all()
+    key = count_key("stories", scope="moderation", status=status_filter.value if status_filter else None, author_id=author_id, tag=tag)
+    total = cached_total(q, key, total_mode)
+    q = q.order_by(Story.created_at.desc(), Story.id.desc())
+    if cursor:
+        items = keyset_after(q, (Story.created_at, Story.id), cursor).limit(limit).all()
+    else:
+        items = q.limit(limit).offset(offset).all()
     return total, items
 
+def scan_content(texts: List[str]) -> List[ProfanityMatch]:
+    """All profanity matches in `texts` (one pass), with category, field index and offsets."""
+    return _matcher.scan(texts)
+
 def moderate_content(texts: List[str]) -> Tuple[bool, List[str]]:
     """Scans text for profanity. Returns (is_flagged, categories)."""
-    for text in texts:
-        if profanity.contains_profanity(text or ""):
-            return True, ["profanity"]
-    return False, []
+    matches = scan_content(texts)
+    cats = sorted({m.category for m in matches})
+    return bool(cats), cats
+
+def moderate_each(texts: List[str]) -> List[Tuple[bool, List[str]]]:
+    """`moderate_content` per text, from one scan over all of them."""
+    cats = [set() for _ in texts]
+    for m in scan_content(texts):
+        cats[m.field].add(m.category)
+    return [(bool(c), sorted(c)) for c in cats]
@@ -0,0 +1,196 @@
+# app/services/moderation_jobs.py
+import logging
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import and_, event, or_, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.moderation_job import ModerationJob
+from app.utils.count_cache import invalidate_counts
+
+logger = logging.getLogger("app")
+
+_HOOKED_KEY = "moderation_wake_hooked"
+
+
+class ModerationQueue:
+    """
+    Story moderation off the request path.
+
+    Writers call `enqueue()` inside their own transaction, so the job row commits (or
+    rolls back) together with the story. A pool of worker threads claims pending rows
+    with `FOR UPDATE SKIP LOCKED`, scans the story and applies the flag or publish
+    transition. Jobs live in `moderation_jobs`, so anything queued survives a restart;
+    rows left `running` by a dead process are reclaimed once their lease expires.
+    A job that runs out of attempts is marked `failed` and its story is flagged for
+    manual review instead of sitting in `pending_review`.
+    """
+
+    def __init__(self, workers: int, poll_interval: float, batch_size: int, lease_seconds: int, max_attempts: int):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def enqueue(self, db: Session, story_id: uuid.UUID, *, reason: str, publish: bool, hold_status: str) -> ModerationJob:
+        """Queue a scan of `story_id` in the caller's transaction; older pending scans are superseded."""
+        db.execute(
+            update(ModerationJob)
+            .where(ModerationJob.story_id == story_id, ModerationJob.status == "pending")
+            .values(status="superseded", finished_at=datetime.utcnow())
+        )
+        job = ModerationJob(story_id=story_id, reason=reason, publish=publish, hold_status=hold_status, status="pending", attempts=0)
+        db.add(job)
+        # Nudge the workers once the job is visible to them (one listener per session).
+        if not db.info.get(_HOOKED_KEY):
+            db.info[_HOOKED_KEY] = True
+            event.listen(db, "after_commit", lambda _s: self._wake.set())
+        return job
+
+    @staticmethod
+    def pending_job(db: Session, story_id: uuid.UUID) -> Optional[ModerationJob]:
+        """Newest not-yet-run job for a story (its publish intent must survive a re-queue)."""
+        return (
+            db.query(ModerationJob)
+            .filter(ModerationJob.story_id == story_id, ModerationJob.status.in_(("pending", "running")))
+            .order_by(ModerationJob.created_at.desc())
+            .first()
+        )
+
+    def process_pending(self, db: Optional[Session] = None, limit: Optional[int] = None) -> int:
+        """Claim and run up to `limit` jobs. Uses `db` if given, else a private session. Returns jobs run."""
+        session = db if db is not None else SessionLocal()
+        try:
+            jobs = self._claim(session, limit or self.batch_size)
+            for job in jobs:
+                self._run_job(session, job)
+            if jobs:
+                invalidate_counts("stories")
+            return len(jobs)
+        finally:
+            if db is None:
+                session.close()
+
+    def _claim(self, db: Session, limit: int) -> List[ModerationJob]:
+        now = datetime.utcnow()
+        self._expire_stale(db, now)
+        jobs = (
+            db.query(ModerationJob)
+            .filter(
+                or_(
+                    ModerationJob.status == "pending",
+                    and_(
+                        ModerationJob.status == "running",
+                        ModerationJob.started_at < now - timedelta(seconds=self.lease_seconds),
+                    ),
+                ),
+                ModerationJob.attempts < self.max_attempts,
+            )
+            .order_by(ModerationJob.created_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        for job in jobs:
+            job.status = "running"
+            job.started_at = now
+            job.attempts += 1
+        db.commit()
+        return jobs
+
+    def _expire_stale(self, db: Session, now: datetime) -> None:
+        """Fail jobs whose last attempt died mid-run (lease expired, no attempts left)."""
+        stale = db.execute(
+            update(ModerationJob)
+            .where(
+                ModerationJob.status == "running",
+                ModerationJob.started_at < now - timedelta(seconds=self.lease_seconds),
+                ModerationJob.attempts >= self.max_attempts,
+            )
+            .values(status="failed", finished_at=now, last_error="Lease expired on the final attempt")
+            .returning(ModerationJob.story_id, ModerationJob.hold_status)
+            .execution_options(synchronize_session=False)
+        ).all()
+        for story_id, hold_status in stale:
+            self._hold_for_review(db, story_id, hold_status)
+        if stale:
+            db.commit()
+
+    @staticmethod
+    def _hold_for_review(db: Session, story_id: uuid.UUID, hold_status: str) -> None:
+        from app.services.story import hold_for_manual_review
+
+        if hold_for_manual_review(db, story_id, hold_status=hold_status) is not None:
+            logger.warning("Story %s held for manual review after moderation failed", story_id)
+
+    def _run_job(self, db: Session, job: ModerationJob) -> None:
+        # Imported here: the story service enqueues through this module.
+        from app.services.story import apply_moderation
+
+        job_id = job.id
+        try:
+            apply_moderation(db, job.story_id, publish=job.publish, hold_status=job.hold_status, reason=job.reason)
+            job.status = "done"
+            job.finished_at = datetime.utcnow()
+            db.commit()
+        except Exception as exc:
+            db.rollback()
+            logger.exception("Moderation job %s failed", job_id)
+            job = db.get(ModerationJob, job_id)
+            if job is not None:
+                job.status = "failed" if job.attempts >= self.max_attempts else "pending"
+                job.last_error = str(exc)[:2000]
+                job.finished_at = datetime.utcnow() if job.status == "failed" else None
+                if job.status == "failed":
+                    self._hold_for_review(db, job.story_id, job.hold_status)
+                db.commit()
+
+    # --- worker pool ---
+
+    def start(self) -> None:
+        if any(t.is_alive() for t in self._threads):
+            return
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"moderation-worker-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for t in self._threads:
+            t.start()
+
+    def stop(self) -> None:
+        # Unfinished jobs stay in the table and are picked up on the next start.
+        self._stop.set()
+        self._wake.set()
+        for t in self._threads:
+            t.join(timeout=self.poll_interval + 5)
+        self._threads = []
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                ran = self.process_pending()
+            except Exception:
+                logger.exception("Moderation worker loop error")
+                ran = 0
+            if not ran:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+
+moderation_queue = ModerationQueue(
+    workers=settings.MODERATION_WORKERS,
+    poll_interval=settings.MODERATION_POLL_SECONDS,
+    batch_size=settings.MODERATION_BATCH_SIZE,
+    lease_seconds=settings.MODERATION_LEASE_SECONDS,
+    max_attempts=settings.MODERATION_MAX_ATTEMPTS,
+)
@@ -0,0 +1,99 @@
+# app/services/moderation_verdicts.py
+import hashlib
+import re
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.moderation_verdict import ModerationVerdict
+from app.services.moderation import PHRASE_WORDS, RULESET_VERSION
+
+# Per-text verdicts for a list of texts, like `moderation.moderate_each`.
+Scanner = Callable[[List[str]], List[Tuple[bool, List[str]]]]
+
+# Paragraph boundaries in stored story HTML (or blank lines in plain text).
+_PARAGRAPH_BREAK = re.compile(r"</p\s*>|</h[1-6]\s*>|<br\s*/?>\s*<br\s*/?>|\n\s*\n", re.IGNORECASE)
+
+
+def field_hash(text: Optional[str]) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def split_chunks(text: Optional[str]) -> List[str]:
+    """Paragraph-sized pieces of `text`; blank pieces are dropped."""
+    return [c for c in (p.strip() for p in _PARAGRAPH_BREAK.split(text or "")) if c]
+
+
+def seams(chunks: Sequence[str], words: int = PHRASE_WORDS - 1) -> List[str]:
+    """
+    The last `words` words of each chunk joined to the first `words` of the next, so
+    a phrase split by a paragraph break is still seen by the scanner.
+    """
+    if words <= 0:
+        return []
+    parts = [c.split() for c in chunks]
+    return [" ".join(a[-words:] + b[:words]) for a, b in zip(parts, parts[1:])]
+
+
+def _chunk_key(chunk: str) -> str:
+    return hashlib.sha256(f"{RULESET_VERSION}\x1f{chunk}".encode("utf-8")).hexdigest()
+
+
+def moderate_incremental(db: Session, texts: Sequence[Optional[str]], scanner: Scanner) -> Tuple[bool, List[str]]:
+    """
+    Same result as `moderate_content`, but only chunks (paragraphs, and the seams
+    between neighbouring ones) without a stored verdict are scanned, all in one
+    `scanner` call. Verdicts are looked up with one IN query and new ones written with
+    one insert, in the caller's transaction. A rule-set change re-keys every chunk.
+    """
+    chunks: Dict[str, str] = {}
+    for text in texts:
+        pieces = split_chunks(text)
+        for chunk in pieces + seams(pieces):
+            chunks.setdefault(_chunk_key(chunk), chunk)
+    if not chunks:
+        return False, []
+
+    verdicts = {
+        key: (flagged, [c for c in cats.split(";") if c])
+        for key, flagged, cats in db.execute(
+            select(ModerationVerdict.chunk_hash, ModerationVerdict.flagged, ModerationVerdict.categories)
+            .where(ModerationVerdict.chunk_hash.in_(list(chunks)))
+        )
+    }
+
+    todo = [key for key in chunks if key not in verdicts]
+    if todo:
+        results = scanner([chunks[key] for key in todo])
+        fresh = []
+        for key, (flagged, cats) in zip(todo, results):
+            verdicts[key] = (flagged, list(cats))
+            fresh.append({"chunk_hash": key, "flagged": flagged, "categories": ";".join(cats), "ruleset": RULESET_VERSION})
+        db.execute(pg_insert(ModerationVerdict).values(fresh).on_conflict_do_nothing())
+
+    flagged = any(f for f, _ in verdicts.values())
+    cats = sorted({c for f, cs in verdicts.values() if f for c in cs})
+    return flagged, cats
+
+
+def delete_stale_verdicts(db: Session, limit: int) -> int:
+    """
+    Delete up to `limit` verdicts stored under another rule set (their keys are never
+    computed again), in the caller's transaction (no commit). Rows locked by a
+    concurrent writer are skipped. Returns rows deleted.
+    """
+    doomed = (
+        select(ModerationVerdict.chunk_hash)
+        .where(ModerationVerdict.ruleset.is_distinct_from(RULESET_VERSION))
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    result = db.execute(
+        delete(ModerationVerdict)
+        .where(ModerationVerdict.chunk_hash.in_(doomed))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
@@ -0,0 +1,192 @@
+# app/services/notification_broker.py
+"""
+Pub/sub for live notification delivery (`GET /me/notifications/stream`).
+
+Notifications are published once they have committed. Each SSE connection subscribes
+for its user and receives events on its own asyncio queue. The default broker only
+reaches subscribers in this process; `RedisBroker` publishes through a Redis channel so
+every worker fans the event out to its own subscribers.
+
+Event ids are keyset cursors over (updated_at, id), so a client that reconnects with
+`Last-Event-ID` is replayed everything that changed after it from the database.
+`updated_at` is stamped by the database when a notification is written or merged, so
+ids follow delivery order rather than action time. The cursor is only monotonic per
+delivery, though: two dispatchers committing at nearly the same moment can commit
+out of timestamp order, and a client that already holds the later id will not be
+replayed the earlier row (it is still in the inbox).
+"""
+import asyncio
+import json
+import logging
+import threading
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.schemas.notifications import NotificationOut
+from app.utils.pagination import encode_cursor
+
+logger = logging.getLogger("app")
+
+_PENDING_KEY = "notification_events_pending"
+_HOOKED_KEY = "notification_events_hooked"
+
+
+def event_for(row: Dict) -> Dict:
+    """SSE event (id + JSON data) for a notification row or mapping."""
+    out = NotificationOut.model_validate(row)
+    return {
+        "id": encode_cursor(out.updated_at or out.created_at, out.id),
+        "data": out.model_dump_json(),
+        "recipient_id": str(out.recipient_id),
+    }
+
+
+class Subscription:
+    """One SSE connection's inbox. Fed from any thread, read from the event loop."""
+
+    def __init__(self, recipient_id: uuid.UUID, max_pending: int):
+        self.recipient_id = recipient_id
+        self.max_pending = max_pending
+        self.closed = False
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    def put(self, evt: Dict) -> None:
+        self._loop.call_soon_threadsafe(self._put, evt)
+
+    def _put(self, evt: Dict) -> None:
+        if self.closed:
+            return
+        if self._queue.qsize() >= self.max_pending:
+            # Slow reader: end the stream; the client resumes with Last-Event-ID.
+            self.closed = True
+            self._queue.put_nowait(None)
+            return
+        self._queue.put_nowait(evt)
+
+    async def get(self, timeout: float) -> Optional[Dict]:
+        """Next event, None once closed; raises asyncio.TimeoutError when idle."""
+        return await asyncio.wait_for(self._queue.get(), timeout)
+
+
+class NotificationBroker:
+    """In-process broker: publishes reach subscribers of this worker only."""
+
+    def __init__(self, max_pending: int):
+        self.max_pending = max_pending
+        self._subs: Dict[str, Set[Subscription]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, recipient_id: uuid.UUID) -> Subscription:
+        sub = Subscription(recipient_id, self.max_pending)
+        with self._lock:
+            self._subs[str(recipient_id)].add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            subs = self._subs.get(str(sub.recipient_id))
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subs[str(sub.recipient_id)]
+
+    def publish(self, events: List[Dict]) -> None:
+        self._fan_out(events)
+
+    def _fan_out(self, events: List[Dict]) -> None:
+        with self._lock:
+            targets = [(evt, list(self._subs.get(evt["recipient_id"], ()))) for evt in events]
+        for evt, subs in targets:
+            for sub in subs:
+                sub.put(evt)
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+
+class RedisBroker(NotificationBroker):
+    """Publishes through a Redis channel; a listener thread fans messages out locally."""
+
+    CHANNEL = "notifications"
+
+    def __init__(self, url: str, max_pending: int):
+        super().__init__(max_pending)
+        import redis  # only needed when this broker is configured
+
+        self._redis = redis.Redis.from_url(url)
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def publish(self, events: List[Dict]) -> None:
+        try:
+            self._redis.publish(self.CHANNEL, json.dumps(events))
+        except Exception:
+            # Live push is best-effort; the events are in the database for resume.
+            logger.exception("Failed to publish %d notification events", len(events))
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._listen, name="notification-broker", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _listen(self) -> None:
+        while not self._stop.is_set():
+            pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(self.CHANNEL)
+                while not self._stop.is_set():
+                    msg = pubsub.get_message(timeout=1.0)
+                    if msg and msg["type"] == "message":
+                        self._fan_out(json.loads(msg["data"]))
+            except Exception:
+                logger.exception("Notification broker lost its Redis subscription; retrying")
+                self._stop.wait(1.0)
+            finally:
+                pubsub.close()
+
+
+def publish_after_commit(db: Session, rows: List[Dict]) -> None:
+    """Publish `rows` once `db` commits; drop them if its transaction rolls back."""
+    if not rows:
+        return
+    if not db.info.get(_HOOKED_KEY):
+        db.info[_HOOKED_KEY] = True
+
+        @event.listens_for(db, "after_commit")
+        def _publish(session):
+            events = [event_for(r) for r in session.info.pop(_PENDING_KEY, [])]
+            if events:
+                notification_broker.publish(events)
+
+        @event.listens_for(db, "after_soft_rollback")
+        def _discard(session, previous_transaction):
+            if not previous_transaction.nested:
+                session.info.pop(_PENDING_KEY, None)
+
+    db.info.setdefault(_PENDING_KEY, []).extend(rows)
+
+
+def _build_broker() -> NotificationBroker:
+    if settings.NOTIFICATION_BROKER == "redis":
+        return RedisBroker(settings.REDIS_URL, settings.NOTIFICATION_STREAM_MAX_PENDING)
+    return NotificationBroker(settings.NOTIFICATION_STREAM_MAX_PENDING)
+
+
+notification_broker = _build_broker()
@@ -0,0 +1,117 @@
+# app/services/notification_maintenance.py
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.counters import reconcile_unread_notifications
+from app.services.moderation_verdicts import delete_stale_verdicts
+from app.services.notifications import delete_read_notifications
+
+logger = logging.getLogger("app")
+
+# pg advisory lock key: only one worker runs a maintenance pass at a time.
+_LOCK_KEY = 0x6E6F7469  # "noti"
+
+
+class NotificationMaintenance:
+    """
+    Periodic upkeep for notifications, every `interval` seconds on a background thread:
+    repairs drifted `users.unread_notifications` counters, then deletes read
+    notifications older than `retention_days`. The same pass drops moderation
+    verdicts cached under an old rule set. Deletes go in transactions of at most
+    `batch_size` rows with a pause in between, so a large backlog never holds many
+    row locks or one long transaction. Every worker runs the thread; a
+    transaction-level advisory lock, taken again for each transaction, lets only one
+    of them do a given pass.
+    """
+
+    def __init__(self, interval: float, retention_days: int, batch_size: int, pause: float):
+        self.interval = interval
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.pause = pause
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self, db: Optional[Session] = None) -> bool:
+        """One maintenance pass. Returns False if another worker holds the lock."""
+        session = db if db is not None else SessionLocal()
+        try:
+            if not self._lock(session):
+                return False
+            fixed = reconcile_unread_notifications(session)
+            if fixed:
+                logger.info("Corrected unread notification counters for %d users", fixed)
+            pruned = self.prune(session)
+            if pruned:
+                logger.info("Deleted %d read notifications older than %d days", pruned, self.retention_days)
+            stale = self.prune_verdicts(session)
+            if stale:
+                logger.info("Deleted %d moderation verdicts from old rule sets", stale)
+            return True
+        except Exception:
+            session.rollback()
+            logger.exception("Notification maintenance failed")
+            return False
+        finally:
+            if db is None:
+                session.close()
+
+    def prune(self, db: Session) -> int:
+        """Delete expired read notifications batch by batch, committing each. Returns rows deleted."""
+        if self.retention_days <= 0:
+            return 0
+        cutoff = datetime.utcnow() - timedelta(days=self.retention_days)
+        return self._in_batches(db, lambda: delete_read_notifications(db, cutoff, self.batch_size))
+
+    def prune_verdicts(self, db: Session) -> int:
+        """Delete verdicts of previous rule sets, batch by batch. Returns rows deleted."""
+        return self._in_batches(db, lambda: delete_stale_verdicts(db, self.batch_size))
+
+    def _in_batches(self, db: Session, delete_batch: Callable[[], int]) -> int:
+        total = 0
+        while self._lock(db):
+            deleted = delete_batch()
+            db.commit()
+            total += deleted
+            if deleted < self.batch_size or self._stop.wait(self.pause):
+                break
+        return total
+
+    @staticmethod
+    def _lock(db: Session) -> bool:
+        if db.execute(select(func.pg_try_advisory_xact_lock(_LOCK_KEY))).scalar():
+            return True
+        db.rollback()
+        return False
+
+    def start(self) -> None:
+        if self.interval <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="notification-maintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+
+notification_maintenance = NotificationMaintenance(
+    interval=settings.NOTIFICATION_MAINTENANCE_SECONDS,
+    retention_days=settings.NOTIFICATION_RETENTION_DAYS,
+    batch_size=settings.NOTIFICATION_PRUNE_BATCH_SIZE,
+    pause=settings.NOTIFICATION_PRUNE_PAUSE_SECONDS,
+)
@@ -0,0 +1,218 @@
+# app/services/notification_outbox.py
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import delete, event, func, literal_column, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.notification import Notification
+from app.models.notification_outbox import NotificationOutbox
+from app.services.counters import bump_unread_counts
+from app.services.notification_broker import publish_after_commit
+
+logger = logging.getLogger("app")
+
+_HOOKED_KEY = "notification_wake_hooked"
+
+_COLUMNS = ("id", "recipient_id", "actor_id", "action", "target_type", "target_id", "created_at")
+
+# Actions that fold into one row per (recipient, action, target, window).
+AGGREGATED_ACTIONS = frozenset({"liked", "commented"})
+RECENT_ACTORS = 5
+
+# Merge an incoming group into the open one. Actors already among the recent ones are
+# not counted twice; the recent list stays newest first, without repeats.
+_MERGE_COUNT = literal_column(
+    "notifications.actor_count + excluded.actor_count - cardinality(ARRAY("
+    "SELECT unnest(excluded.recent_actor_ids) INTERSECT SELECT unnest(notifications.recent_actor_ids)))"
+)
+_MERGE_RECENT = literal_column(
+    "(excluded.recent_actor_ids || ARRAY("
+    "SELECT a FROM unnest(notifications.recent_actor_ids) WITH ORDINALITY AS t(a, i) "
+    f"WHERE a <> ALL(excluded.recent_actor_ids) ORDER BY i))[1:{RECENT_ACTORS}]"
+)
+
+
+# True when ON CONFLICT inserted the row rather than updating it.
+_INSERTED = literal_column("(xmax = 0)").label("inserted")
+# Write time, stamped by the database: SSE event ids (updated_at, id) follow the
+# order rows are written in, not the order the underlying actions happened in.
+# clock_timestamp(), not now(): several writes in one transaction still advance it.
+_WRITTEN_AT = func.timezone("utc", func.clock_timestamp())
+
+
+def _bucket(created_at: datetime) -> int:
+    return int(created_at.replace(tzinfo=timezone.utc).timestamp()) // settings.NOTIFICATION_GROUP_WINDOW_SECONDS
+
+
+def write_notifications(db: Session, rows: Sequence[Dict]) -> List[Dict]:
+    """
+    Write notification rows (notify() keyword arguments plus `id` and `created_at`)
+    in the caller's transaction. Plain rows go in one multi-row insert. Aggregated
+    actions are folded per group in Python first, then upserted in one statement
+    against `uq_notifications_open_group`. A group's `created_at` is its latest
+    activity, so new likes or comments bring it back to the top of the inbox (which
+    is ordered, paged and pruned by `created_at`). Returns the rows as written or
+    merged (all columns), in created_at order. `updated_at` is set by the database
+    to the time of this write and never moves back. `actor_count` is approximate: a repeat is only recognised while
+    the actor is still among the recent ones.
+    """
+    plain: List[Dict] = []
+    groups: Dict[tuple, Dict] = {}
+    key_of: List = []
+    for r in sorted(rows, key=lambda r: r["created_at"]):
+        base = {c: r.get(c) for c in _COLUMNS}
+        actors = [r["actor_id"]] if r.get("actor_id") else []
+        if r["action"] in AGGREGATED_ACTIONS and r.get("target_type") and r.get("target_id"):
+            key = (r["recipient_id"], r["action"], r["target_type"], r["target_id"], _bucket(r["created_at"]))
+            g = groups.get(key)
+            if g is None:
+                groups[key] = {**base, "group_bucket": key[-1], "is_read": False, "actor_count": max(len(actors), 1),
+                               "recent_actor_ids": actors, "updated_at": _WRITTEN_AT}
+            else:
+                # later events win the "latest actor" slot
+                new_actor = bool(actors) and actors[0] not in g["recent_actor_ids"]
+                g["actor_id"] = r.get("actor_id") or g["actor_id"]
+                g["recent_actor_ids"] = (actors + [a for a in g["recent_actor_ids"] if a not in actors])[:RECENT_ACTORS]
+                g["actor_count"] += int(new_actor)
+                g["created_at"] = r["created_at"]
+            key_of.append(key)
+        else:
+            plain.append({**base, "is_read": False, "actor_count": 1, "recent_actor_ids": actors, "updated_at": _WRITTEN_AT})
+            key_of.append(r["id"])
+
+    columns = list(Notification.__table__.c)
+    written: Dict = {}
+    new_unread: Dict = {}
+    if plain:
+        stmt = pg_insert(Notification).values(plain).on_conflict_do_nothing(index_elements=["id"])
+        for row in db.execute(stmt.returning(*columns)).mappings():
+            written[row["id"]] = dict(row)
+            new_unread[row["recipient_id"]] = new_unread.get(row["recipient_id"], 0) + 1
+    if groups:
+        ins = pg_insert(Notification).values(list(groups.values()))
+        stmt = ins.on_conflict_do_update(
+            index_elements=["recipient_id", "action", "target_type", "target_id", "group_bucket"],
+            index_where=text("NOT is_read AND group_bucket IS NOT NULL"),  # must match the index predicate
+            set_={
+                "actor_id": ins.excluded.actor_id,
+                "actor_count": _MERGE_COUNT,
+                "recent_actor_ids": _MERGE_RECENT,
+                # a group sorts by its latest activity; never moves back on a late event
+                "created_at": func.greatest(Notification.__table__.c.created_at, ins.excluded.created_at),
+                "updated_at": func.greatest(Notification.__table__.c.updated_at, ins.excluded.updated_at),
+            },
+        ).returning(*columns, _INSERTED)
+        for row in db.execute(stmt).mappings():
+            key = (row["recipient_id"], row["action"], row["target_type"], row["target_id"], row["group_bucket"])
+            written[key] = {c.name: row[c.name] for c in columns}
+            if row["inserted"]:  # a merge into an open group is not a new unread item
+                new_unread[row["recipient_id"]] = new_unread.get(row["recipient_id"], 0) + 1
+    bump_unread_counts(db, new_unread)
+    # a group touched by several rows is reported once
+    out, seen = [], set()
+    for k in key_of:
+        if k in written and k not in seen:
+            seen.add(k)
+            out.append(written[k])
+    return out
+
+
+class NotificationDispatcher:
+    """
+    Moves notifications from `notification_outbox` into `notifications`.
+
+    `notify()` only adds an outbox row to the caller's transaction, so a user action
+    commits once and its notification commits (or rolls back) with it. A background
+    thread claims up to `batch_size` rows with `FOR UPDATE SKIP LOCKED`, deletes them
+    and writes them with `write_notifications` (one insert for plain rows, one upsert
+    for aggregated ones), all in one transaction. Rows are
+    durable: anything still in the outbox at shutdown is delivered after the restart.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def wake_after_commit(self, db: Session) -> None:
+        """Nudge the dispatcher once the caller's outbox rows are visible (one listener per session)."""
+        if not db.info.get(_HOOKED_KEY):
+            db.info[_HOOKED_KEY] = True
+            event.listen(db, "after_commit", lambda _s: self._wake.set())
+
+    def dispatch(self, db: Optional[Session] = None, limit: Optional[int] = None) -> int:
+        """
+        Deliver up to `limit` outbox rows. Uses `db` if given (caller owns the
+        transaction), otherwise a short-lived session that commits. Returns rows delivered.
+        """
+        if db is not None:
+            return len(self._deliver(db, limit or self.batch_size))
+
+        session = SessionLocal()
+        try:
+            delivered = self._deliver(session, limit or self.batch_size)
+            session.commit()
+        except Exception:
+            session.rollback()
+            logger.exception("Failed to dispatch notifications")
+            return 0
+        finally:
+            session.close()
+        return len(delivered)
+
+    def _deliver(self, db: Session, limit: int) -> List[dict]:
+        claimed = (
+            select(NotificationOutbox.id)
+            .order_by(NotificationOutbox.created_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        rows = db.execute(
+            delete(NotificationOutbox)
+            .where(NotificationOutbox.id.in_(claimed))
+            .returning(*(getattr(NotificationOutbox, c) for c in _COLUMNS))
+            .execution_options(synchronize_session=False)
+        ).all()
+        if not rows:
+            return []
+        values = [row._asdict() for row in rows]
+        publish_after_commit(db, write_notifications(db, values))
+        return values
+
+    # --- background dispatcher ---
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="notification-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=self.flush_interval + 5)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            # Keep going while full batches come back; otherwise wait for a nudge or the interval.
+            if self.dispatch() < self.batch_size:
+                self._wake.wait(self.flush_interval)
+                self._wake.clear()
+
+
+notification_dispatcher = NotificationDispatcher(
+    batch_size=settings.NOTIFICATION_BATCH_SIZE,
+    flush_interval=settings.NOTIFICATION_FLUSH_SECONDS,
+)
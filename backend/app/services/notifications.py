@@ -1,9 +1,19 @@
 from sqlalchemy.orm import Session,selectinload
-from sqlalchemy import desc,func
-from typing import Optional, Tuple, List
+from sqlalchemy import delete,insert,select,update
+from typing import Optional, Tuple, List, Iterable, Dict, Any, Union
 from uuid import UUID
+from datetime import datetime
+import uuid
 
+from app.core.config import settings
 from app.models.notification import Notification
+from app.models.notification_outbox import NotificationOutbox
+from app.models.user import User
+from app.services.counters import bump_user_counter
+from app.services.notification_broker import event_for, publish_after_commit
+from app.utils.count_cache import TotalMode, cached_total, count_key
+from app.utils.pagination import keyset_after
+from app.services.notification_outbox import notification_dispatcher, write_notifications
 
 
 def notify(
@@ -14,62 +24,140 @@ def notify(
     actor_id: Optional[UUID] = None,
     target_type: Optional[str] = None,
     target_id: Optional[UUID] = None,
-) -> Notification:
+) -> Union[Notification, NotificationOutbox]:
     """
-    Create and persist a notification record.
+    Add a notification to the caller's transaction; it is committed with the caller's
+    work (no commit here). With NOTIFICATIONS_ASYNC the row goes to the outbox and the
+    dispatcher delivers it; otherwise it is written directly. Likes and comments on
+    the same target fold into one unread group row (see `write_notifications`), in
+    which case the group is returned.
     """
-    n = Notification(
-        recipient_id=recipient_id,
-        actor_id=actor_id,
-        action=action,
-        target_type=target_type,
-        target_id=target_id,
-        is_read=False,
+    row = {
+        "id": uuid.uuid4(),
+        "recipient_id": recipient_id,
+        "actor_id": actor_id,
+        "action": action,
+        "target_type": target_type,
+        "target_id": target_id,
+        "created_at": datetime.utcnow(),
+    }
+    if settings.NOTIFICATIONS_ASYNC:
+        n = NotificationOutbox(**row)
+        db.add(n)
+        notification_dispatcher.wake_after_commit(db)
+        return n
+    db.flush()
+    written = write_notifications(db, [row])
+    publish_after_commit(db, written)
+    return db.get(Notification, written[0]["id"], populate_existing=True)
+
+
+def notify_many(db: Session, rows: Iterable[Dict[str, Any]]) -> int:
+    """
+    `notify()` for many rows with one multi-row insert, in the caller's transaction
+    (no commit). Each row takes the keyword arguments of `notify()`.
+    """
+    now = datetime.utcnow()
+    values = [
+        {
+            "id": uuid.uuid4(),
+            "recipient_id": r["recipient_id"],
+            "actor_id": r.get("actor_id"),
+            "action": r["action"],
+            "target_type": r.get("target_type"),
+            "target_id": r.get("target_id"),
+            "created_at": now,
+        }
+        for r in rows
+    ]
+    if not values:
+        return 0
+    if settings.NOTIFICATIONS_ASYNC:
+        db.execute(insert(NotificationOutbox), values)
+        notification_dispatcher.wake_after_commit(db)
+    else:
+        publish_after_commit(db, write_notifications(db, values))
+    return len(values)
+
+
+def notification_events_since(db: Session, user_id: UUID, last_event_id: str, limit: int = 500) -> List[Dict[str, Any]]:
+    """
+    SSE events for the user's notifications written after `last_event_id` (an id
+    previously sent on the stream), oldest first, at most `limit` of them. A full page
+    means there may be more: the stream ends after it and the client resumes from the
+    last one.
+    """
+    q = db.query(Notification).filter(Notification.recipient_id == user_id)
+    rows = (
+        keyset_after(q, (Notification.updated_at, Notification.id), last_event_id, descending=False)
+        .order_by(Notification.updated_at, Notification.id)
+        .limit(limit)
+        .all()
     )
-    db.add(n)
-    db.commit()
-    db.refresh(n)
-    return n
+    return [event_for(n) for n in rows]
 
 
-def list_my_notifications(db: Session, user_id: UUID, limit: int, offset: int, unread_only: bool = False) -> Tuple[int, List[Notification]]:
+def list_my_notifications(
+    db: Session,
+    user_id: UUID,
+    limit: int,
+    offset: int,
+    unread_only: bool = False,
+    *,
+    cursor: Optional[str] = None,
+    total_mode: TotalMode = "exact",
+) -> Tuple[Optional[int], List[Notification]]:
+    """
+    Newest-first page of the user's notifications. With a cursor, seek past
+    (created_at, id) on the recipient indexes; otherwise fall back to offset paging.
+    The unread-only total comes from the maintained counter; `total_mode="none"`
+    skips counting entirely.
+    """
     q = db.query(Notification).filter(Notification.recipient_id == user_id)
     if unread_only:
         q = q.filter(Notification.is_read.is_(False))
 
-    total = q.with_entities(func.count()).scalar()  # or q.count()
-    print(f"User Id is {user_id}")
-    items = (
-        q.options(selectinload(Notification.actor))   # <-- if you’ll expose actor
-         .order_by(desc(Notification.created_at))
-         .offset(offset)
-         .limit(limit)
-         .all()
-    )
-    print(f"from the service of notification {total}, {items}")
-    return total, items
+    if total_mode == "none":
+        total = None
+    elif unread_only:
+        total = unread_count(db, user_id)
+    elif total_mode == "estimate":
+        # never cached under this namespace, so this is always the planner's estimate
+        total = cached_total(q, count_key("notifications", recipient_id=user_id), "estimate")
+    else:
+        total = q.count()
+
+    q = q.options(selectinload(Notification.actor)).order_by(Notification.created_at.desc(), Notification.id.desc())
+    if cursor:
+        q = keyset_after(q, (Notification.created_at, Notification.id), cursor)
+    else:
+        q = q.offset(offset)
+    return total, q.limit(limit).all()
 
 
 def mark_as_read(db: Session, notif_id: UUID, user_id: UUID) -> Optional[Notification]:
     """
-    Mark a single notification as read for the given user.
+    Mark a single notification as read for the given user. The unread counter only
+    moves when this call flipped the row, so repeats and races cannot double-count.
     """
-    n = (
+    flipped = db.execute(
+        update(Notification)
+        .where(Notification.id == notif_id, Notification.recipient_id == user_id, Notification.is_read.is_(False))
+        .values(is_read=True)
+        .returning(Notification.id)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if flipped:
+        bump_user_counter(db, user_id, "unread_notifications", -1)
+        db.commit()
+
+    return (
         db.query(Notification)
         .filter(Notification.id == notif_id, Notification.recipient_id == user_id)
+        .populate_existing()
         .first()
     )
 
-    if not n:
-        return None
-
-    if not n.is_read:
-        n.is_read = True
-        db.commit()
-        db.refresh(n)
-
-    return n
-
 
 def mark_all_as_read(db: Session, user_id: UUID) -> int:
     """
@@ -80,5 +168,33 @@ def mark_all_as_read(db: Session, user_id: UUID) -> int:
         .filter(Notification.recipient_id == user_id, Notification.is_read.is_(False))
         .update({Notification.is_read: True}, synchronize_session=False)
     )
+    if updated:
+        # Relative, not a reset: notifications arriving concurrently stay counted.
+        bump_user_counter(db, user_id, "unread_notifications", -updated)
     db.commit()
     return updated
+
+
+def unread_count(db: Session, user_id: UUID) -> int:
+    """Unread notifications for the user, from the maintained counter (no COUNT(*))."""
+    return db.query(User.unread_notifications).filter(User.id == user_id).scalar() or 0
+
+
+def delete_read_notifications(db: Session, older_than: datetime, limit: int) -> int:
+    """
+    Delete up to `limit` read notifications created before `older_than`, in the
+    caller's transaction (no commit). Rows locked by a concurrent writer are skipped
+    rather than waited on. Unread rows are never touched, so the unread counters
+    are unaffected. Returns rows deleted.
+    """
+    doomed = (
+        select(Notification.id)
+        .where(Notification.is_read, Notification.created_at < older_than)  # matches ix_notifications_read_created_at
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    result = db.execute(
+        delete(Notification).where(Notification.id.in_(doomed)).execution_options(synchronize_session=False)
+    )
+    return result.rowcount
@@ -0,0 +1,262 @@
+# app/services/rescan.py
+"""
+Corpus-wide re-moderation (run via `python -m app.remoderate`).
+
+Stories and comments are streamed in primary-key order through a server-side cursor
+(`yield_per`), one partition per chunk. Chunks fan out to a process pool that scans
+each chunk's texts in one matcher pass. Results are applied in submission order, one write transaction
+per chunk: a multi-row Flag insert and one UPDATE for the newly flagged stories.
+After each chunk commits, its last id goes to the checkpoint, so an interrupted run
+resumes where it stopped.
+"""
+import json
+import logging
+import os
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, case, cast, exists, insert, literal, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.models.comment import Comment
+from app.models.flag import Flag
+from app.models.stories import ContentSource, FlagSource, Story, StoryStatus
+from app.services.moderation import RULESET_VERSION, scan_content
+from app.services.system import get_automod_user_id
+
+logger = logging.getLogger("app")
+
+RESCAN_REASON = "Profanity detected on rescan"
+# Flags a moderator has closed: the decision stands, a rescan does not re-open it.
+REVIEWED_FLAG_STATUSES = ("resolved", "approved", "ignored")
+TARGETS = ("stories", "comments")
+
+# (id, texts) in, (id, flagged, categories) out
+Row = Tuple[uuid.UUID, Tuple[Optional[str], ...]]
+Verdict = Tuple[uuid.UUID, bool, List[str]]
+
+
+def scan_rows(rows: Sequence[Row]) -> List[Verdict]:
+    """Process-pool entry point: moderate every row's texts with one scan over all of them."""
+    owner, texts = [], []
+    for i, (_, row_texts) in enumerate(rows):
+        owner.extend([i] * len(row_texts))
+        texts.extend(row_texts)
+    cats = [set() for _ in rows]
+    for m in scan_content(texts):  # each text is its own field: no match spans two
+        cats[owner[m.field]].add(m.category)
+    return [(row_id, bool(c), sorted(c)) for (row_id, _), c in zip(rows, cats)]
+
+
+class Checkpoint:
+    """Last committed id per target, in a JSON file. Reset when the rule set changes."""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.data: Dict = {"ruleset": RULESET_VERSION}
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as fh:
+                saved = json.load(fh)
+            if saved.get("ruleset") == RULESET_VERSION:
+                self.data = saved
+            else:
+                logger.info("Checkpoint %s is for another rule set; starting over.", path)
+
+    def last_id(self, target: str) -> Optional[uuid.UUID]:
+        value = self.data.get(target)
+        return uuid.UUID(value) if value else None
+
+    def is_done(self, target: str) -> bool:
+        return bool(self.data.get(f"{target}_done"))
+
+    def advance(self, target: str, last_id: uuid.UUID) -> None:
+        self.data[target] = str(last_id)
+        self.save()
+
+    def finish(self, target: str) -> None:
+        self.data[f"{target}_done"] = True
+        self.save()
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(self.data, fh)
+        os.replace(tmp, self.path)
+
+
+@dataclass
+class RescanStats:
+    scanned: int = 0
+    flagged: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    @property
+    def rate(self) -> float:
+        elapsed = time.monotonic() - self.started
+        return self.scanned / elapsed if elapsed > 0 else 0.0
+
+
+class _InlineExecutor(Executor):
+    """Runs submissions immediately; used for --workers 0 and in tests."""
+
+    def submit(self, fn, *args, **kwargs):
+        future: Future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+def rescan_corpus(
+    read_db: Session,
+    write_db: Session,
+    *,
+    targets: Sequence[str] = TARGETS,
+    chunk_size: int = 500,
+    workers: Optional[int] = None,
+    checkpoint: Optional[Checkpoint] = None,
+    progress: Optional[Callable[[str, RescanStats], None]] = None,
+) -> Dict[str, RescanStats]:
+    """
+    Re-moderate every live story and every comment. `read_db` holds the streaming
+    cursor; `write_db` commits once per chunk. `workers=0` scans in-process.
+    Returns per-target stats.
+    """
+    checkpoint = checkpoint or Checkpoint(None)
+    automod_id = get_automod_user_id(write_db)
+    write_db.commit()
+
+    executor: Executor = _InlineExecutor() if workers == 0 else ProcessPoolExecutor(max_workers=workers)
+    results: Dict[str, RescanStats] = {}
+    try:
+        for target in targets:
+            if checkpoint.is_done(target):
+                logger.info("Rescan of %s already complete in checkpoint; skipping.", target)
+                continue
+            stats = RescanStats()
+            results[target] = stats
+            _rescan_target(
+                read_db, write_db, executor, target, chunk_size, 2 * max(workers or os.cpu_count() or 1, 1),
+                checkpoint, automod_id, stats, progress,
+            )
+            checkpoint.finish(target)
+    finally:
+        executor.shutdown(wait=True)
+    return results
+
+
+def _stream(read_db: Session, target: str, after: Optional[uuid.UUID], chunk_size: int):
+    if target == "stories":
+        stmt = select(Story.id, Story.title, Story.content).where(Story.deleted_at.is_(None))
+        key = Story.id
+    else:
+        stmt = select(Comment.id, Comment.content)
+        key = Comment.id
+    if after is not None:
+        stmt = stmt.where(key > after)
+    result = read_db.execute(stmt.order_by(key).execution_options(yield_per=chunk_size))
+    for partition in result.partitions():
+        yield [(row[0], tuple(row[1:])) for row in partition]
+
+
+def _rescan_target(read_db, write_db, executor, target, chunk_size, max_in_flight, checkpoint, automod_id, stats, progress) -> None:
+    # Bounded read-ahead; results are applied in submission order so the checkpoint only moves forward.
+    in_flight: Deque[Tuple[uuid.UUID, int, Future]] = deque()
+
+    def drain_one() -> None:
+        last_id, count, future = in_flight.popleft()
+        verdicts = future.result()
+        stats.flagged += apply_verdicts(write_db, target, verdicts, automod_id)
+        write_db.commit()
+        checkpoint.advance(target, last_id)
+        stats.scanned += count
+        if progress:
+            progress(target, stats)
+
+    for rows in _stream(read_db, target, checkpoint.last_id(target), chunk_size):
+        in_flight.append((rows[-1][0], len(rows), executor.submit(scan_rows, rows)))
+        if len(in_flight) >= max_in_flight:
+            drain_one()
+    while in_flight:
+        drain_one()
+
+
+def _status(value: StoryStatus):
+    # Typed enum literal; bare CASE branches would resolve to text.
+    return cast(literal(value, Story.status.type), Story.status.type)
+
+
+def apply_verdicts(db: Session, target: str, verdicts: List[Verdict], automod_id: uuid.UUID) -> int:
+    """
+    Write automod flags for a batch of verdicts (also used by the comment moderation
+    buffer). Rows already flagged, with a flag a moderator has closed, or deleted in
+    the meantime are left alone. Does not commit. Returns how many rows were newly flagged.
+    """
+    hits = {row_id: cats for row_id, flagged, cats in verdicts if flagged}
+    if not hits:
+        return 0
+
+    if target == "stories":
+        # Only stories not already flagged, and not cleared by a moderator, get a new automod flag.
+        reviewed = exists().where(Flag.story_id == Story.id, Flag.status.in_(REVIEWED_FLAG_STATUSES))
+        ids = list(
+            db.execute(
+                update(Story)
+                .where(Story.id.in_(list(hits)), Story.is_flagged.isnot(True), ~reviewed)
+                .values(
+                    is_flagged=True,
+                    is_published=False,
+                    flag_source=FlagSource.ai,
+                    status=case(
+                        (Story.source == ContentSource.ai, _status(StoryStatus.generated)),
+                        else_=_status(StoryStatus.draft),
+                    ),
+                    flags_count=Story.flags_count + 1,
+                    updated_at=Story.updated_at,
+                )
+                .returning(Story.id)
+            ).scalars()
+        )
+        fk = "story_id"
+    else:
+        # Comments are hard-deleted: one removed since its verdict was computed has
+        # nothing to flag, and its id would fail the flags FK for the whole batch.
+        # FOR KEY SHARE (what the FK check takes) keeps the rest from vanishing until commit.
+        handled = exists().where(
+            Flag.comment_id == Comment.id,
+            or_(
+                and_(Flag.flagged_by_user_id == automod_id, Flag.status == "open"),
+                Flag.status.in_(REVIEWED_FLAG_STATUSES),
+            ),
+        )
+        ids = list(
+            db.execute(
+                select(Comment.id)
+                .where(Comment.id.in_(list(hits)), ~handled)
+                .with_for_update(read=True, key_share=True)
+            ).scalars()
+        )
+        fk = "comment_id"
+
+    if ids:
+        now = datetime.utcnow()
+        db.execute(
+            insert(Flag),
+            [
+                {
+                    "id": uuid.uuid4(),
+                    "flagged_by_user_id": automod_id,
+                    fk: row_id,
+                    "reason": "; ".join(hits[row_id]) or RESCAN_REASON,
+                    "status": "open",
+                    "created_at": now,
+                }
+                for row_id in ids
+            ],
+        )
+    return len(ids)
@@ -1,74 +1,59 @@
 from __future__ import annotations
 from datetime import datetime
 from typing import List, Optional, Tuple
+import re
 import uuid
 from fastapi import HTTPException, status, Request
-from sqlalchemy.orm import Session , joinedload
+from sqlalchemy import exists, literal, update
+from sqlalchemy.orm import Session , joinedload, selectinload, load_only, Query
 # Import all necessary models
 from app.models.like import Like
 from app.models.bookmarks import Bookmark
 from app.models.stories import Story, ContentSource, StoryStatus, LengthLabel
 from app.models.tags import Tag
-from app.models.view_history import ViewHistory
 from app.models.user import User
 from app.models.flag import Flag
 from app.models.story_revision import StoryRevision
 # Import all necessary schemas
 from app.schemas.stories import StoryCreate, StoryUpdate, StoryGenerateIn, StoryFeedbackIn, StoryOut, TagSummary, UserSummary
-from app.services.moderation import moderate_content
+from app.services.moderation import moderate_each
 from app.llm.adapter import LLMAdapter
 from app.core.config import settings
-from app.services.system import get_automod_user 
+from app.services.system import get_automod_user_id
+from app.services.view_buffer import view_buffer
+from app.services.counters import bump_story_counter, bump_user_counter
+from app.services.tags import set_story_tags
+from app.services.moderation_jobs import moderation_queue
+from app.services.moderation_verdicts import field_hash, moderate_incremental
+from app.utils.pagination import keyset_after
+from app.utils.count_cache import TotalMode, cached_total, count_key, invalidate_counts
 # Initialize the LLM Adapter once
 _llm = LLMAdapter()
 # --- STORY CREATION (HUMAN) ---
 def create_story(db: Session, data: StoryCreate, current_user: User) -> Story:
-    tag_objs = []
     allowed_roles = {"creator", "moderator", "admin"}
     if current_user.role.name not in allowed_roles:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You do not have permission to create a story."
         )
-    for name in dict.fromkeys(data.tag_names or []): # Use tag_names from the unified schema
-        tag = db.query(Tag).filter(Tag.name == name).first()
-        if not tag:
-            tag = Tag(name=name)
-            db.add(tag)
-            db.flush()
-        tag_objs.append(tag)
-    
-    # Profanity check
-    flagged, cats = moderate_content([data.title, data.content])
-    
     new_story = Story(
         user_id=str(current_user.id),
         title=data.title,
         header=data.header,
         content=data.content,
+        excerpt=_make_excerpt(data.content),
         cover_image_url=str(data.cover_image_url) if data.cover_image_url else None,
-        is_published=(data.is_published and not flagged),
-        is_flagged=flagged,
-        flag_source="ai" if flagged else "none",
         source=ContentSource.user,
-        status=StoryStatus.published if (data.is_published and not flagged) else StoryStatus.draft
     )
-    new_story.tags = tag_objs
     db.add(new_story)
     db.flush() # Flush to get the new_story.id
+    set_story_tags(db, new_story.id, data.tag_names or [])
+    bump_user_counter(db, current_user.id, "total_posts", +1)
+    _submit_for_moderation(db, new_story, reason="create", publish=data.is_published, hold_status=StoryStatus.draft)
 
-    if flagged:
-        automod_user = get_automod_user(db)
-        db.add(Flag(
-            flagged_by_user_id=automod_user.id,
-            story_id=str(new_story.id),
-            reason="; ".join(cats) or "Profanity detected by AI",
-            status="open",
-        ))
-
-        # db.add(flag)
-        
     db.commit()
+    invalidate_counts("stories")
     db.refresh(new_story)
     return new_story
 
@@ -90,22 +75,21 @@ def generate_story(db: Session, data: StoryGenerateIn, current_user: User) -> St
     )
     story_text, msg_id = _generate_story_text(prompt=full_prompt, model=data.model_name, temperature=data.temperature)
     title = data.title or _default_title_from(story_text)
-    flagged, cats = moderate_content([title, story_text])
 
     new_story = Story(
         user_id=str(current_user.id), title=title, header=data.summary, content=story_text,
+        excerpt=_make_excerpt(story_text),
         cover_image_url=str(data.cover_image_url) if data.cover_image_url else None,
-        is_published=(data.publish_now and not flagged),
-        is_flagged=flagged, flag_source="ai" if flagged else "none",
         source=ContentSource.ai, genre=data.genre, tone=data.tone,
         length_label=LengthLabel(data.length_label) if data.length_label else None,
         summary=data.summary, words_count=_count_words(story_text),
-        status=(StoryStatus.published if (data.publish_now and not flagged) else StoryStatus.generated),
         prompt=data.prompt, model_name=data.model_name, temperature=data.temperature,
         provider_message_id=msg_id, version=1
     )
     db.add(new_story)
     db.flush() 
+    bump_user_counter(db, current_user.id, "total_posts", +1)
+    _submit_for_moderation(db, new_story, reason="generate", publish=data.publish_now, hold_status=StoryStatus.generated)
 
     # Create the first revision record
     db.add(StoryRevision(
@@ -114,58 +98,112 @@ def generate_story(db: Session, data: StoryGenerateIn, current_user: User) -> St
     ))
 
     db.commit()
+    invalidate_counts("stories")
     db.refresh(new_story)
     return new_story
 
 # --- READING STORIES ---
-def get_all_stories(db: Session, limit: int, offset: int, tag: Optional[str], author_id: Optional[uuid.UUID], current_user: Optional[User]) -> Tuple[int, List[Story]]:
-    query = db.query(Story).filter(Story.deleted_at == None)
-    if not (current_user and current_user.role.name in ("moderator", "superadmin")):
+# Columns needed to render a StorySummaryOut card; everything else (notably `content`) stays deferred.
+SUMMARY_COLUMNS = (
+    Story.id, Story.user_id, Story.title, Story.header, Story.cover_image_url, Story.excerpt,
+    Story.is_published, Story.source, Story.words_count, Story.created_at, Story.updated_at,
+    Story.likes_count, Story.bookmarks_count, Story.comments_count, Story.views_count,
+)
+
+def story_read_query(db: Session, summary: bool = False) -> Query:
+    """
+    Base query for every story read path that serializes to StoryOut.
+    Author comes back in the same row (many-to-one join); tags are fetched for the whole
+    page in one extra IN query, so a page costs 2 queries regardless of its size.
+    With summary=True only SUMMARY_COLUMNS are selected, for StorySummaryOut.
+    """
+    if summary:
+        return db.query(Story).options(
+            load_only(*SUMMARY_COLUMNS),
+            joinedload(Story.user).load_only(User.id, User.username),
+            selectinload(Story.tags),
+        )
+    return db.query(Story).options(joinedload(Story.user), selectinload(Story.tags))
+
+def with_viewer_state(query: Query, current_user: Optional[User]) -> Query:
+    """
+    Add is_liked_by_user / is_bookmarked_by_user as correlated EXISTS columns, so the
+    viewer's state comes back in the same row as the story. Rows become
+    (Story, liked, bookmarked); pass them through apply_viewer_state().
+    """
+    if current_user is None:
+        return query.add_columns(
+            literal(False).label("is_liked_by_user"),
+            literal(False).label("is_bookmarked_by_user"),
+        )
+    liked = exists().where(Like.story_id == Story.id, Like.user_id == current_user.id)
+    bookmarked = exists().where(Bookmark.story_id == Story.id, Bookmark.user_id == current_user.id)
+    return query.add_columns(liked.label("is_liked_by_user"), bookmarked.label("is_bookmarked_by_user"))
+
+def apply_viewer_state(row) -> Story:
+    """Unpack a with_viewer_state() row onto the Story for StoryOut serialization."""
+    story, liked, bookmarked = row
+    story.is_liked_by_user = bool(liked)
+    story.is_bookmarked_by_user = bool(bookmarked)
+    return story
+
+def fill_viewer_state(db: Session, stories: List[Story], current_user: Optional[User]) -> List[Story]:
+    """
+    Batched viewer state for a page of stories: one `story_id IN (...)` query per table
+    instead of a lookup per card. Sets is_liked_by_user / is_bookmarked_by_user in place.
+    """
+    liked, bookmarked = set(), set()
+    ids = [s.id for s in stories]
+    if current_user is not None and ids:
+        liked = {sid for (sid,) in db.query(Like.story_id).filter(Like.user_id == current_user.id, Like.story_id.in_(ids))}
+        bookmarked = {sid for (sid,) in db.query(Bookmark.story_id).filter(Bookmark.user_id == current_user.id, Bookmark.story_id.in_(ids))}
+    for s in stories:
+        s.is_liked_by_user = s.id in liked
+        s.is_bookmarked_by_user = s.id in bookmarked
+    return stories
+
+def get_all_stories(db: Session, limit: int, offset: int, tag: Optional[str], author_id: Optional[uuid.UUID], current_user: Optional[User], cursor: Optional[str] = None, total_mode: TotalMode = "exact", summary: bool = False) -> Tuple[Optional[int], List[Story]]:
+    query = story_read_query(db, summary).filter(Story.deleted_at == None)
+    is_staff = bool(current_user and current_user.role.name in ("moderator", "superadmin"))
+    if not is_staff:
         query = query.filter(Story.is_published == True)
     if author_id:
         query = query.filter(Story.user_id == author_id)
     if tag:
         query = query.join(Story.tags).filter(Tag.name == tag)
         
-    total = query.count()
-    items = query.order_by(Story.created_at.desc()).offset(offset).limit(limit).all()
+    key = count_key("stories", scope="feed", visibility="staff" if is_staff else "public", tag=tag, author_id=author_id)
+    total = cached_total(query, key, total_mode)
+    items = _paginate_stories(query, limit, offset, cursor).all()
+    fill_viewer_state(db, items, current_user)
     return total, items
 
-def get_user_stories(db: Session, user: User, limit: int, offset: int) -> Tuple[int, List[Story]]:
-    query = db.query(Story).filter(Story.user_id == user.id, Story.deleted_at == None)
-    total = query.count()
-    items = query.order_by(Story.created_at.desc()).offset(offset).limit(limit).all()
+def get_user_stories(db: Session, user: User, limit: int, offset: int, cursor: Optional[str] = None, total_mode: TotalMode = "exact", summary: bool = False) -> Tuple[Optional[int], List[Story]]:
+    query = story_read_query(db, summary).filter(Story.user_id == user.id, Story.deleted_at == None)
+    total = cached_total(query, count_key("stories", scope="author", author_id=user.id), total_mode)
+    items = _paginate_stories(query, limit, offset, cursor).all()
+    fill_viewer_state(db, items, user)
     return total, items
 
 def get_story_details(db: Session, story_id: uuid.UUID, current_user: Optional[User], request: Request) -> Story:
-    story = db.query(Story).options(joinedload(Story.tags)).filter(Story.id == story_id, Story.deleted_at == None).first()
-    if not story:
+    row = (
+        with_viewer_state(story_read_query(db), current_user)
+        .filter(Story.id == story_id, Story.deleted_at == None)
+        .first()
+    )
+    if not row:
         raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Story not found")
+    story = apply_viewer_state(row)
     
     if not story.is_published and not (current_user and (story.user_id == current_user.id or current_user.role.name in ("moderator", "superadmin"))):
         raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Story not found")
     
-    if current_user:
-        story.is_liked_by_user = db.query(Like).filter_by(user_id=current_user.id, story_id=story.id).first() is not None
-        story.is_bookmarked_by_user = db.query(Bookmark).filter_by(user_id=current_user.id, story_id=story.id).first() is not None
-    else:
-        story.is_liked_by_user = False
-        story.is_bookmarked_by_user = False
-    # Log the view
-    db.add(ViewHistory(
-        story_id=story.id, user_id=current_user.id if current_user else None,
-        ip_address=request.client.host, user_agent=request.headers.get("user-agent")
-    ))
-    db.commit()
+    # Log the view (buffered; written in batches off the request path)
+    view_buffer.record(
+        story.id, current_user.id if current_user else None,
+        request.client.host, request.headers.get("user-agent"),
+    )
 
-    # Dynamically set like/bookmark status for the response schema
-    if current_user:
-        story.is_liked_by_user = db.query(Like).filter_by(user_id=current_user.id, story_id=story.id).first() is not None
-        story.is_bookmarked_by_user = db.query(Bookmark).filter_by(user_id=current_user.id, story_id=story.id).first() is not None
-    else:
-        story.is_liked_by_user = False
-        story.is_bookmarked_by_user = False
-        
     return StoryOut(
         id=str(story.id),
         title=story.title,
@@ -181,6 +219,11 @@ def get_story_details(db: Session, story_id: uuid.UUID, current_user: Optional[U
         # Explicitly build the nested UserSummary, converting its ID.
         is_liked_by_user=bool(getattr(story, "is_liked_by_user", False)),
         is_bookmarked_by_user=bool(getattr(story, "is_bookmarked_by_user", False)),
+        likes_count=story.likes_count,
+        bookmarks_count=story.bookmarks_count,
+        comments_count=story.comments_count,
+        views_count=story.views_count,
+        flags_count=story.flags_count,
         user=UserSummary(
             id=str(story.user.id),
             username=story.user.username
@@ -194,28 +237,38 @@ def update_story(db: Session, story_id: uuid.UUID, data: StoryUpdate, current_us
     _ensure_authorization(story, current_user)
 
     update_data = data.model_dump(exclude_unset=True)
+    tag_names = update_data.pop("tag_names", None)
+    if update_data.get("is_published") and not story.is_published:
+        # Same gates as publish_story: a PATCH must not release what moderation holds.
+        if story.is_flagged:
+            raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="Story is flagged and cannot be published.")
+        if story.status == StoryStatus.pending_review:
+            raise HTTPException(status.HTTP_409_CONFLICT, detail="Story is awaiting moderation.")
     for field, value in update_data.items():
         setattr(story, field, value)
-
-    if any(f in ("title", "content") for f in update_data):
-        flagged, cats = moderate_content([story.title, story.content])
-        if flagged:
-            story.is_flagged = True
-            story.flag_source = "ai"
-            story.is_published = False
-
-            # ✅ FIX: assign automod user ID instead of None
-            automod_user = get_automod_user(db)
-            db.add(Flag(
-                flagged_by_user_id=automod_user.id,
-                story_id=story.id,
-                reason="; ".join(cats) or "Profanity detected on update",
-                status="open"
-            ))
-
+    if tag_names is not None:
+        set_story_tags(db, story.id, tag_names, replace=True)
+        db.expire(story, ["tags"])
+    if "content" in update_data:
+        story.excerpt = _make_excerpt(story.content)
+
+    text_changed = any(f in ("title", "content") for f in update_data) and (
+        field_hash(story.title) != story.title_hash or field_hash(story.content) != story.content_hash
+    )
+    if text_changed:
+        # Re-scan before the new text goes (back) live; unpublished stories keep their status.
+        publish, hold = bool(story.is_published), story.status
+        if story.status == StoryStatus.pending_review:
+            queued = moderation_queue.pending_job(db, story.id)
+            publish = bool(queued and queued.publish)
+            hold = StoryStatus(queued.hold_status) if queued else _hold_status_for(story)
+        elif publish:
+            hold = _hold_status_for(story)
+        _submit_for_moderation(db, story, reason="update", publish=publish, hold_status=hold)
 
     story.updated_at = datetime.utcnow()
     db.commit()
+    invalidate_counts("stories")
     db.refresh(story)
     return story
 
@@ -225,8 +278,21 @@ def delete_story(db: Session, story_id: uuid.UUID, current_user: User) -> None:
         raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Story not found")
     _ensure_authorization(story, current_user)
     
-    story.deleted_at = datetime.utcnow()
+    # Soft-delete and read likes_count in one UPDATE: it takes the story row lock, so a
+    # like committing concurrently is either waited for and included, or lands after.
+    deleted = db.execute(
+        update(Story)
+        .where(Story.id == story.id, Story.deleted_at.is_(None))
+        .values(deleted_at=datetime.utcnow())
+        .returning(Story.user_id, Story.likes_count)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if deleted:
+        bump_user_counter(db, deleted.user_id, "total_posts", -1)
+        if deleted.likes_count:
+            bump_user_counter(db, deleted.user_id, "total_likes", -deleted.likes_count)
     db.commit()
+    invalidate_counts("stories")
     return {"message": "Story deleted successfully"}
 
 # --- AI-SPECIFIC MODIFICATIONS ---
@@ -238,22 +304,22 @@ def regenerate_with_feedback(db: Session, story_id: uuid.UUID, feedback: str, cu
 
     regen_prompt = _build_regen_prompt(base_prompt=story.prompt or "", feedback=feedback)
     new_text, msg_id = _generate_story_text(prompt=regen_prompt, model=story.model_name, temperature=story.temperature)
-    flagged, cats = moderate_content([story.title, new_text])
 
     story.version += 1
     story.content = new_text
     story.words_count = _count_words(new_text)
+    story.excerpt = _make_excerpt(new_text)
     story.updated_at = datetime.utcnow()
     story.last_feedback = feedback
-    story.is_flagged = flagged
-    story.is_published = False
-    story.status = StoryStatus.generated
+    story.is_flagged = False  # verdict on the old text no longer applies
+    _submit_for_moderation(db, story, reason="regenerate", publish=False, hold_status=StoryStatus.generated)
 
     db.add(StoryRevision(
         stories_id=story.id, version=story.version, content=new_text, prompt=regen_prompt,
         feedback=feedback, model_name=story.model_name, provider_message_id=msg_id, user_id=current_user.id
     ))
     db.commit()
+    invalidate_counts("stories")
     db.refresh(story)
     return story
 
@@ -264,11 +330,14 @@ def publish_story(db: Session, story_id: uuid.UUID, current_user: User) -> Story
     _ensure_authorization(story, current_user)
     if story.is_flagged:
         raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="Story is flagged and cannot be published.")
+    if story.status == StoryStatus.pending_review:
+        raise HTTPException(status.HTTP_409_CONFLICT, detail="Story is awaiting moderation.")
 
     story.is_published = True
     story.status = StoryStatus.published
     story.updated_at = datetime.utcnow()
     db.commit()
+    invalidate_counts("stories")
     db.refresh(story)
     return story
 
@@ -282,10 +351,98 @@ def unpublish_story(db: Session, story_id: uuid.UUID, current_user: User) -> Sto
     story.status = StoryStatus.generated
     story.updated_at = datetime.utcnow()
     db.commit()
+    invalidate_counts("stories")
     db.refresh(story)
     return story
 
+# --- MODERATION ---
+_FLAG_REASONS = {
+    "create": "Profanity detected by AI",
+    "generate": "Profanity detected by AI",
+    "update": "Profanity detected on update",
+    "regenerate": "Profanity detected on regeneration",
+}
+
+def _hold_status_for(story: Story) -> StoryStatus:
+    return StoryStatus.generated if story.source == ContentSource.ai else StoryStatus.draft
+
+def _submit_for_moderation(db: Session, story: Story, *, reason: str, publish: bool, hold_status: StoryStatus) -> None:
+    """
+    Hold `story` as pending review and queue its scan. With MODERATION_ASYNC off the
+    scan runs right here, in the caller's transaction.
+    """
+    story.is_published = False
+    story.status = StoryStatus.pending_review
+    story.title_hash = field_hash(story.title)
+    story.content_hash = field_hash(story.content)
+    if settings.MODERATION_ASYNC:
+        moderation_queue.enqueue(db, story.id, reason=reason, publish=publish, hold_status=hold_status.value)
+    else:
+        apply_moderation(db, story.id, publish=publish, hold_status=hold_status.value, reason=reason)
+
+def apply_moderation(db: Session, story_id: uuid.UUID, *, publish: bool, hold_status: str, reason: str) -> Optional[Story]:
+    """
+    Scan a held story and move it out of pending review: flagged -> automod Flag and
+    `hold_status`; clean -> published if `publish`, else `hold_status`. Does not commit.
+    Returns None (no-op) if the story is gone or no longer pending.
+    The row lock serialises the scan with concurrent edits, so it always sees the latest text.
+    """
+    story = db.query(Story).filter(Story.id == story_id).with_for_update().first()
+    if story is None or story.deleted_at is not None or story.status != StoryStatus.pending_review:
+        return None
+
+    # Only title/paragraphs without a stored verdict reach the scanner.
+    flagged, cats = moderate_incremental(db, [story.title, story.content], moderate_each)
+    if flagged:
+        story.is_flagged = True
+        story.flag_source = "ai"
+        story.is_published = False
+        story.status = StoryStatus(hold_status)
+        db.add(Flag(
+            flagged_by_user_id=get_automod_user_id(db),
+            story_id=story.id,
+            reason="; ".join(cats) or _FLAG_REASONS.get(reason, "Profanity detected by AI"),
+            status="open",
+        ))
+        bump_story_counter(db, story.id, "flags_count", +1)
+    else:
+        story.is_published = publish
+        story.status = StoryStatus.published if publish else StoryStatus(hold_status)
+    return story
+
+def hold_for_manual_review(db: Session, story_id: uuid.UUID, *, hold_status: str) -> Optional[Story]:
+    """
+    Give up on automatic moderation: flag a story still pending review for a human
+    (it shows in the moderation queue) and move it to `hold_status`, unpublished.
+    Does not commit. Returns None (no-op) if the story is gone or no longer pending.
+    """
+    story = db.query(Story).filter(Story.id == story_id).with_for_update().first()
+    if story is None or story.deleted_at is not None or story.status != StoryStatus.pending_review:
+        return None
+    story.is_flagged = True
+    story.flag_source = "ai"
+    story.is_published = False
+    story.status = StoryStatus(hold_status)
+    db.add(Flag(
+        flagged_by_user_id=get_automod_user_id(db),
+        story_id=story.id,
+        reason="Automatic moderation failed; needs manual review",
+        status="open",
+    ))
+    bump_story_counter(db, story.id, "flags_count", +1)
+    return story
+
 # --- HELPER FUNCTIONS ---
+def _paginate_stories(query: Query, limit: int, offset: int, cursor: Optional[str]) -> Query:
+    """
+    Newest-first page of stories. With a cursor, seek past (created_at, id) using the
+    keyset indexes on `stories`; otherwise fall back to offset paging.
+    """
+    query = query.order_by(Story.created_at.desc(), Story.id.desc())
+    if cursor:
+        return keyset_after(query, (Story.created_at, Story.id), cursor).limit(limit)
+    return query.offset(offset).limit(limit)
+
 def _ensure_authorization(post: Story, user: User):
     if (post.user_id != user.id) and (user.role.name not in ("moderator", "superadmin")):
         raise HTTPException(status.HTTP_403_FORBIDDEN, detail="Not authorized for this post")
@@ -345,3 +502,14 @@ def _default_title_from(story_text: str, fallback: str = "Untitled Story") -> st
 
 def _count_words(text: str) -> int:
     return len((text or "").split())
+
+EXCERPT_LENGTH = 280
+_TAG_RE = re.compile(r"<[^>]+>")
+
+def _make_excerpt(content: str, length: int = EXCERPT_LENGTH) -> str:
+    """Plain-text preview of the story body, cut on a word boundary."""
+    text = " ".join(_TAG_RE.sub(" ", content or "").split())
+    if len(text) <= length:
+        return text
+    cut = text[:length].rsplit(" ", 1)[0] or text[:length]
+    return cut.rstrip(" ,.;:") + "…"
@@ -1,4 +1,8 @@
 # app/services/system.py
+import uuid
+from typing import Optional
+
+from sqlalchemy import event, select
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from app.models.user import User
@@ -44,3 +48,58 @@ def get_automod_user(db: Session) -> User:
         if not user:
             raise
     return user
+
+
+# Process-wide id of the automod user; it never changes once created.
+_automod_user_id: Optional[uuid.UUID] = None
+_PENDING_KEY = "automod_user_id_pending"
+_HOOKED_KEY = "automod_user_id_hooked"
+
+
+def get_automod_user_id(db: Session, create: bool = True) -> Optional[uuid.UUID]:
+    """
+    Id of the automod user, resolved once per process. Only ids of committed rows are
+    cached: if the user is created here, the id is remembered when this session commits
+    and forgotten if it rolls back. With `create=False` a missing user returns None.
+    """
+    global _automod_user_id
+    if _automod_user_id is not None:
+        return _automod_user_id
+    if _PENDING_KEY in db.info:
+        return db.info[_PENDING_KEY]
+
+    found = db.execute(select(User.id).where(User.username == "automod")).scalar()
+    if found is not None:
+        _automod_user_id = found
+        return found
+    if not create:
+        return None
+
+    user_id = get_automod_user(db).id
+    _cache_on_commit(db, user_id)
+    return user_id
+
+
+def _cache_on_commit(db: Session, user_id: uuid.UUID) -> None:
+    """Promote the pending id on commit, drop it on rollback (one pair of listeners per session)."""
+    db.info[_PENDING_KEY] = user_id
+    if db.info.get(_HOOKED_KEY):
+        return
+    db.info[_HOOKED_KEY] = True
+
+    @event.listens_for(db, "after_commit")
+    def _committed(session):
+        global _automod_user_id
+        pending = session.info.pop(_PENDING_KEY, None)
+        if pending is not None:
+            _automod_user_id = pending
+
+    @event.listens_for(db, "after_soft_rollback")
+    def _rolled_back(session, previous_transaction):
+        if not previous_transaction.nested:
+            session.info.pop(_PENDING_KEY, None)
+
+
+def reset_automod_cache() -> None:
+    global _automod_user_id
+    _automod_user_id = None
@@ -1,10 +1,150 @@
 # app/services/tags.py
 
+import threading
+from typing import Dict, Iterable, List, Tuple
 from uuid import UUID
+
+from cachetools import TTLCache
+from sqlalchemy import delete, event, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 
-from app.models.tags import Tag
+from app.core.config import settings
+from app.models.tags import Tag, story_tags
+
+# Warm name -> id map used when attaching tags to stories. Only ids of committed rows
+# go in: a session's ids wait in `db.info` until it commits. Local mutations below
+# invalidate it; a tag deleted by another worker is caught by the FK on `story_tags`
+# and re-resolved (see `set_story_tags`).
+_tag_ids: TTLCache = TTLCache(maxsize=settings.TAG_CACHE_MAXSIZE, ttl=settings.TAG_CACHE_TTL)
+_lock = threading.Lock()
+_PENDING_KEY = "tag_ids_pending"
+_HOOKED_KEY = "tag_ids_hooked"
+_FK_VIOLATION = "23503"
+
+
+def invalidate_tag_cache() -> None:
+    with _lock:
+        _tag_ids.clear()
+
+
+def resolve_tag_ids(db: Session, names: Iterable[str]) -> List[UUID]:
+    """
+    Map tag names to ids, creating the missing tags. Order follows the first
+    occurrence of each name. Cache hits cost nothing; misses are resolved with one
+    `WHERE name IN (...)` and the rest created by one `INSERT ... ON CONFLICT (name)
+    DO NOTHING RETURNING`. Runs in the caller's transaction; resolved ids are cached
+    once it commits.
+    """
+    return _resolve(db, names)[0]
+
+
+def _resolve(db: Session, names: Iterable[str], use_cache: bool = True) -> Tuple[List[UUID], bool]:
+    """`resolve_tag_ids`, plus whether any id came from the process-wide cache."""
+    wanted = list(dict.fromkeys(names))
+    if not wanted:
+        return [], False
+
+    # ids this session resolved but has not committed yet are valid inside it
+    pending: Dict[str, UUID] = db.info.get(_PENDING_KEY, {})
+    found: Dict[str, UUID] = {n: pending[n] for n in wanted if n in pending}
+    cached: Dict[str, UUID] = {}
+    if use_cache:
+        with _lock:
+            for name in wanted:
+                tag_id = _tag_ids.get(name)
+                if tag_id is not None and name not in found:
+                    cached[name] = tag_id
+        found.update(cached)
+
+    missing = [n for n in wanted if n not in found]
+    if missing:
+        found.update(db.execute(select(Tag.name, Tag.id).where(Tag.name.in_(missing))).all())
+        missing = [n for n in wanted if n not in found]
+    if missing:
+        inserted = db.execute(
+            pg_insert(Tag)
+            .values([{"name": n} for n in missing])
+            .on_conflict_do_nothing(index_elements=[Tag.name])
+            .returning(Tag.name, Tag.id)
+        ).all()
+        found.update(inserted)
+        if len(inserted) < len(missing):
+            # Lost a race to a concurrent insert of the same name; those rows exist now.
+            raced = [n for n in missing if n not in found]
+            found.update(db.execute(select(Tag.name, Tag.id).where(Tag.name.in_(raced))).all())
+
+    _cache_after_commit(db, {n: i for n, i in found.items() if n not in cached})
+    return [found[n] for n in wanted], bool(cached)
+
+
+def _cache_after_commit(db: Session, found: Dict[str, UUID]) -> None:
+    """Hold `found` on the session; move it into `_tag_ids` on commit, drop it on rollback."""
+    if not db.info.get(_HOOKED_KEY):
+        db.info[_HOOKED_KEY] = True
+
+        @event.listens_for(db, "after_commit")
+        def _committed(session):
+            resolved = session.info.pop(_PENDING_KEY, None)
+            if resolved:
+                with _lock:
+                    _tag_ids.update(resolved)
+
+        @event.listens_for(db, "after_soft_rollback")
+        def _rolled_back(session, previous_transaction):
+            if not previous_transaction.nested:
+                session.info.pop(_PENDING_KEY, None)
+
+    db.info.setdefault(_PENDING_KEY, {}).update(found)
+
+
+def _forget(names: Iterable[str]) -> None:
+    with _lock:
+        for name in names:
+            _tag_ids.pop(name, None)
+
+
+def set_story_tags(db: Session, story_id: UUID, names: Iterable[str], replace: bool = False) -> None:
+    """
+    Attach the named tags to a story by writing `story_tags` rows directly (one
+    multi-row insert). With `replace=True` links to tags not in `names` are removed.
+    Expire `story.tags` afterwards if the instance is already loaded.
+
+    When cached ids were used, the insert runs in a savepoint: if one of them points
+    at a tag deleted by another worker, the FK violation drops those cache entries
+    and the names are resolved again from the database.
+    """
+    names = list(dict.fromkeys(names))
+    tag_ids, from_cache = _resolve(db, names)
+    if replace:
+        stmt = delete(story_tags).where(story_tags.c.stories_id == story_id)
+        if tag_ids:
+            stmt = stmt.where(story_tags.c.tag_id.not_in(tag_ids))
+        db.execute(stmt)
+    if not tag_ids:
+        return
+    if from_cache:
+        try:
+            with db.begin_nested():
+                _link(db, story_id, tag_ids)
+            return
+        except IntegrityError as e:
+            if getattr(e.orig, "pgcode", None) != _FK_VIOLATION:
+                raise
+            _forget(names)
+            tag_ids, _ = _resolve(db, names, use_cache=False)
+    _link(db, story_id, tag_ids)
+
+
+def _link(db: Session, story_id: UUID, tag_ids: List[UUID]) -> None:
+    db.execute(
+        pg_insert(story_tags)
+        .values([{"stories_id": story_id, "tag_id": t} for t in tag_ids])
+        .on_conflict_do_nothing()
+    )
+
 
 def list_tags(db: Session) -> list[Tag]:
     return db.query(Tag).order_by(Tag.name.asc()).all()
@@ -19,6 +159,7 @@ def create_tag(db: Session, name: str, description: str | None) -> Tag:
     tag = Tag(name=name, description=description)
     db.add(tag)
     db.commit()
+    invalidate_tag_cache()
     db.refresh(tag)
     return tag
 
@@ -45,6 +186,7 @@ def update_tag(
         tag.description = description
 
     db.commit()
+    invalidate_tag_cache()
     db.refresh(tag)
     return tag
 
@@ -54,3 +196,4 @@ def delete_tag(db: Session, tag_id: UUID) -> None:
         raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Tag not found")
     db.delete(tag)
     db.commit()
+    invalidate_tag_cache()
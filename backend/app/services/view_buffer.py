@@ -0,0 +1,161 @@
+# app/services/view_buffer.py
+import logging
+import threading
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from cachetools import TTLCache
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.view_history import ViewHistory
+from app.services.counters import bump_story_views
+
+logger = logging.getLogger("app")
+
+
+class ViewBuffer:
+    """
+    Write-behind buffer for ViewHistory rows.
+
+    Story detail reads call `record()` (in-memory append, no DB work). A background
+    thread flushes the pending rows as one multi-row INSERT every `flush_interval`
+    seconds, or sooner once `max_size` rows are waiting. `stop()` drains the buffer.
+
+    When `dedup_window` > 0, repeated views of the same story by the same viewer
+    (user id, or IP for anonymous readers) inside the window are dropped.
+
+    A failed flush puts its rows back (they are already marked as seen, so they would
+    otherwise be lost); the queue is capped at `10 * max_size` so a persistent
+    failure cannot grow it without bound.
+    """
+
+    def __init__(self, max_size: int, flush_interval: float, dedup_window: int):
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self._pending: List[Dict] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._seen: Optional[TTLCache] = (
+            TTLCache(maxsize=100_000, ttl=dedup_window) if dedup_window > 0 else None
+        )
+
+    def record(
+        self,
+        story_id: uuid.UUID,
+        user_id: Optional[uuid.UUID],
+        ip_address: Optional[str],
+        user_agent: Optional[str],
+    ) -> bool:
+        """Queue a view. Returns False if it was dropped as a duplicate."""
+        viewer = f"u:{user_id}" if user_id else f"ip:{ip_address}"
+        with self._lock:
+            if self._seen is not None:
+                key = (viewer, str(story_id))
+                if key in self._seen:
+                    return False
+                self._seen[key] = True
+            self._pending.append({
+                "id": uuid.uuid4(),
+                "story_id": story_id,
+                "user_id": user_id,
+                "ip_address": ip_address,
+                "user_agent": user_agent,
+                "viewed_at": datetime.utcnow(),
+            })
+            full = len(self._pending) >= self.max_size
+        if full:
+            self._wake.set()
+        return True
+
+    def flush(self, db: Optional[Session] = None) -> int:
+        """
+        Write all pending views in one INSERT. Uses `db` if given (caller owns the
+        transaction), otherwise a short-lived session that commits. Returns rows written.
+        """
+        with self._lock:
+            rows, self._pending = self._pending, []
+        if not rows:
+            return 0
+
+        if db is not None:
+            try:
+                self._write(db, rows)
+                db.flush()
+            except Exception:
+                self._requeue(rows)
+                raise
+            return len(rows)
+
+        session = SessionLocal()
+        try:
+            self._write(session, rows)
+            session.commit()
+        except Exception:
+            session.rollback()
+            logger.exception("Failed to flush %d buffered story views; re-queued", len(rows))
+            self._requeue(rows)
+            return 0
+        finally:
+            session.close()
+        return len(rows)
+
+    def _requeue(self, rows: List[Dict]) -> None:
+        limit = self.max_size * 10
+        with self._lock:
+            pending = rows + self._pending
+            if len(pending) > limit:
+                logger.warning("View buffer over capacity; dropping %d oldest views", len(pending) - limit)
+                pending = pending[-limit:]
+            self._pending = pending
+
+    @staticmethod
+    def _write(db: Session, rows: List[Dict]) -> None:
+        db.execute(insert(ViewHistory), rows)
+        bump_story_views(db, Counter(r["story_id"] for r in rows))
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pending = []
+            if self._seen is not None:
+                self._seen.clear()
+
+    # --- background flusher ---
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="view-buffer-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=self.flush_interval + 5)
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+
+view_buffer = ViewBuffer(
+    max_size=settings.VIEW_BUFFER_MAX_SIZE,
+    flush_interval=settings.VIEW_BUFFER_FLUSH_SECONDS,
+    dedup_window=settings.VIEW_DEDUP_WINDOW_SECONDS,
+)
@@ -0,0 +1,80 @@
+import json
+import threading
+from typing import Literal, Optional, Tuple
+
+from cachetools import TTLCache
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Query
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.core.config import settings
+
+TotalMode = Literal["exact", "estimate", "none"]
+
+# In-memory store: (namespace, normalized filters) → row count.
+# Writes in this process invalidate eagerly; the TTL bounds staleness for writes made by other workers.
+_counts: TTLCache = TTLCache(maxsize=settings.COUNT_CACHE_MAXSIZE, ttl=settings.COUNT_CACHE_TTL)
+_lock = threading.Lock()
+
+
+class _Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(_Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def count_key(namespace: str, **filters) -> Tuple:
+    """
+    Normalize a filter set into a hashable cache key. None-valued filters are dropped
+    so that `tag=None` and an omitted tag share one entry.
+    """
+    return (namespace, tuple(sorted((k, str(v)) for k, v in filters.items() if v is not None)))
+
+
+def cached_total(query: Query, key: Tuple, mode: TotalMode = "exact") -> Optional[int]:
+    """
+    Total rows matched by `query`.
+    - exact:    COUNT(*) on miss, then served from the cache until invalidated or expired
+    - estimate: cached exact value if present, otherwise the planner's row estimate (no scan)
+    - none:     skip counting entirely, returns None
+    """
+    if mode == "none":
+        return None
+
+    with _lock:
+        hit = _counts.get(key)
+    if hit is not None:
+        return hit
+
+    if mode == "estimate":
+        return _planner_estimate(query)
+
+    total = query.count()
+    with _lock:
+        _counts[key] = total
+    return total
+
+
+def invalidate_counts(namespace: str) -> None:
+    """Drop every cached total under `namespace` (call after writes that change membership)."""
+    with _lock:
+        for key in [k for k in list(_counts.keys()) if k[0] == namespace]:
+            _counts.pop(key, None)
+
+
+def clear_counts() -> None:
+    with _lock:
+        _counts.clear()
+
+
+def _planner_estimate(query: Query) -> int:
+    plan = query.session.execute(_Explain(query.order_by(None).statement)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
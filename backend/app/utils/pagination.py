@@ -0,0 +1,53 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+
+def encode_cursor(created_at: datetime, row_id: uuid.UUID) -> str:
+    """
+    Build an opaque keyset cursor from the (created_at, id) pair of the last row on a page.
+    """
+    raw = json.dumps({"c": created_at.isoformat(), "i": str(row_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """
+    Inverse of encode_cursor. Raises 400 if the cursor was tampered with or is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        return datetime.fromisoformat(data["c"]), uuid.UUID(data["i"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def keyset_after(query: Query, cols: Sequence, cursor: Optional[str], descending: bool = True) -> Query:
+    """
+    Seek `query` past the row a cursor points at. `cols` is the (timestamp, id) pair the
+    query is ordered by: rows strictly after the cursor in that order are kept, i.e.
+    older ones when `descending`. No cursor leaves the query as is. The caller orders it.
+    """
+    if not cursor:
+        return query
+    key = tuple_(*cols)
+    after = tuple_(*decode_cursor(cursor))
+    return query.filter(key < after if descending else key > after)
+
+
+def next_cursor_for(items: Sequence, limit: int) -> Optional[str]:
+    """
+    Cursor pointing after the last item, or None when the page was not full (no more rows).
+    Items must expose `created_at` and `id`.
+    """
+    if not items or len(items) < limit:
+        return None
+    last = items[-1]
+    return encode_cursor(last.created_at, last.id)
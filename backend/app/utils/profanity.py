@@ -0,0 +1,163 @@
+"""
+Compiled profanity matcher.
+
+Builds a character trie from the better_profanity word list once, then scans text
+in a single pass: tokens are cut by one C-level regex, and each token is walked
+through the trie. Leetspeak is handled while walking (a text character may stand for
+several letters, e.g. "1" -> i/l), so variants never have to be expanded up front.
+
+Matching follows better_profanity's rules, so `contains` agrees with
+`profanity.contains_profanity`:
+  - words are runs of its allowed characters; anything else separates them, and
+    matching is whole-word ("class" does not match "ass");
+  - a run of up to `max_phrase_words` consecutive words matches an entry either
+    with the text's own separators ("2 girls 1 cup", not "2 girls, 1 cup") or glued
+    together ("he be" -> "hebe", "s h i t" -> "shit").
+Deliberate differences: better_profanity ignores a one-character word at the very
+end of the text (so it misses "f.u.c.k" but catches "f.u.c.k!"); this matcher does
+not. And `scan` reports the longest match at a position, where better_profanity
+censors the shortest.
+"""
+import hashlib
+import re
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence
+
+from better_profanity.constants import ALLOWED_CHARACTERS
+from better_profanity.utils import get_complete_path_of_file, read_wordlist
+
+# Bump when matching semantics change: it is part of the fingerprint, so verdicts
+# cached under the old rules are not reused.
+MATCHER_VERSION = "2"
+
+# Same substitutions better_profanity applies (letter -> characters that may stand for it),
+# inverted below into text character -> letters it may stand for.
+LEET_MAP: Mapping[str, Sequence[str]] = {
+    "a": ("@", "*", "4"),
+    "i": ("*", "l", "1"),
+    "o": ("*", "0", "@"),
+    "u": ("*", "v"),
+    "v": ("*", "u"),
+    "l": ("1",),
+    "e": ("*", "3"),
+    "s": ("$", "5"),
+    "t": ("7",),
+}
+
+_TOKEN_RE = re.compile("[%s]+" % "".join(re.escape(c) for c in sorted(ALLOWED_CHARACTERS)))
+# Joins fields for the single pass; phrases never match across it.
+FIELD_SEPARATOR = "\x1f"
+
+_END = ""      # trie key holding (word, category) at a terminal node
+
+
+@dataclass(frozen=True)
+class ProfanityMatch:
+    word: str        # word-list entry that matched
+    category: str
+    field: int       # index of the input text the match was found in
+    start: int       # offsets within that text
+    end: int
+
+
+class ProfanityMatcher:
+    def __init__(self, words_by_category: Mapping[str, Iterable[str]]):
+        self._root: Dict = {}
+        self._variants: Dict[str, tuple] = {}
+        # Most words one match may span: better_profanity looks as many words ahead
+        # as the entry with the most separator characters has (at least one).
+        self.max_phrase_words = 2
+        for letter, subs in LEET_MAP.items():
+            for ch in (letter, *subs):
+                self._variants[ch] = tuple(sorted({*self._variants.get(ch, (ch,)), letter}))
+        entries = sorted(
+            (category, word.strip().lower())
+            for category, words in words_by_category.items()
+            for word in words
+        )
+        for category, word in entries:
+            self._add(word, category)
+        # Identifies the rule set; cached verdicts are only valid for the same fingerprint.
+        self.fingerprint = hashlib.sha256(
+            "\n".join([MATCHER_VERSION] + [f"{c}\t{w}" for c, w in entries]).encode("utf-8")
+        ).hexdigest()[:16]
+
+    def _add(self, word: str, category: str) -> None:
+        if not word:
+            return
+        separators = sum(1 for ch in word if ch not in ALLOWED_CHARACTERS)
+        self.max_phrase_words = max(self.max_phrase_words, separators + 1)
+        node = self._root
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node.setdefault(_END, (word, category))
+
+    def _walk(self, nodes: List[Dict], token: str) -> List[Dict]:
+        for ch in token:
+            nxt = []
+            for node in nodes:
+                for letter in self._variants.get(ch, (ch,)):
+                    child = node.get(letter)
+                    if child is not None:
+                        nxt.append(child)
+            if not nxt:
+                return nxt
+            nodes = nxt
+        return nodes
+
+    @staticmethod
+    def _walk_separators(nodes: List[Dict], gap: str) -> List[Dict]:
+        for ch in gap:
+            nodes = [node[ch] for node in nodes if ch in node]
+            if not nodes:
+                break
+        return nodes
+
+    def scan(self, texts: Sequence[Optional[str]]) -> List[ProfanityMatch]:
+        """Every whole-word match across `texts`, in text order, longest match first."""
+        joined = FIELD_SEPARATOR.join(t or "" for t in texts)
+        starts, pos = [], 0
+        for t in texts:
+            starts.append(pos)
+            pos += len(t or "") + 1
+
+        tokens = [(m.start(), m.end(), m.group().lower()) for m in _TOKEN_RE.finditer(joined)]
+        matches: List[ProfanityMatch] = []
+        i = 0
+        while i < len(tokens):
+            best = None
+            # Two ways to read the same words: with the text's separators, and glued.
+            spaced = glued = self._walk([self._root], tokens[i][2])
+            j = i
+            while spaced or glued:
+                hit = next((n[_END] for n in spaced + glued if _END in n), None)
+                if hit is not None:
+                    best = (j, hit)
+                j += 1
+                if j >= len(tokens) or j - i >= self.max_phrase_words:
+                    break
+                gap = joined[tokens[j - 1][1]:tokens[j][0]]
+                if FIELD_SEPARATOR in gap:
+                    break
+                spaced = self._walk(self._walk_separators(spaced, gap), tokens[j][2]) if spaced else spaced
+                glued = self._walk(glued, tokens[j][2]) if glued else glued
+
+            if best is None:
+                i += 1
+                continue
+            last, (word, category) = best
+            start, end = tokens[i][0], tokens[last][1]
+            field = bisect_right(starts, start) - 1
+            matches.append(ProfanityMatch(word, category, field, start - starts[field], end - starts[field]))
+            i = last + 1
+        return matches
+
+    def contains(self, texts: Sequence[Optional[str]]) -> bool:
+        return bool(self.scan(texts))
+
+
+def load_default_matcher() -> ProfanityMatcher:
+    """Matcher over better_profanity's bundled word list, all under the "profanity" category."""
+    words = read_wordlist(get_complete_path_of_file("profanity_wordlist.txt"))
+    return ProfanityMatcher({"profanity": words})
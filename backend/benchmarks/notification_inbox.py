@@ -0,0 +1,127 @@
+"""
+Inbox page latency, offset vs. keyset paging, with a large notifications table.
+
+    python -m benchmarks.notification_inbox [--rows 1000000] [--depths 0 50 500 5000] [--repeat 5]
+
+Seeds `--rows` notifications into the configured database (DATABASE_URL) for
+`--users` throwaway users, a quarter of them for one "heavy" user so its inbox is
+deep, then times `list_my_notifications` for that user at increasing page depths:
+offset paging with an exact total (the old behaviour) against cursor paging with
+`total_mode="none"`. Keyset pages should stay flat as depth grows; offset pages
+grow with it. The seeded rows are deleted afterwards unless `--keep` is given.
+"""
+import argparse
+import time
+import uuid
+
+from sqlalchemy import text
+
+from app.core.database import SessionLocal
+from app.services.counters import reconcile_unread_notifications
+from app.services.notifications import list_my_notifications
+from app.utils.pagination import next_cursor_for
+
+ROLE_NAME = "benchmark"
+
+
+def seed(db, rows: int, users: int, tag: str) -> uuid.UUID:
+    role_id = db.execute(
+        text("INSERT INTO roles (id, name) VALUES (:id, :name) ON CONFLICT (name) DO UPDATE SET name = excluded.name RETURNING id"),
+        {"id": uuid.uuid4(), "name": ROLE_NAME},
+    ).scalar()
+    db.execute(
+        text(
+            "INSERT INTO users (id, email, username, password_hash, role_id) "
+            "SELECT gen_random_uuid(), :tag || '-' || g || '@example.invalid', :tag || '-' || g, 'x', :role "
+            "FROM generate_series(1, :users) AS g"
+        ),
+        {"tag": tag, "role": role_id, "users": users},
+    )
+    heavy = db.execute(text("SELECT id FROM users WHERE username = :u"), {"u": f"{tag}-1"}).scalar()
+    # One row per second going back in time; every third row read. The heavy user
+    # gets a quarter of the table, the rest is spread round-robin.
+    db.execute(
+        text(
+            "WITH u AS (SELECT id, row_number() OVER (ORDER BY id) - 1 AS n FROM users WHERE username LIKE :tag || '-%') "
+            "INSERT INTO notifications (id, recipient_id, action, is_read, created_at, updated_at) "
+            "SELECT gen_random_uuid(), CASE WHEN g % 4 = 0 THEN :heavy ELSE u.id END, 'benchmark', g % 3 = 0, "
+            "       (now() AT TIME ZONE 'utc') - g * interval '1 second', (now() AT TIME ZONE 'utc') - g * interval '1 second' "
+            "FROM generate_series(1, :rows) AS g JOIN u ON u.n = g % :users"
+        ),
+        {"tag": tag, "heavy": heavy, "users": users, "rows": rows},
+    )
+    db.commit()
+    db.execute(text("ANALYZE notifications"))
+    return heavy
+
+
+def cleanup(db, tag: str) -> None:
+    # notifications go with their recipient (ON DELETE CASCADE)
+    db.execute(text("DELETE FROM users WHERE username LIKE :tag || '-%'"), {"tag": tag})
+    db.commit()
+
+
+def best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def cursor_at(db, user_id: uuid.UUID, depth: int, limit: int):
+    """The cursor a client would hold after paging `depth` pages in."""
+    if depth == 0:
+        return None
+    row = db.execute(
+        text(
+            "SELECT created_at, id FROM notifications WHERE recipient_id = :u "
+            "ORDER BY created_at DESC, id DESC OFFSET :o LIMIT 1"
+        ),
+        {"u": user_id, "o": depth * limit - 1},
+    ).one()
+    return next_cursor_for([row], 1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--depths", type=int, nargs="+", default=[0, 50, 500, 5_000], help="pages into the inbox")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help="leave the seeded rows in place")
+    args = parser.parse_args()
+
+    tag = f"bench-{uuid.uuid4().hex[:8]}"
+    db = SessionLocal()
+    try:
+        t0 = time.perf_counter()
+        heavy = seed(db, args.rows, args.users, tag)
+        reconcile_unread_notifications(db, [heavy])
+        print(f"seeded {args.rows:,} notifications in {time.perf_counter() - t0:.1f}s "
+              f"(heavy inbox: {args.rows // 4:,} rows)\n")
+
+        print(f"{'depth':>7} {'offset+total ms':>16} {'cursor ms':>10} {'unread cursor ms':>17}")
+        for depth in args.depths:
+            if depth * args.limit >= args.rows // 4:
+                continue
+            cursor = cursor_at(db, heavy, depth, args.limit)
+            t_offset = best_of(lambda: list_my_notifications(db, heavy, args.limit, depth * args.limit), args.repeat)
+            t_cursor = best_of(
+                lambda: list_my_notifications(db, heavy, args.limit, 0, cursor=cursor, total_mode="none"), args.repeat
+            )
+            t_unread = best_of(
+                lambda: list_my_notifications(db, heavy, args.limit, 0, unread_only=True, cursor=cursor), args.repeat
+            )
+            print(f"{depth:>7} {t_offset * 1000:>16.2f} {t_cursor * 1000:>10.2f} {t_unread * 1000:>17.2f}")
+    finally:
+        db.rollback()
+        if not args.keep:
+            cleanup(db, tag)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
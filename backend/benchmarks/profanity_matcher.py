@@ -0,0 +1,67 @@
+"""
+Throughput of the compiled profanity matcher vs. better_profanity.
+
+    python -m benchmarks.profanity_matcher [--sizes 1000 10000 100000] [--repeat 3]
+
+Stories are generated from a fixed vocabulary with a sprinkling of word-list hits,
+so both implementations see the same input. Reports best-of-N seconds and words/s.
+"""
+import argparse
+import random
+import time
+
+from better_profanity import profanity
+
+from app.utils.profanity import load_default_matcher
+
+VOCAB = (
+    "the a of and to in story night river castle wind quiet light dark road home "
+    "she he they said looked walked across under over before after never always"
+).split()
+HITS = ["shit", "b1tch", "a$$hole", "damn", "2 girls 1 cup"]
+
+
+def make_story(words: int, seed: int = 7) -> str:
+    rnd = random.Random(seed)
+    out = []
+    for i in range(words):
+        out.append(rnd.choice(HITS) if i % 997 == 0 else rnd.choice(VOCAB))
+        if i % 15 == 14:
+            out[-1] += "."
+    return " ".join(out)
+
+
+def best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-baseline-above", type=int, default=100_000,
+                        help="skip better_profanity for larger stories (it is very slow)")
+    args = parser.parse_args()
+
+    profanity.load_censor_words()
+    matcher = load_default_matcher()
+
+    print(f"{'words':>8} {'impl':>16} {'seconds':>10} {'words/s':>12}")
+    for size in args.sizes:
+        text = make_story(size)
+        fields = ["Title", text]
+        t_new = best_of(lambda: matcher.scan(fields), args.repeat)
+        print(f"{size:>8} {'compiled trie':>16} {t_new:>10.4f} {size / t_new:>12,.0f}")
+        if size <= args.skip_baseline_above:
+            t_old = best_of(lambda: [profanity.contains_profanity(f) for f in fields], args.repeat)
+            print(f"{size:>8} {'better_profanity':>16} {t_old:>10.4f} {size / t_old:>12,.0f}"
+                  f"   ({t_old / t_new:,.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -28,6 +28,11 @@ os.environ.setdefault("ENV", "test")
 
 os.environ["DATABASE_URL"] = BASE_TEST_DB
 
+# Run story moderation inline so tests see the verdict without a worker thread.
+os.environ.setdefault("MODERATION_ASYNC", "0")
+# Write notifications directly instead of through the outbox dispatcher.
+os.environ.setdefault("NOTIFICATIONS_ASYNC", "0")
+
 # Disallow real egress in tests by default; allowlist can be extended in tests.
 os.environ.setdefault("NO_NETWORK", "1")
 
@@ -339,6 +344,42 @@ def freezer():
 
 
 from app.llm.adapter import LLMAdapter
+from app.utils.count_cache import clear_counts
+from app.services.view_buffer import view_buffer
+from app.services.tags import invalidate_tag_cache
+from app.services.system import reset_automod_cache
+from app.services.comment_moderation import comment_moderation
+
+@pytest.fixture(autouse=True)
+def reset_count_cache():
+    # cached totals outlive the per-test rollback; never let them leak across tests
+    clear_counts()
+    yield
+    clear_counts()
+
+@pytest.fixture(autouse=True)
+def reset_view_buffer():
+    # buffered views reference rows that are rolled back after each test
+    view_buffer.clear()
+    yield
+    view_buffer.clear()
+
+@pytest.fixture(autouse=True)
+def reset_tag_cache():
+    # ids are cached when a test's session commits, but the outer per-test
+    # transaction is rolled back afterwards without the session seeing it
+    invalidate_tag_cache()
+    yield
+    invalidate_tag_cache()
+
+@pytest.fixture(autouse=True)
+def reset_moderation_state():
+    # the automod user is re-created inside each test's rolled-back transaction
+    reset_automod_cache()
+    comment_moderation.clear()
+    yield
+    reset_automod_cache()
+    comment_moderation.clear()
 
 @pytest.fixture(autouse=True)
 def stub_llm(monkeypatch):
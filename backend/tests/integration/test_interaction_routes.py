@@ -120,6 +120,28 @@ def test_like_does_not_notify_when_liking_own_story(client: TestClient, db_sessi
     client.app.dependency_overrides.pop(get_current_user, None)
 
 
+def test_like_put_delete_are_idempotent(client: TestClient, db_session: Session):
+    from tests.factories import UserFactory, StoryFactory
+    role = _ensure_role(db_session, "user")
+    story = StoryFactory(user=UserFactory(role=role), is_published=True)
+    actor = UserFactory(role=role)
+    client.app.dependency_overrides[get_current_user] = _override_current_user(actor)
+
+    for _ in range(2):
+        res = client.put(f"/stories/{story.id}/like")
+        assert res.status_code == 200, res.text
+        assert res.json()["liked"] is True
+    assert db_session.query(Like).filter_by(user_id=actor.id, story_id=story.id).count() == 1
+
+    for _ in range(2):
+        res = client.delete(f"/stories/{story.id}/like")
+        assert res.status_code == 200, res.text
+        assert res.json()["liked"] is False
+    assert db_session.query(Like).filter_by(user_id=actor.id, story_id=story.id).count() == 0
+
+    client.app.dependency_overrides.pop(get_current_user, None)
+
+
 def test_like_unauthenticated_401(client: TestClient):
     res = client.post(f"/stories/{uuid.uuid4()}/like")
     assert res.status_code == 401
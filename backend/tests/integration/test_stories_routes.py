@@ -55,7 +55,7 @@ def test_create_story_dedupes_tags_and_sets_published_when_not_flagged(client: T
     user = UserFactory(role=role)
 
     # Moderation: not flagged
-    monkeypatch.setattr("app.services.story.moderate_content", lambda items: (False, []))
+    monkeypatch.setattr("app.services.story.moderate_each", lambda texts: [(False, [])] * len(texts))
 
     # require_roles & get_current_user
     from app import dependencies as deps
@@ -86,7 +86,7 @@ def test_create_story_flagged_sets_draft_and_creates_flag_record(client: TestCli
     user = UserFactory(role=role)
 
     # Moderation: flagged with categories
-    monkeypatch.setattr("app.services.story.moderate_content", lambda items: (True, ["profanity"]))
+    monkeypatch.setattr("app.services.story.moderate_each", lambda texts: [(True, ["profanity"])] * len(texts))
 
     from app import dependencies as deps
     client.app.dependency_overrides[deps.require_roles] = _override_require_roles(user)
@@ -181,7 +181,7 @@ def test_update_story_allows_owner_and_reflags_when_text_changes(client: TestCli
     post = StoryFactory(user=owner, title="ok", content="ok", is_published=True)
 
     # Moderate to flagged on update
-    monkeypatch.setattr("app.services.story.moderate_content", lambda items: (True, ["bad"]))
+    monkeypatch.setattr("app.services.story.moderate_each", lambda texts: [(True, ["bad"])] * len(texts))
 
     from app import dependencies as deps
     client.app.dependency_overrides[deps.get_current_user] = _override_current_user(owner)
@@ -193,6 +193,26 @@ def test_update_story_allows_owner_and_reflags_when_text_changes(client: TestCli
     client.app.dependency_overrides.pop(deps.get_current_user, None)
 
 
+def test_update_story_cannot_publish_a_story_held_for_moderation(client: TestClient, db_session: Session):
+    role = _ensure_role(db_session, "creator")
+    owner = UserFactory(role=role)
+    pending = StoryFactory(user=owner, is_published=False, status=StoryStatus.pending_review)
+    flagged = StoryFactory(user=owner, is_published=False, is_flagged=True, status=StoryStatus.draft)
+
+    from app import dependencies as deps
+    client.app.dependency_overrides[deps.get_current_user] = _override_current_user(owner)
+
+    res = client.patch(f"/stories/{pending.id}", json={"is_published": True})
+    assert res.status_code == 409
+    res = client.patch(f"/stories/{flagged.id}", json={"is_published": True})
+    assert res.status_code == 400
+
+    for story in (pending, flagged):
+        db_session.refresh(story)
+        assert story.is_published is False
+    client.app.dependency_overrides.pop(deps.get_current_user, None)
+
+
 def test_delete_story_marks_deleted(client: TestClient, db_session: Session):
     role = _ensure_role(db_session, "creator")
     owner = UserFactory(role=role)
@@ -245,7 +265,7 @@ def test_generate_ai_story_uses_llm_and_creates_revision(client: TestClient, db_
     user = UserFactory(role=role)
 
     # No flagging
-    monkeypatch.setattr("app.services.story.moderate_content", lambda items: (False, []))
+    monkeypatch.setattr("app.services.story.moderate_each", lambda texts: [(False, [])] * len(texts))
     # Mock LLM
     monkeypatch.setattr("app.services.story._llm.generate", lambda prompt, model, temperature, max_tokens, timeout:
                         ("<h1>AI Title</h1><p>AI text</p>", "msg-1"))
@@ -279,7 +299,7 @@ def test_feedback_regenerates_and_bumps_version(client: TestClient, db_session:
 
     # Mock LLM + moderation
     monkeypatch.setattr("app.services.story._llm.generate", lambda *a, **k: ("<p>Regen</p>", "msg-regen"))
-    monkeypatch.setattr("app.services.story.moderate_content", lambda items: (False, []))
+    monkeypatch.setattr("app.services.story.moderate_each", lambda texts: [(False, [])] * len(texts))
 
     from app import dependencies as deps
     client.app.dependency_overrides[deps.get_current_user] = _override_current_user(user)
@@ -149,3 +149,90 @@ def test_delete_comment_404_when_missing(db_session: Session):
     with pytest.raises(HTTPException) as exc:
         comment_service.delete_comment(db_session, comment_id=missing_id, current_user=user)
     assert exc.value.status_code == 404
+
+
+# -----------------------
+# comment moderation
+# -----------------------
+
+from app.models.flag import Flag
+from app.services.comment_moderation import comment_moderation
+import app.services.system as system_service
+
+
+def test_short_profane_comment_is_flagged_inline(db_session: Session, monkeypatch):
+    monkeypatch.setattr(comment_service, "notify", NotifySink())
+    story = StoryFactory(user=UserFactory())
+
+    bad = comment_service.create_comment(db_session, story.id, "what a load of shit", UserFactory())
+    ok = comment_service.create_comment(db_session, story.id, "lovely read", UserFactory())
+
+    flags = db_session.query(Flag).filter(Flag.comment_id.isnot(None)).all()
+    assert [f.comment_id for f in flags] == [bad.id]
+    assert flags[0].story_id is None and flags[0].status == "open"
+    assert db_session.query(Flag).filter_by(comment_id=ok.id).count() == 0
+
+
+def test_long_comment_is_moderated_in_batch(db_session: Session, monkeypatch):
+    monkeypatch.setattr(comment_service, "notify", NotifySink())
+    monkeypatch.setattr(comment_service.settings, "MODERATION_ASYNC", True)
+    monkeypatch.setattr(comment_service.settings, "COMMENT_SYNC_MODERATION_CHARS", 20)
+    story = StoryFactory(user=UserFactory())
+
+    long_bad = comment_service.create_comment(db_session, story.id, "this is a long comment, full of shit", UserFactory())
+    comment_service.create_comment(db_session, story.id, "this is a long and perfectly polite comment", UserFactory())
+    assert db_session.query(Flag).count() == 0
+    assert comment_moderation.pending() == 2
+
+    assert comment_moderation.flush(db_session) == 1
+    assert db_session.query(Flag).filter_by(comment_id=long_bad.id).count() == 1
+
+
+def test_automod_user_is_looked_up_once(db_session: Session, monkeypatch):
+    monkeypatch.setattr(comment_service, "notify", NotifySink())
+    story = StoryFactory(user=UserFactory())
+    calls = []
+    real = system_service.get_automod_user
+    monkeypatch.setattr(system_service, "get_automod_user", lambda db: calls.append(1) or real(db))
+
+    for _ in range(3):
+        comment_service.create_comment(db_session, story.id, "shit", UserFactory())
+    assert len(calls) == 1
+    assert db_session.query(Flag).filter(Flag.comment_id.isnot(None)).count() == 3
+
+
+def test_failed_batch_flush_requeues_comments(db_session: Session, monkeypatch):
+    import app.services.comment_moderation as buffer_module
+
+    monkeypatch.setattr(comment_service, "notify", NotifySink())
+    monkeypatch.setattr(comment_service.settings, "MODERATION_ASYNC", True)
+    monkeypatch.setattr(comment_service.settings, "COMMENT_SYNC_MODERATION_CHARS", 20)
+    story = StoryFactory(user=UserFactory())
+    bad = comment_service.create_comment(db_session, story.id, "this is a long comment, full of shit", UserFactory())
+
+    real = buffer_module.apply_verdicts
+    def down(*args, **kwargs):
+        raise RuntimeError("database unavailable")
+    monkeypatch.setattr(buffer_module, "apply_verdicts", down)
+    with pytest.raises(RuntimeError):
+        comment_moderation.flush(db_session)
+    assert comment_moderation.pending() == 1
+
+    monkeypatch.setattr(buffer_module, "apply_verdicts", real)
+    assert comment_moderation.flush(db_session) == 1
+    assert db_session.query(Flag).filter_by(comment_id=bad.id).count() == 1
+
+
+def test_batch_flush_skips_comments_deleted_since_record(db_session: Session, monkeypatch):
+    monkeypatch.setattr(comment_service, "notify", NotifySink())
+    monkeypatch.setattr(comment_service.settings, "MODERATION_ASYNC", True)
+    monkeypatch.setattr(comment_service.settings, "COMMENT_SYNC_MODERATION_CHARS", 20)
+    story = StoryFactory(user=UserFactory())
+    author = UserFactory()
+    gone = comment_service.create_comment(db_session, story.id, "this is a long comment, full of shit", author)
+    kept = comment_service.create_comment(db_session, story.id, "another long comment, also full of shit", author)
+    comment_service.delete_comment(db_session, gone.id, author)
+
+    assert comment_moderation.flush(db_session) == 1
+    assert comment_moderation.pending() == 0
+    assert db_session.query(Flag).filter_by(comment_id=kept.id).count() == 1
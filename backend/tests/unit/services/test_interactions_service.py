@@ -146,3 +146,108 @@ def test_list_bookmarks_returns_only_current_user_and_in_desc_order(db_session:
 
     # should exclude other's bookmark and be ordered newest-first (b2, then b1)
     assert ids == [s2.id, s1.id]
+
+# -----------------------
+# engagement counters
+# -----------------------
+
+def test_toggles_maintain_story_counters(db_session: Session, monkeypatch):
+    monkeypatch.setattr(interactions_service, "notify", NotifySink())
+    story = StoryFactory(user=UserFactory())
+    u1, u2 = UserFactory(), UserFactory()
+
+    interactions_service.toggle_like(db_session, story.id, u1)
+    interactions_service.toggle_like(db_session, story.id, u2)
+    interactions_service.toggle_bookmark(db_session, story.id, u1)
+    db_session.refresh(story)
+    assert (story.likes_count, story.bookmarks_count) == (2, 1)
+
+    interactions_service.toggle_like(db_session, story.id, u1)     # unlike
+    interactions_service.toggle_bookmark(db_session, story.id, u1) # un-bookmark
+    db_session.refresh(story)
+    assert (story.likes_count, story.bookmarks_count) == (1, 0)
+
+    # likes received roll up to the author's profile total
+    db_session.refresh(story.user)
+    assert story.user.total_likes == 1
+
+
+def test_like_racing_a_delete_does_not_count_toward_author_total(db_session: Session, monkeypatch):
+    from datetime import datetime
+
+    monkeypatch.setattr(interactions_service, "notify", NotifySink())
+    story = StoryFactory(user=UserFactory())
+    real_owner = interactions_service._story_owner
+
+    def owner_then_delete(db, story_id):
+        row = real_owner(db, story_id)      # still live when read...
+        story.deleted_at = datetime.utcnow()  # ...then soft-deleted before the like lands
+        db.flush()
+        return row
+
+    monkeypatch.setattr(interactions_service, "_story_owner", owner_then_delete)
+    interactions_service.set_like(db_session, story.id, UserFactory(), True)
+
+    db_session.refresh(story)
+    db_session.refresh(story.user)
+    assert story.likes_count == 1
+    assert story.user.total_likes == 0
+
+
+def test_reconcile_story_counters_repairs_drift(db_session: Session):
+    from app.services.counters import reconcile_story_counters
+
+    story = StoryFactory(user=UserFactory())
+    db_session.add(Like(user_id=UserFactory().id, story_id=story.id))  # bypasses the service
+    story.bookmarks_count = 7                                         # drifted value
+    db_session.commit()
+
+    assert reconcile_story_counters(db_session, [story.id]) == 1
+    db_session.refresh(story)
+    assert (story.likes_count, story.bookmarks_count) == (1, 0)
+
+
+# -----------------------
+# idempotent set_like / set_bookmark
+# -----------------------
+
+def test_set_like_is_idempotent(db_session: Session, monkeypatch):
+    sink = NotifySink()
+    monkeypatch.setattr(interactions_service, "notify", sink)
+    story = StoryFactory(user=UserFactory())
+    liker = UserFactory()
+
+    assert interactions_service.set_like(db_session, story.id, liker, True) is True
+    assert interactions_service.set_like(db_session, story.id, liker, True) is True  # repeat: no-op
+    db_session.refresh(story)
+    assert story.likes_count == 1
+    assert db_session.query(Like).filter_by(user_id=liker.id, story_id=story.id).count() == 1
+    assert len(sink.calls) == 1  # only the call that inserted notifies
+
+    assert interactions_service.set_like(db_session, story.id, liker, False) is False
+    assert interactions_service.set_like(db_session, story.id, liker, False) is False
+    db_session.refresh(story)
+    assert story.likes_count == 0
+    assert db_session.query(Like).filter_by(user_id=liker.id, story_id=story.id).count() == 0
+
+
+def test_set_bookmark_is_idempotent(db_session: Session, monkeypatch):
+    monkeypatch.setattr(interactions_service, "notify", NotifySink())
+    story = StoryFactory(user=UserFactory())
+    keeper = UserFactory()
+
+    interactions_service.set_bookmark(db_session, story.id, keeper, True)
+    interactions_service.set_bookmark(db_session, story.id, keeper, True)
+    db_session.refresh(story)
+    assert story.bookmarks_count == 1
+
+    interactions_service.set_bookmark(db_session, story.id, keeper, False)
+    interactions_service.set_bookmark(db_session, story.id, keeper, False)
+    db_session.refresh(story)
+    assert story.bookmarks_count == 0
+
+
+def test_set_like_404_when_story_missing(db_session: Session):
+    with pytest.raises(HTTPException) as exc:
+        interactions_service.set_like(db_session, uuid.uuid4(), UserFactory(), True)
+    assert exc.value.status_code == 404
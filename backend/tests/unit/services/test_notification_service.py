@@ -95,3 +95,233 @@ def test_mark_all_as_read_only_affects_caller(db_session: Session):
     # u2 unaffected
     re_u2 = db_session.get(Notification, n_u2.id)
     assert re_u2.is_read is False
+
+def test_notify_leaves_the_commit_to_the_caller(db_session: Session, monkeypatch):
+    u = _user(); a = _user()
+    db_session.commit()
+    monkeypatch.setattr(db_session, "commit", lambda: pytest.fail("notify() must not commit"))
+
+    # eager: written in the caller's open transaction
+    notif_service.notify(db_session, u.id, "ping", actor_id=a.id)
+    notif_service.notify_many(db_session, [{"recipient_id": u.id, "action": "bulk", "actor_id": a.id}])
+    assert db_session.in_transaction()
+
+    # outbox: only added to the session, nothing flushed yet
+    monkeypatch.setattr(notif_service.settings, "NOTIFICATIONS_ASYNC", True)
+    queued = notif_service.notify(db_session, u.id, "pong", actor_id=a.id)
+    assert queued in db_session.new
+
+def test_outbox_dispatch_delivers_in_one_batch(db_session: Session, monkeypatch):
+    from app.models.notification_outbox import NotificationOutbox
+    from app.services.notification_outbox import notification_dispatcher
+
+    monkeypatch.setattr(notif_service.settings, "NOTIFICATIONS_ASYNC", True)
+    u = _user(); a = _user()
+    queued = [notif_service.notify(db_session, u.id, f"act{i}", actor_id=a.id) for i in range(3)]
+    notif_service.notify_many(db_session, [{"recipient_id": u.id, "action": "bulk", "actor_id": a.id}])
+    db_session.commit()
+    assert db_session.query(Notification).filter(Notification.recipient_id == u.id).count() == 0
+
+    assert notification_dispatcher.dispatch(db_session) == 4
+    assert db_session.query(NotificationOutbox).count() == 0
+    delivered = db_session.query(Notification).filter(Notification.recipient_id == u.id).all()
+    assert {q.id for q in queued} <= {n.id for n in delivered}
+    assert all(n.is_read is False for n in delivered)
+    assert notification_dispatcher.dispatch(db_session) == 0
+
+def test_likes_on_same_target_fold_into_one_unread_group(db_session: Session):
+    import uuid
+    author = _user(); fans = [_user() for _ in range(3)]
+    story_id = uuid.uuid4()
+
+    for fan in fans + [fans[0]]:  # fans[0] repeats: not counted twice
+        notif_service.notify(db_session, author.id, "liked", actor_id=fan.id, target_type="story", target_id=story_id)
+
+    total, items = notif_service.list_my_notifications(db_session, author.id, limit=10, offset=0)
+    assert total == 1
+    group = items[0]
+    assert group.actor_count == 3
+    assert group.actor_id == fans[0].id
+    assert group.recent_actor_ids == [fans[0].id, fans[2].id, fans[1].id]
+
+    # once read, the next like starts a new group
+    notif_service.mark_as_read(db_session, group.id, author.id)
+    notif_service.notify(db_session, author.id, "liked", actor_id=fans[1].id, target_type="story", target_id=story_id)
+    total, _ = notif_service.list_my_notifications(db_session, author.id, limit=10, offset=0, unread_only=True)
+    assert total == 1
+
+def test_write_notifications_folds_a_batch_per_group(db_session: Session):
+    import uuid
+    from datetime import datetime
+    from app.services.notification_outbox import write_notifications
+
+    author = _user(); fans = [_user() for _ in range(3)]
+    story_id = uuid.uuid4()
+    now = datetime(2025, 1, 1, 12)  # mid-window: the follow-up below lands in the same group
+    rows = [
+        {"id": uuid.uuid4(), "recipient_id": author.id, "actor_id": f.id, "action": "commented",
+         "target_type": "story", "target_id": story_id, "created_at": now}
+        for f in fans
+    ]
+    rows.append({"id": uuid.uuid4(), "recipient_id": author.id, "actor_id": fans[0].id, "action": "story_approved",
+                 "target_type": "story", "target_id": story_id, "created_at": now})
+
+    written = write_notifications(db_session, rows)
+    assert sorted(w["action"] for w in written) == ["commented", "story_approved"]
+    grouped = db_session.query(Notification).filter(Notification.action == "commented").one()
+    assert grouped.actor_count == 3
+
+    # new activity on an older group moves it back to the top of the inbox
+    later = now.replace(minute=5)
+    write_notifications(db_session, [{"id": uuid.uuid4(), "recipient_id": author.id, "actor_id": fans[1].id,
+                                      "action": "commented", "target_type": "story", "target_id": story_id,
+                                      "created_at": later}])
+    _, inbox = notif_service.list_my_notifications(db_session, author.id, limit=10, offset=0)
+    assert inbox[0].action == "commented" and inbox[0].created_at == later
+
+def test_notify_publishes_after_commit_and_replays_from_last_event_id(db_session: Session, monkeypatch):
+    import json
+    from app.services import notification_broker as nb
+
+    published = []
+    monkeypatch.setattr(nb.notification_broker, "publish", published.extend)
+    u = _user(); a = _user()
+
+    notif_service.notify(db_session, u.id, "first", actor_id=a.id)
+    assert published == []
+    db_session.commit()
+    assert [json.loads(e["data"])["action"] for e in published] == ["first"]
+
+    notif_service.notify(db_session, u.id, "second", actor_id=a.id)
+    notif_service.notify(db_session, u.id, "third", actor_id=a.id)
+    db_session.commit()
+
+    replay = notif_service.notification_events_since(db_session, u.id, published[0]["id"])
+    assert [json.loads(e["data"])["action"] for e in replay] == ["second", "third"]
+
+    notif_service.notify(db_session, u.id, "dropped", actor_id=a.id)
+    db_session.rollback()
+    assert len(published) == 3
+
+def test_replay_pages_and_stamps_write_time(db_session: Session):
+    import json
+    import uuid
+    from datetime import datetime
+    from app.services.notification_broker import event_for
+    from app.services.notification_outbox import write_notifications
+
+    u = _user(); a = _user()
+    first = notif_service.notify(db_session, u.id, "first", actor_id=a.id)
+    # delivered late: the action is old, but the event id follows the write
+    late = write_notifications(db_session, [{"id": uuid.uuid4(), "recipient_id": u.id, "actor_id": a.id,
+                                             "action": "late", "created_at": datetime(2020, 1, 1)}])[0]
+    assert late["updated_at"] > first.updated_at
+    for action in ("x", "y"):
+        notif_service.notify(db_session, u.id, action, actor_id=a.id)
+    db_session.commit()
+
+    page = notif_service.notification_events_since(db_session, u.id, event_for(first)["id"], limit=2)
+    assert [json.loads(e["data"])["action"] for e in page] == ["late", "x"]
+    rest = notif_service.notification_events_since(db_session, u.id, page[-1]["id"], limit=2)
+    assert [json.loads(e["data"])["action"] for e in rest] == ["y"]
+
+def test_broker_fans_out_to_the_recipient_only():
+    import asyncio
+    import uuid
+    from app.services.notification_broker import NotificationBroker
+
+    async def run():
+        broker = NotificationBroker(max_pending=10)
+        me, other = uuid.uuid4(), uuid.uuid4()
+        mine, theirs = broker.subscribe(me), broker.subscribe(other)
+        broker.publish([{"id": "1", "data": "{}", "recipient_id": str(me)}])
+        assert (await mine.get(1))["id"] == "1"
+        with pytest.raises(asyncio.TimeoutError):
+            await theirs.get(0.05)
+        broker.unsubscribe(mine)
+        broker.publish([{"id": "2", "data": "{}", "recipient_id": str(me)}])
+        with pytest.raises(asyncio.TimeoutError):
+            await mine.get(0.05)
+
+    asyncio.run(run())
+
+def test_unread_counter_tracks_notify_read_and_groups(db_session: Session):
+    import uuid
+    from app.services.counters import reconcile_unread_notifications
+
+    u = _user(); a = _user(); b = _user()
+    story_id = uuid.uuid4()
+    n1 = notif_service.notify(db_session, u.id, "ping", actor_id=a.id)
+    notif_service.notify(db_session, u.id, "pong", actor_id=a.id)
+    # two likes on one story fold into one group: counted once
+    notif_service.notify(db_session, u.id, "liked", actor_id=a.id, target_type="story", target_id=story_id)
+    notif_service.notify(db_session, u.id, "liked", actor_id=b.id, target_type="story", target_id=story_id)
+    db_session.commit()
+    assert notif_service.unread_count(db_session, u.id) == 3
+
+    notif_service.mark_as_read(db_session, n1.id, u.id)
+    notif_service.mark_as_read(db_session, n1.id, u.id)  # repeat does not decrement again
+    assert notif_service.unread_count(db_session, u.id) == 2
+
+    assert notif_service.mark_all_as_read(db_session, u.id) == 2
+    assert notif_service.unread_count(db_session, u.id) == 0
+
+    # drift is repaired by reconciliation
+    db_session.get(type(u), u.id).unread_notifications = 7
+    db_session.commit()
+    assert reconcile_unread_notifications(db_session, [u.id]) == 1
+    assert notif_service.unread_count(db_session, u.id) == 0
+
+def test_list_my_notifications_cursor_pages_without_total(db_session: Session):
+    from app.utils.pagination import next_cursor_for
+
+    u = _user(); a = _user()
+    ids = [notif_service.notify(db_session, u.id, f"act{i}", actor_id=a.id).id for i in range(5)]
+
+    seen, cursor = [], None
+    while True:
+        total, page = notif_service.list_my_notifications(db_session, u.id, 2, 0, cursor=cursor, total_mode="none")
+        assert total is None
+        seen += [n.id for n in page]
+        cursor = next_cursor_for(page, 2)
+        if cursor is None:
+            break
+    assert seen == ids[::-1]
+
+def test_maintenance_prunes_only_old_read_notifications(db_session: Session):
+    from datetime import datetime, timedelta
+    from app.services.notification_maintenance import NotificationMaintenance
+
+    u = _user(); a = _user()
+    old_read = [notif_service.notify(db_session, u.id, "x", actor_id=a.id) for _ in range(3)]
+    old_unread = notif_service.notify(db_session, u.id, "y", actor_id=a.id)
+    recent_read = notif_service.notify(db_session, u.id, "z", actor_id=a.id)
+    for n in old_read + [old_unread]:
+        n.created_at = datetime.utcnow() - timedelta(days=40)
+    for n in old_read + [recent_read]:
+        notif_service.mark_as_read(db_session, n.id, u.id)
+    db_session.commit()
+
+    job = NotificationMaintenance(interval=0, retention_days=30, batch_size=2, pause=0)
+    assert job.prune(db_session) == 3  # two batches
+    remaining = {n.id for n in db_session.query(Notification).filter(Notification.recipient_id == u.id)}
+    assert remaining == {old_unread.id, recent_read.id}
+    assert notif_service.unread_count(db_session, u.id) == 1
+
+
+def test_maintenance_prunes_verdicts_of_old_rule_sets(db_session: Session):
+    from app.models.moderation_verdict import ModerationVerdict
+    from app.services.moderation import RULESET_VERSION, moderate_each
+    from app.services.moderation_verdicts import moderate_incremental
+    from app.services.notification_maintenance import NotificationMaintenance
+
+    moderate_incremental(db_session, ["a current chunk"], moderate_each)
+    db_session.add_all([
+        ModerationVerdict(chunk_hash="a" * 64, flagged=False, ruleset="0" * 16),               # old rule set
+        ModerationVerdict(chunk_hash="b" * 64, flagged=True, categories="profanity"),        # pre-column row
+    ])
+    db_session.commit()
+
+    job = NotificationMaintenance(interval=0, retention_days=30, batch_size=1, pause=0)
+    assert job.prune_verdicts(db_session) == 2
+    assert [v.ruleset for v in db_session.query(ModerationVerdict)] == [RULESET_VERSION]
@@ -0,0 +1,72 @@
+# tests/unit/services/test_rescan_service.py
+
+from sqlalchemy.orm import Session
+
+from app.models.flag import Flag
+from app.models.stories import StoryStatus
+from app.services.rescan import Checkpoint, rescan_corpus
+from tests.factories import UserFactory, StoryFactory, CommentFactory
+
+
+def _run(db_session: Session, **kw):
+    return rescan_corpus(db_session, db_session, workers=0, chunk_size=2, **kw)
+
+
+def test_rescan_flags_stories_and_comments(db_session: Session):
+    author = UserFactory()
+    clean = StoryFactory(user=author, content="a quiet night", is_published=True)
+    dirty = StoryFactory(user=author, content="what a shit day", is_published=True, status=StoryStatus.published)
+    comment = CommentFactory(story=clean, content="b1tch please")
+    CommentFactory(story=clean, content="lovely")
+
+    stats = _run(db_session)
+    assert stats["stories"].flagged == 1 and stats["comments"].flagged == 1
+
+    db_session.refresh(dirty); db_session.refresh(clean)
+    assert dirty.is_flagged is True and dirty.is_published is False and dirty.status == StoryStatus.draft
+    assert dirty.flags_count == 1
+    assert clean.is_flagged is False
+    assert db_session.query(Flag).filter_by(story_id=dirty.id).count() == 1
+    assert db_session.query(Flag).filter_by(comment_id=comment.id).count() == 1
+
+    # A second pass adds nothing: flagged stories and open automod comment flags are skipped.
+    again = _run(db_session)
+    assert again["stories"].flagged == 0 and again["comments"].flagged == 0
+    assert db_session.query(Flag).count() == 2
+
+
+def test_rescan_keeps_moderator_decisions(db_session: Session):
+    author, moderator = UserFactory(), UserFactory()
+    approved = StoryFactory(user=author, content="what a shit day", is_published=True, status=StoryStatus.published)
+    comment = CommentFactory(story=approved, content="b1tch please")
+    db_session.add_all([
+        Flag(flagged_by_user_id=moderator.id, story_id=approved.id, reason="r", status="approved"),
+        Flag(flagged_by_user_id=moderator.id, comment_id=comment.id, reason="r", status="ignored"),
+    ])
+    db_session.commit()
+
+    stats = _run(db_session)
+    assert stats["stories"].flagged == 0 and stats["comments"].flagged == 0
+
+    db_session.refresh(approved)
+    assert approved.is_flagged is False and approved.is_published is True
+    assert db_session.query(Flag).filter_by(story_id=approved.id).count() == 1
+    assert db_session.query(Flag).filter_by(comment_id=comment.id).count() == 1
+
+
+def test_rescan_resumes_from_checkpoint(db_session: Session, tmp_path):
+    author = UserFactory()
+    stories = sorted((StoryFactory(user=author, content="shit") for _ in range(5)), key=lambda s: s.id)
+    path = str(tmp_path / "ck.json")
+
+    # Pretend an earlier run committed through the second story.
+    ck = Checkpoint(path)
+    ck.advance("stories", stories[1].id)
+
+    stats = _run(db_session, targets=["stories"], checkpoint=Checkpoint(path))
+    assert stats["stories"].scanned == 3
+    flagged = {s.id for s in stories if (db_session.refresh(s) or s.is_flagged)}
+    assert flagged == {s.id for s in stories[2:]}
+
+    # Finished targets are skipped on the next run with the same checkpoint.
+    assert _run(db_session, targets=["stories"], checkpoint=Checkpoint(path)) == {}
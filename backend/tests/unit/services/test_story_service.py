@@ -15,6 +15,7 @@ from app.models.flag import Flag
 from app.models.like import Like
 from app.models.bookmarks import Bookmark
 from app.models.story_revision import StoryRevision
+from app.models.user import User
 
 from app.schemas.stories import (
     StoryCreate,
@@ -36,6 +37,26 @@ from tests.factories import (
 # Helpers / stubs
 # -----------------------
 
+from contextlib import contextmanager
+from sqlalchemy import event
+
+
+@contextmanager
+def _count_queries(db_session: Session):
+    """Count SQL statements issued on the session's connection inside the block."""
+    conn = db_session.connection()
+    counter = {"n": 0}
+
+    def _before(*_args, **_kw):
+        counter["n"] += 1
+
+    event.listen(conn, "before_cursor_execute", _before)
+    try:
+        yield counter
+    finally:
+        event.remove(conn, "before_cursor_execute", _before)
+
+
 class _ReqStub:
     """Minimal stand-in for fastapi.Request used by get_story_details."""
     def __init__(self, ip="127.0.0.1", ua="pytest"):
@@ -73,7 +94,7 @@ def test_create_story_success_for_creator_role(db_session: Session, monkeypatch)
     creator = _allow_creator()
 
     # moderation -> clean
-    monkeypatch.setattr(story_service, "moderate_content", lambda contents: (False, []))
+    monkeypatch.setattr(story_service, "moderate_each", lambda texts: [(False, [])] * len(texts))
 
     payload = StoryCreate(
         title="My Story",
@@ -103,7 +124,7 @@ def test_create_story_success_for_creator_role(db_session: Session, monkeypatch)
 
 def test_create_story_flagged_creates_flag_and_unpublishes(db_session: Session, monkeypatch):
     creator = _allow_creator()
-    monkeypatch.setattr(story_service, "moderate_content", lambda _: (True, ["profanity"]))
+    monkeypatch.setattr(story_service, "moderate_each", lambda texts: [(True, ["profanity"])] * len(texts))
 
     payload = StoryCreate(
         title="Bad Story",
@@ -132,7 +153,7 @@ def test_generate_story_success_publishes_when_clean_and_publish_now(db_session:
         return ("<h1>AI Title</h1><p>AI body</p>", "msg_123")
     monkeypatch.setattr(story_service._llm, "generate", fake_gen)
 
-    monkeypatch.setattr(story_service, "moderate_content", lambda _: (False, []))
+    monkeypatch.setattr(story_service, "moderate_each", lambda texts: [(False, [])] * len(texts))
 
     data = StoryGenerateIn(
         title=None,
@@ -168,7 +189,7 @@ def test_generate_story_flagged_sets_generated_and_flag(db_session: Session, mon
         "generate",
         lambda *a, **k: ("<h1>Bad</h1><p>bad words</p>", "msg_bad"),
     )
-    monkeypatch.setattr(story_service, "moderate_content", lambda _: (True, ["toxicity"]))
+    monkeypatch.setattr(story_service, "moderate_each", lambda texts: [(True, ["toxicity"])] * len(texts))
 
     data = StoryGenerateIn(prompt="any", publish_now=True)
     created = story_service.generate_story(db_session, data, creator)
@@ -185,7 +206,7 @@ def test_get_all_stories_visibility_and_filters(db_session: Session, monkeypatch
     user_regular = UserFactory(role=RoleFactory(name="user"))
     mod = _allow_moderator()
 
-    monkeypatch.setattr(story_service, "moderate_content", lambda _: (False, []))
+    monkeypatch.setattr(story_service, "moderate_each", lambda texts: [(False, [])] * len(texts))
 
     # Create two tags via story creation
     s1 = story_service.create_story(
@@ -223,7 +244,7 @@ def test_get_all_stories_visibility_and_filters(db_session: Session, monkeypatch
 
 def test_get_user_stories(db_session: Session, monkeypatch):
     author = _allow_creator()
-    monkeypatch.setattr(story_service, "moderate_content", lambda _: (False, []))
+    monkeypatch.setattr(story_service, "moderate_each", lambda texts: [(False, [])] * len(texts))
 
     story_service.create_story(db_session, StoryCreate(title="t1", content="...", tag_names=[], is_published=True), author)
     story_service.create_story(db_session, StoryCreate(title="t2", content="...", tag_names=[], is_published=False), author)
@@ -233,6 +254,117 @@ def test_get_user_stories(db_session: Session, monkeypatch):
     assert all(s.user_id == author.id for s in items)
 
 
+def test_get_all_stories_cursor_pages_without_gaps_or_duplicates(db_session: Session):
+    from app.utils.pagination import next_cursor_for
+
+    author = _allow_creator()
+    base = datetime(2025, 1, 1, 12, 0, 0)
+    # two stories share a timestamp to exercise the id tie-breaker
+    created = [StoryFactory(user=author, is_published=True, created_at=base - timedelta(minutes=i // 2)) for i in range(5)]
+
+    seen, cursor = [], None
+    while True:
+        _, page = story_service.get_all_stories(db_session, 2, 0, None, author.id, None, cursor=cursor)
+        seen.extend(s.id for s in page)
+        cursor = next_cursor_for(page, 2)
+        if cursor is None:
+            break
+
+    assert len(seen) == len(set(seen)) == 5
+    assert set(seen) == {s.id for s in created}
+
+    with pytest.raises(Exception):
+        story_service.get_all_stories(db_session, 2, 0, None, None, None, cursor="not-a-cursor")
+
+
+@pytest.mark.parametrize("page_size", [1, 5, 20])
+def test_story_list_serialization_uses_fixed_query_count(db_session: Session, page_size):
+    tag_a, tag_b = Tag(name="qc-a"), Tag(name="qc-b")
+    for _ in range(20):
+        s = StoryFactory(user=UserFactory(), is_published=True)
+        s.tags = [tag_a, tag_b]
+    db_session.flush()
+    db_session.expire_all()  # force relationship loads to hit the DB
+
+    with _count_queries(db_session) as q:
+        _, items = story_service.get_all_stories(db_session, page_size, 0, None, None, None, total_mode="none")
+        out = [StoryOut.model_validate(i, from_attributes=True) for i in items]
+
+    assert len(out) == page_size
+    assert all(o.user is not None and len(o.tags) == 2 for o in out)
+    # one SELECT for stories + authors, one IN-select for tags
+    assert q["n"] == 2
+
+
+def test_summary_listing_defers_content_and_uses_stored_excerpt(db_session: Session, monkeypatch):
+    from sqlalchemy import inspect as sa_inspect
+
+    author = _allow_creator()
+    monkeypatch.setattr(story_service, "moderate_each", lambda texts: [(False, [])] * len(texts))
+    body = "<h1>Heading</h1><p>" + "lorem ipsum " * 200 + "</p>"
+    created = story_service.create_story(db_session, StoryCreate(title="long", content=body, tag_names=[], is_published=True), author)
+    assert created.excerpt.startswith("Heading lorem ipsum")
+    assert len(created.excerpt) <= story_service.EXCERPT_LENGTH + 1
+    db_session.expire_all()
+
+    _, items = story_service.get_all_stories(db_session, 10, 0, None, author.id, None, summary=True)
+    assert len(items) == 1
+    assert "content" in sa_inspect(items[0]).unloaded
+    assert items[0].excerpt == created.excerpt
+
+    # update keeps the excerpt in sync with content
+    updated = story_service.update_story(db_session, created.id, StoryUpdate(content="<p>new body</p>"), author)
+    assert updated.excerpt == "new body"
+
+
+def test_list_fills_viewer_state_with_one_query_per_table(db_session: Session):
+    viewer = UserFactory(role=RoleFactory(name="user"))
+    stories = [StoryFactory(is_published=True) for _ in range(4)]
+    db_session.add(Like(user_id=viewer.id, story_id=stories[0].id))
+    db_session.add(Bookmark(user_id=viewer.id, story_id=stories[1].id))
+    db_session.add(Like(user_id=UserFactory().id, story_id=stories[2].id))  # someone else's like
+    db_session.flush()
+
+    _, items = story_service.get_all_stories(db_session, 10, 0, None, None, viewer, total_mode="none")
+    by_id = {i.id: i for i in items}
+    assert by_id[stories[0].id].is_liked_by_user is True
+    assert by_id[stories[1].id].is_bookmarked_by_user is True
+    assert by_id[stories[2].id].is_liked_by_user is False
+    assert by_id[stories[3].id].is_liked_by_user is False
+    assert by_id[stories[3].id].is_bookmarked_by_user is False
+
+    with _count_queries(db_session) as q:
+        story_service.fill_viewer_state(db_session, items, viewer)
+    assert q["n"] == 2
+
+    with _count_queries(db_session) as q:
+        story_service.fill_viewer_state(db_session, items, None)
+    assert q["n"] == 0
+    assert not any(i.is_liked_by_user for i in items)
+
+
+def test_get_all_stories_total_is_cached_until_story_write(db_session: Session, monkeypatch):
+    author = _allow_creator()
+    monkeypatch.setattr(story_service, "moderate_each", lambda texts: [(False, [])] * len(texts))
+    story_service.create_story(db_session, StoryCreate(title="a", content="...", tag_names=[], is_published=True), author)
+
+    total, _ = story_service.get_all_stories(db_session, 10, 0, None, author.id, None)
+    assert total == 1
+
+    # direct insert bypasses the service -> cached total is served
+    StoryFactory(user=author, is_published=True)
+    total, items = story_service.get_all_stories(db_session, 10, 0, None, author.id, None)
+    assert total == 1 and len(items) == 2
+
+    # a service write invalidates
+    story_service.create_story(db_session, StoryCreate(title="b", content="...", tag_names=[], is_published=True), author)
+    total, _ = story_service.get_all_stories(db_session, 10, 0, None, author.id, None)
+    assert total == 3
+
+    total, items = story_service.get_all_stories(db_session, 10, 0, None, author.id, None, total_mode="none")
+    assert total is None and len(items) == 3
+
+
 # -----------------------
 # DETAILS / VIEW LOG / FLAGS
 # -----------------------
@@ -241,7 +373,7 @@ def test_get_story_details_404_rules_and_flags(db_session: Session, monkeypatch)
     author = _allow_creator()
     other_user = UserFactory(role=RoleFactory(name="user"))
     mod = _allow_moderator()
-    monkeypatch.setattr(story_service, "moderate_content", lambda _: (False, []))
+    monkeypatch.setattr(story_service, "moderate_each", lambda texts: [(False, [])] * len(texts))
 
     # Create an unpublished story
     s = story_service.create_story(
@@ -268,7 +400,8 @@ def test_get_story_details_404_rules_and_flags(db_session: Session, monkeypatch)
     out2 = story_service.get_story_details(db_session, s.id, mod, _ReqStub())
     assert out2.id == s.id
 
-    # ViewHistory logged
+    # ViewHistory logged (buffered, written on flush)
+    story_service.view_buffer.flush(db_session)
     assert db_session.query(ViewHistory).filter_by(story_id=s.id).count() >= 2
 
     # Like/Bookmark flags computed
@@ -280,13 +413,75 @@ def test_get_story_details_404_rules_and_flags(db_session: Session, monkeypatch)
     assert out3.is_bookmarked_by_user is True
 
 
+def test_get_story_details_loads_viewer_state_and_author_in_one_query(db_session: Session):
+    author = _allow_creator()
+    viewer = UserFactory(role=RoleFactory(name="user"))
+    s = StoryFactory(user=author, is_published=True)
+    s.tags = [Tag(name="vs-tag")]
+    db_session.add(Like(user_id=viewer.id, story_id=s.id))
+    db_session.flush()
+    db_session.expire_all()
+    viewer = db_session.get(User, viewer.id)
+    _ = viewer.role.name  # role is resolved by auth before the service runs
+
+    with _count_queries(db_session) as q:
+        out = story_service.get_story_details(db_session, s.id, viewer, _ReqStub())
+
+    assert out.is_liked_by_user is True
+    assert out.is_bookmarked_by_user is False
+    assert out.user.id == author.id
+    assert [t.name for t in out.tags] == ["vs-tag"]
+    # story + author + viewer state in one row, tags in one IN-select
+    assert q["n"] == 2
+
+
+def test_view_buffer_batches_and_dedups_views(db_session: Session):
+    from app.services.view_buffer import ViewBuffer
+
+    story = StoryFactory(is_published=True)
+    viewer = UserFactory()
+    buf = ViewBuffer(max_size=100, flush_interval=60, dedup_window=60)
+
+    assert buf.record(story.id, viewer.id, "10.0.0.1", "pytest") is True
+    assert buf.record(story.id, viewer.id, "10.0.0.1", "pytest") is False   # refresh
+    assert buf.record(story.id, None, "10.0.0.2", "pytest") is True         # anonymous, by IP
+    assert buf.record(story.id, None, "10.0.0.2", "pytest") is False
+    assert buf.pending() == 2
+
+    # nothing hits the DB until flush
+    assert db_session.query(ViewHistory).filter_by(story_id=story.id).count() == 0
+    assert buf.flush(db_session) == 2
+    assert buf.pending() == 0
+    assert db_session.query(ViewHistory).filter_by(story_id=story.id).count() == 2
+
+
+def test_view_buffer_requeues_views_when_flush_fails(db_session: Session, monkeypatch):
+    from app.services.view_buffer import ViewBuffer
+
+    story = StoryFactory(is_published=True)
+    buf = ViewBuffer(max_size=100, flush_interval=60, dedup_window=60)
+    buf.record(story.id, UserFactory().id, "10.0.0.1", "pytest")
+
+    real = ViewBuffer._write
+    def down(db, rows):
+        raise RuntimeError("database unavailable")
+    monkeypatch.setattr(ViewBuffer, "_write", staticmethod(down))
+    with pytest.raises(RuntimeError):
+        buf.flush(db_session)
+    assert buf.pending() == 1  # the viewer is deduped now, so the view must not be lost
+
+    monkeypatch.setattr(ViewBuffer, "_write", staticmethod(real))
+    assert buf.flush(db_session) == 1
+    assert db_session.query(ViewHistory).filter_by(story_id=story.id).count() == 1
+
+
 # -----------------------
 # UPDATE / RE-MODERATION
 # -----------------------
 
 def test_update_story_by_author_success_and_reflag(db_session: Session, monkeypatch):
     author = _allow_creator()
-    monkeypatch.setattr(story_service, "moderate_content", lambda _: (True, ["nsfw"]))
+    monkeypatch.setattr(story_service, "moderate_each", lambda texts: [(True, ["nsfw"])] * len(texts))
 
     s = story_service.create_story(
         db_session,
@@ -302,10 +497,48 @@ def test_update_story_by_author_success_and_reflag(db_session: Session, monkeypa
     assert db_session.query(Flag).filter_by(story_id=s.id).count() >= 1
 
 
+def test_update_story_replaces_tags(db_session: Session, monkeypatch):
+    author = _allow_creator()
+    monkeypatch.setattr(story_service, "moderate_each", lambda texts: [(False, [])] * len(texts))
+    s = story_service.create_story(
+        db_session, StoryCreate(title="t", content="c", tag_names=["keep", "drop"], is_published=True), author
+    )
+
+    updated = story_service.update_story(db_session, s.id, StoryUpdate(tag_names=["keep", "new"]), author)
+    assert sorted(t.name for t in updated.tags) == ["keep", "new"]
+
+    updated = story_service.update_story(db_session, s.id, StoryUpdate(tag_names=[]), author)
+    assert updated.tags == []
+
+
+def test_story_tags_resolved_in_bulk(db_session: Session, monkeypatch):
+    author = _allow_creator()
+    monkeypatch.setattr(story_service, "moderate_each", lambda texts: [(False, [])] * len(texts))
+    s1 = story_service.create_story(db_session, StoryCreate(title="a", content="c", tag_names=[], is_published=True), author)
+    s2 = story_service.create_story(db_session, StoryCreate(title="b", content="c", tag_names=[], is_published=True), author)
+    db_session.add(Tag(name="bulk-0")); db_session.commit()
+    names = [f"bulk-{i}" for i in range(10)]
+
+    # one IN-select, one tag upsert, one story_tags insert — independent of tag count
+    with _count_queries(db_session) as q:
+        story_service.set_story_tags(db_session, s1.id, names)
+    assert q["n"] == 3
+
+    # warm cache: only the link insert
+    with _count_queries(db_session) as q:
+        story_service.set_story_tags(db_session, s2.id, names)
+    assert q["n"] == 1
+
+    db_session.commit()
+    db_session.expire_all()
+    assert sorted(t.name for t in s1.tags) == sorted(names)
+    assert db_session.query(Tag).count() == 10
+
+
 def test_update_story_permission_denied_for_non_author(db_session: Session, monkeypatch):
     author = _allow_creator()
     other = UserFactory(role=RoleFactory(name="user"))
-    monkeypatch.setattr(story_service, "moderate_content", lambda _: (False, []))
+    monkeypatch.setattr(story_service, "moderate_each", lambda texts: [(False, [])] * len(texts))
 
     s = story_service.create_story(
         db_session, StoryCreate(title="t", content="c", tag_names=[], is_published=True), author
@@ -320,7 +553,7 @@ def test_update_story_permission_denied_for_non_author(db_session: Session, monk
 
 def test_publish_and_unpublish_story(db_session: Session, monkeypatch):
     author = _allow_creator()
-    monkeypatch.setattr(story_service, "moderate_content", lambda _: (False, []))
+    monkeypatch.setattr(story_service, "moderate_each", lambda texts: [(False, [])] * len(texts))
 
     s = story_service.create_story(
         db_session, StoryCreate(title="t", content="c", tag_names=[], is_published=False), author
@@ -345,7 +578,7 @@ def test_publish_and_unpublish_story(db_session: Session, monkeypatch):
 
 def test_delete_story_soft_delete(db_session: Session, monkeypatch):
     author = _allow_creator()
-    monkeypatch.setattr(story_service, "moderate_content", lambda _: (False, []))
+    monkeypatch.setattr(story_service, "moderate_each", lambda texts: [(False, [])] * len(texts))
 
     s = story_service.create_story(
         db_session, StoryCreate(title="t", content="c", tag_names=[], is_published=True), author
@@ -359,6 +592,28 @@ def test_delete_story_soft_delete(db_session: Session, monkeypatch):
     assert all(i.id != s.id for i in items)
 
 
+def test_author_totals_follow_story_writes_and_reconcile(db_session: Session, monkeypatch):
+    from app.services.counters import reconcile_user_counters
+
+    author = _allow_creator()
+    monkeypatch.setattr(story_service, "moderate_each", lambda texts: [(False, [])] * len(texts))
+    s1 = story_service.create_story(db_session, StoryCreate(title="a", content="c", tag_names=[], is_published=True), author)
+    story_service.create_story(db_session, StoryCreate(title="b", content="c", tag_names=[], is_published=True), author)
+    db_session.refresh(author)
+    assert author.total_posts == 2
+
+    story_service.delete_story(db_session, s1.id, author)
+    story_service.delete_story(db_session, s1.id, author)  # repeated delete must not double-count
+    db_session.refresh(author)
+    assert author.total_posts == 1
+
+    author.total_posts = 42  # drift
+    db_session.commit()
+    reconcile_user_counters(db_session, [author.id])
+    db_session.refresh(author)
+    assert (author.total_posts, author.total_likes, author.total_comments) == (1, 0, 0)
+
+
 # -----------------------
 # REGENERATE WITH FEEDBACK
 # -----------------------
@@ -366,7 +621,7 @@ def test_delete_story_soft_delete(db_session: Session, monkeypatch):
 def test_regenerate_with_feedback_updates_and_adds_revision(db_session: Session, monkeypatch):
     author = _allow_creator()
 
-    monkeypatch.setattr(story_service, "moderate_content", lambda _: (False, []))
+    monkeypatch.setattr(story_service, "moderate_each", lambda texts: [(False, [])] * len(texts))
     # seed a generated story
     s = story_service.generate_story(
         db_session,
@@ -390,3 +645,161 @@ def test_regenerate_with_feedback_updates_and_adds_revision(db_session: Session,
     revs = db_session.query(StoryRevision).filter_by(stories_id=s.id).order_by(StoryRevision.version).all()
     assert [r.version for r in revs] == [1, 2]
     assert revs[-1].feedback == "more action"
+
+
+# -----------------------
+# async moderation pipeline
+# -----------------------
+
+from app.models.moderation_job import ModerationJob
+from app.services.moderation_jobs import moderation_queue
+
+
+@pytest.fixture
+def async_moderation(monkeypatch):
+    monkeypatch.setattr(story_service.settings, "MODERATION_ASYNC", True)
+
+
+def test_create_story_is_held_until_worker_scans(db_session: Session, monkeypatch, async_moderation):
+    author = _allow_creator()
+    monkeypatch.setattr(story_service, "moderate_each", lambda texts: [(False, [])] * len(texts))
+
+    s = story_service.create_story(db_session, StoryCreate(title="t", content="c", tag_names=[], is_published=True), author)
+    assert s.status == StoryStatus.pending_review and s.is_published is False
+    job = db_session.query(ModerationJob).filter_by(story_id=s.id).one()
+    assert job.status == "pending" and job.publish is True
+
+    assert moderation_queue.process_pending(db_session) == 1
+    db_session.refresh(s); db_session.refresh(job)
+    assert s.status == StoryStatus.published and s.is_published is True
+    assert job.status == "done" and job.attempts == 1
+
+
+def test_worker_flags_and_holds_story(db_session: Session, monkeypatch, async_moderation):
+    author = _allow_creator()
+    monkeypatch.setattr(story_service, "moderate_each", lambda texts: [(True, ["profanity"])] * len(texts))
+
+    s = story_service.create_story(db_session, StoryCreate(title="t", content="c", tag_names=[], is_published=True), author)
+    assert db_session.query(Flag).filter_by(story_id=s.id).count() == 0  # nothing on the request path
+
+    moderation_queue.process_pending(db_session)
+    db_session.refresh(s)
+    assert s.is_flagged is True and s.is_published is False and s.status == StoryStatus.draft
+    assert db_session.query(Flag).filter_by(story_id=s.id).count() == 1
+
+
+def test_edit_while_pending_keeps_publish_intent(db_session: Session, monkeypatch, async_moderation):
+    author = _allow_creator()
+    monkeypatch.setattr(story_service, "moderate_each", lambda texts: [(False, [])] * len(texts))
+
+    s = story_service.create_story(db_session, StoryCreate(title="t", content="c", tag_names=[], is_published=True), author)
+    story_service.update_story(db_session, s.id, StoryUpdate(content="edited"), author)
+
+    statuses = sorted(j.status for j in db_session.query(ModerationJob).filter_by(story_id=s.id))
+    assert statuses == ["pending", "superseded"]
+
+    moderation_queue.process_pending(db_session)
+    db_session.refresh(s)
+    assert s.status == StoryStatus.published and s.is_published is True
+
+
+def test_failed_job_is_retried_then_marked_failed(db_session: Session, monkeypatch, async_moderation):
+    author = _allow_creator()
+    s = story_service.create_story(db_session, StoryCreate(title="t", content="c", tag_names=[], is_published=False), author)
+
+    def boom(_):
+        raise RuntimeError("classifier down")
+    monkeypatch.setattr(story_service, "moderate_each", boom)
+
+    for _ in range(moderation_queue.max_attempts):
+        moderation_queue.process_pending(db_session)
+    job = db_session.query(ModerationJob).filter_by(story_id=s.id).one()
+    assert job.status == "failed" and "classifier down" in job.last_error
+    assert moderation_queue.process_pending(db_session) == 0
+
+    # not left in pending_review: flagged for a human instead
+    db_session.refresh(s)
+    assert s.status == StoryStatus.draft and s.is_flagged is True and s.is_published is False
+    assert db_session.query(Flag).filter_by(story_id=s.id, status="open").count() == 1
+
+
+def test_stale_running_job_on_last_attempt_is_failed(db_session: Session, monkeypatch, async_moderation):
+    from datetime import datetime, timedelta
+
+    author = _allow_creator()
+    s = story_service.create_story(db_session, StoryCreate(title="t", content="c", tag_names=[], is_published=True), author)
+    job = db_session.query(ModerationJob).filter_by(story_id=s.id).one()
+    # the worker died during its final attempt
+    job.status = "running"
+    job.attempts = moderation_queue.max_attempts
+    job.started_at = datetime.utcnow() - timedelta(seconds=moderation_queue.lease_seconds + 60)
+    db_session.commit()
+
+    assert moderation_queue.process_pending(db_session) == 0
+    db_session.refresh(job); db_session.refresh(s)
+    assert job.status == "failed"
+    assert s.is_flagged is True and s.is_published is False and s.status != StoryStatus.pending_review
+
+
+# -----------------------
+# incremental re-moderation
+# -----------------------
+
+class _RecordingScanner:
+    def __init__(self):
+        self.seen = []
+        self.calls = 0
+    def __call__(self, texts):
+        self.calls += 1
+        self.seen.extend(texts)
+        return [(False, [])] * len(texts)
+
+
+def test_update_with_unchanged_text_skips_moderation(db_session: Session, monkeypatch):
+    author = _allow_creator()
+    scanner = _RecordingScanner()
+    monkeypatch.setattr(story_service, "moderate_each", scanner)
+    s = story_service.create_story(db_session, StoryCreate(title="t", content="<p>a</p>", tag_names=[], is_published=True), author)
+    scanner.seen.clear()
+
+    updated = story_service.update_story(db_session, s.id, StoryUpdate(title="t", content="<p>a</p>"), author)
+    assert scanner.seen == []
+    assert updated.status == StoryStatus.published and updated.is_published is True
+
+
+def test_update_rescans_only_changed_paragraphs(db_session: Session, monkeypatch):
+    author = _allow_creator()
+    scanner = _RecordingScanner()
+    monkeypatch.setattr(story_service, "moderate_each", scanner)
+    body = "".join(f"<p>paragraph {i}</p>" for i in range(5))
+    s = story_service.create_story(db_session, StoryCreate(title="t", content=body, tag_names=[], is_published=True), author)
+    assert scanner.calls == 1  # title, 5 paragraphs and the 4 seams between them in one scan
+    assert len(scanner.seen) == 10
+    scanner.seen.clear()
+
+    edited = body.replace("paragraph 3", "paragraph three")
+    story_service.update_story(db_session, s.id, StoryUpdate(content=edited), author)
+    assert scanner.calls == 2
+    # the changed paragraph and the seams on either side of it; nothing else
+    assert sorted(scanner.seen) == sorted([
+        "<p>paragraph three", "<p>paragraph 2 <p>paragraph three", "<p>paragraph three <p>paragraph 4",
+    ])
+
+
+def test_cached_flagged_verdict_is_reused(db_session: Session, monkeypatch):
+    author = _allow_creator()
+    monkeypatch.setattr(story_service, "moderate_each", lambda texts: [("bad" in t, ["profanity"] if "bad" in t else []) for t in texts])
+    story_service.create_story(db_session, StoryCreate(title="t1", content="<p>bad line</p>", tag_names=[], is_published=True), author)
+
+    # scanner now says clean, but the identical paragraph keeps its stored verdict
+    monkeypatch.setattr(story_service, "moderate_each", lambda texts: [(False, [])] * len(texts))
+    s2 = story_service.create_story(db_session, StoryCreate(title="t2", content="<p>bad line</p>", tag_names=[], is_published=True), author)
+    assert s2.is_flagged is True and s2.is_published is False
+
+
+def test_phrase_split_across_paragraphs_is_caught(db_session: Session):
+    from app.services.moderation import moderate_each
+    from app.services.moderation_verdicts import moderate_incremental
+
+    flagged, _ = moderate_incremental(db_session, ["title", "it was 2 girls\n\n1 cup after that"], moderate_each)
+    assert flagged is True
@@ -110,4 +110,25 @@ def test_get_automod_user_race_safe(db_session: Session, monkeypatch):
     assert user is mock_automod_user
     assert user.username == "automod"
     assert mock_user_filter.first.call_count == 2 # Proves both User queries ran
-    assert mock_role_filter.first.call_count == 1 # Proves the Role query ran
\ No newline at end of file
+    assert mock_role_filter.first.call_count == 1 # Proves the Role query ran
+
+def test_get_automod_user_id_caches_committed_id(db_session: Session, monkeypatch):
+    import app.services.system as system_service
+
+    first = system_service.get_automod_user_id(db_session)
+    db_session.commit()
+
+    monkeypatch.setattr(system_service, "get_automod_user", lambda db: pytest.fail("should be cached"))
+    monkeypatch.setattr(db_session, "execute", lambda *a, **k: pytest.fail("should not query"))
+    assert system_service.get_automod_user_id(db_session) == first
+
+
+def test_get_automod_user_id_forgets_rolled_back_user(db_session: Session):
+    import app.services.system as system_service
+
+    created = system_service.get_automod_user_id(db_session)
+    db_session.rollback()
+
+    assert system_service._automod_user_id is None
+    assert system_service.get_automod_user_id(db_session, create=False) is None
+    assert system_service.get_automod_user_id(db_session) != created
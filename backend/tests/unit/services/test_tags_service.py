@@ -59,3 +59,56 @@ def test_delete_tag_happy_path(db_session: Session):
     t = Tag(name="todelete"); db_session.add(t); db_session.commit()
     tags_service.delete_tag(db_session, t.id)
     assert db_session.query(Tag).filter_by(id=t.id).count() == 0
+
+
+def test_resolve_tag_ids_creates_missing_and_caches(db_session: Session):
+    existing = Tag(name="known"); db_session.add(existing); db_session.commit()
+
+    ids = tags_service.resolve_tag_ids(db_session, ["fresh", "known", "fresh"])
+    assert len(ids) == 2 and ids[1] == existing.id
+    assert db_session.query(Tag).filter_by(name="fresh").one().id == ids[0]
+
+    # served from the cache: no new rows, same ids
+    assert tags_service.resolve_tag_ids(db_session, ["known", "fresh"]) == [ids[1], ids[0]]
+    assert db_session.query(Tag).count() == 2
+
+
+def test_tag_mutations_invalidate_cache(db_session: Session):
+    [tag_id] = tags_service.resolve_tag_ids(db_session, ["old"])
+    db_session.commit()
+    tags_service.update_tag(db_session, tag_id, name="renamed", description=None)
+
+    # "old" must not resolve to the renamed tag any more
+    [new_id] = tags_service.resolve_tag_ids(db_session, ["old"])
+    assert new_id != tag_id
+
+def test_resolved_tag_ids_are_cached_only_after_commit(db_session: Session):
+    # db_session.rollback() would end the fixture's outer transaction, so drive a
+    # session of our own whose commit/rollback only release/roll back a SAVEPOINT;
+    # everything it writes still goes away with the outer transaction.
+    with Session(
+        bind=db_session.connection(), join_transaction_mode="create_savepoint", expire_on_commit=False
+    ) as session:
+        tags_service.resolve_tag_ids(session, ["ephemeral"])
+        session.rollback()
+        assert "ephemeral" not in tags_service._tag_ids
+        assert session.query(Tag).filter_by(name="ephemeral").count() == 0
+
+        [tag_id] = tags_service.resolve_tag_ids(session, ["durable"])
+        assert "durable" not in tags_service._tag_ids
+        session.commit()
+        assert tags_service._tag_ids["durable"] == tag_id
+
+def test_set_story_tags_recovers_from_a_stale_cached_id(db_session: Session):
+    from tests.factories import StoryFactory
+
+    story = StoryFactory()
+    real = Tag(name="ghost"); db_session.add(real); db_session.commit()
+    tags_service._tag_ids["ghost"] = uuid.uuid4()  # deleted elsewhere, recreated under a new id
+
+    tags_service.set_story_tags(db_session, story.id, ["ghost"])
+    db_session.commit()
+
+    assert tags_service._tag_ids["ghost"] == real.id
+    db_session.expire_all()
+    assert [t.id for t in story.tags] == [real.id]